@@ -17,6 +17,7 @@ from fyle_slack_app.models.user_subscription_details import SubscriptionType
 from fyle_slack_app.slack import utils as slack_utils
 from fyle_slack_app.slack.ui.authorization.messages import get_post_authorization_message
 from fyle_slack_app.slack.ui.dashboard import messages as dashboard_messages
+from fyle_slack_app.slack.web_client import FyleSlackWebClient
 
 
 logger = logger.get_logger(__name__)
@@ -36,7 +37,7 @@ class FyleAuthorization(View):
         assertions.assert_found(slack_team, 'slack team not found')
 
         # Get slack client
-        slack_client = WebClient(token=slack_team.bot_access_token)
+        slack_client = FyleSlackWebClient(token=slack_team.bot_access_token, team_id=slack_team.id)
 
         # Fetch slack dm channel
         slack_user_dm_channel_id = slack_utils.get_slack_user_dm_channel_id(slack_client, state_params['user_id'])
@@ -126,7 +127,8 @@ class FyleAuthorization(View):
             slack_dm_channel_id=slack_user_dm_channel_id,
             fyle_refresh_token=fyle_refresh_token,
             fyle_user_id=fyle_profile['user_id'],
-            fyle_org_id=fyle_profile['org_id']
+            fyle_org_id=fyle_profile['org_id'],
+            fyle_cluster_domain=fyle_utils.get_cluster_domain(fyle_refresh_token)
         )
 
         return user
@@ -154,7 +156,7 @@ class FyleAuthorization(View):
 
     def create_notification_subscription(self, user: User, fyle_profile: Dict) -> None:
         access_token = fyle_utils.get_fyle_access_token(user.fyle_refresh_token)
-        cluster_domain = fyle_utils.get_cluster_domain(user.fyle_refresh_token)
+        cluster_domain = fyle_utils.get_user_cluster_domain(user)
 
         SUBSCRIPTON_WEBHOOK_DETAILS_MAPPING = {
             SubscriptionType.FYLER_SUBSCRIPTION: {
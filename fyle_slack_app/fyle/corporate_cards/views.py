@@ -10,7 +10,8 @@ class FyleCorporateCard:
     connection: Platform = None
 
     def __init__(self, user: User) -> None:
-        self.connection = fyle_utils.get_fyle_sdk_connection(user.fyle_refresh_token)
+        cluster_domain = fyle_utils.get_user_cluster_domain(user)
+        self.connection = fyle_utils.get_fyle_sdk_connection(user.fyle_refresh_token, cluster_domain)
 
 
     def get_corporate_card_by_id(self, corporate_card_id: str) -> Dict:
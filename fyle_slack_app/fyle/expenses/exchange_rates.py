@@ -0,0 +1,61 @@
+from typing import Callable, List
+
+from django.core.cache import cache
+
+from fyle_slack_app.libs.concurrency import SingleFlight
+
+
+# Rates of a day don't change, keeping them a little longer than a day covers timezone differences
+EXCHANGE_RATE_CACHE_TIMEOUT = 36 * 3600
+
+# Foreign currencies used by an org are counted over this period to pick the rates worth prefetching
+CURRENCY_USAGE_TIMEOUT = 30 * 86400
+
+_exchange_rate_fetches = SingleFlight()
+
+
+def get_exchange_rate(from_currency: str, to_currency: str, date: str, fetch: Callable) -> float:
+    '''
+        Returns the exchange rate of a day from the cache, `fetch(from_currency, to_currency, date)`
+        is called to fill it on a miss, once per process no matter how many requests miss at the same time.
+    '''
+    cache_key = 'exchange_rate.{}.{}.{}'.format(from_currency, to_currency, date)
+
+    exchange_rate = cache.get(cache_key)
+
+    if exchange_rate is None:
+        exchange_rate = _exchange_rate_fetches.do(cache_key, _fetch_exchange_rate, cache_key, fetch, from_currency, to_currency, date)
+
+    return exchange_rate
+
+
+def track_currency_usage(org_id: str, home_currency: str, foreign_currency: str) -> None:
+    usage_key = '{}.currency_usage'.format(org_id)
+
+    # Counts are approximate, concurrent updates may drop an increment which is fine for ranking
+    currency_usage = cache.get(usage_key) or {'home_currency': home_currency, 'counts': {}}
+    currency_usage['home_currency'] = home_currency
+    currency_usage['counts'][foreign_currency] = currency_usage['counts'].get(foreign_currency, 0) + 1
+
+    cache.set(usage_key, currency_usage, CURRENCY_USAGE_TIMEOUT)
+
+
+def get_most_used_currencies(org_id: str, limit: int) -> List[str]:
+    currency_usage = cache.get('{}.currency_usage'.format(org_id))
+
+    if currency_usage is None:
+        return []
+
+    counts = currency_usage['counts']
+    return sorted(counts, key=counts.get, reverse=True)[:limit]
+
+
+def get_org_home_currency(org_id: str) -> str:
+    currency_usage = cache.get('{}.currency_usage'.format(org_id))
+    return currency_usage['home_currency'] if currency_usage is not None else None
+
+
+def _fetch_exchange_rate(cache_key: str, fetch: Callable, from_currency: str, to_currency: str, date: str) -> float:
+    exchange_rate = fetch(from_currency, to_currency, date)
+    cache.set(cache_key, exchange_rate, EXCHANGE_RATE_CACHE_TIMEOUT)
+    return exchange_rate
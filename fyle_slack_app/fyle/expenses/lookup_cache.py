@@ -0,0 +1,82 @@
+from typing import Callable, Dict
+
+import copy
+
+from django.conf import settings
+
+from fyle_slack_app.libs.lru_cache import LRUCache
+
+
+EMPLOYEE_SUGGESTION_LIMIT = 10
+
+# Results of typeahead lookups of this process, shared by the users of an org
+# Place details don't depend on the org, so they are shared by everyone
+_employee_results = LRUCache(max_size=settings.FYLE_LOOKUP_CACHE_SIZE, timeout=settings.FYLE_EMPLOYEE_LOOKUP_CACHE_TIMEOUT)
+_place_results = LRUCache(max_size=settings.FYLE_LOOKUP_CACHE_SIZE, timeout=settings.FYLE_PLACE_LOOKUP_CACHE_TIMEOUT)
+_place_details = LRUCache(max_size=settings.FYLE_LOOKUP_CACHE_SIZE, timeout=settings.FYLE_PLACE_LOOKUP_CACHE_TIMEOUT)
+
+
+def get_employees_by_email_prefix(org_id: str, prefix: str, fetch: Callable) -> Dict:
+    '''
+        Returns employees of the org whose email starts with `prefix` (case insensitive),
+        `fetch(prefix)` is called on a miss.
+
+        A cached result of a shorter prefix which holds every matching employee
+        answers longer prefixes by filtering it, e.g. once `jo` is cached `joh` and `john` need no lookup.
+    '''
+    prefix = prefix.lower()
+
+    employees = _employee_results.get((org_id, prefix))
+
+    # Wildcards of the remote `ilike` query can't be matched locally
+    if employees is None and '%' not in prefix and '_' not in prefix:
+        employees = _get_employees_from_shorter_prefix(org_id, prefix)
+
+    if employees is None:
+        employees = fetch(prefix)
+        _employee_results.set((org_id, prefix), employees)
+
+    return copy.deepcopy(employees)
+
+
+def get_places_autocomplete(org_id: str, query: str, fetch: Callable) -> Dict:
+    # Autocomplete ranks places by relevance, so only exact queries are answered from cache
+    places = _place_results.get((org_id, query))
+
+    if places is None:
+        places = fetch(query)
+        _place_results.set((org_id, query), places)
+
+    return copy.deepcopy(places)
+
+
+def get_place_by_place_id(place_id: str, fetch: Callable) -> Dict:
+    place = _place_details.get(place_id)
+
+    if place is None:
+        place = fetch(place_id)
+        _place_details.set(place_id, place)
+
+    return copy.deepcopy(place)
+
+
+def _get_employees_from_shorter_prefix(org_id: str, prefix: str) -> Dict:
+    for length in range(len(prefix) - 1, 0, -1):
+        employees = _employee_results.get((org_id, prefix[:length]))
+
+        # An incomplete result might not hold every employee matching the longer prefix
+        if employees is not None and employees['count'] <= len(employees['data']):
+            matching_employees = [
+                employee for employee in employees['data'] if employee['email'].lower().startswith(prefix)
+            ]
+
+            employees = {
+                'count': len(matching_employees),
+                'data': matching_employees
+            }
+
+            _employee_results.set((org_id, prefix), employees)
+
+            return employees
+
+    return None
@@ -0,0 +1,44 @@
+from typing import Any, Callable
+
+from django.conf import settings
+from django.core.cache import cache
+
+from fyle_slack_app.libs import utils
+from fyle_slack_app.libs.concurrency import SingleFlight
+
+
+# Fetches of the same metadata by concurrent requests of a process are collapsed into one
+_org_metadata_fetches = SingleFlight()
+
+
+def get_org_metadata(org_id: str, name: str, fetch: Callable, *key_parts: Any) -> Any:
+    '''
+        Returns org wide expense form metadata (e.g. expense fields, custom fields of a category)
+        from the cache shared by every user of the org, `fetch` is called to fill it on a miss.
+        Metadata scoped to a user is cached per user by passing the user in `key_parts`.
+
+        Entries aren't dropped when the metadata changes in Fyle, changes show up once they expire
+        (`FYLE_ORG_METADATA_CACHE_TIMEOUT`).
+    '''
+    # Users linked before org id was stored on them don't share metadata with anyone
+    if not org_id:
+        return fetch()
+
+    cache_key = '{}.{}.{}'.format(
+        org_id,
+        name,
+        utils.get_hashed_args(key_parts)
+    )
+
+    metadata = cache.get(cache_key)
+
+    if metadata is None:
+        metadata = _org_metadata_fetches.do(cache_key, _fetch_org_metadata, cache_key, fetch)
+
+    return metadata
+
+
+def _fetch_org_metadata(cache_key: str, fetch: Callable) -> Any:
+    metadata = fetch()
+    cache.set(cache_key, metadata, settings.FYLE_ORG_METADATA_CACHE_TIMEOUT)
+    return metadata
@@ -0,0 +1,253 @@
+from typing import Callable, Dict, List, Union
+
+import datetime
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from fyle_slack_app.libs.lru_cache import LRUCache
+from fyle_slack_app.libs.task_lanes import TaskLane, async_task
+
+
+# What is indexed for each kind of suggestion, `query_params` are the filters the remote suggestion query uses
+# Spender lists of projects and cost centers only have the ones the user is allowed to use, so those are indexed per user
+SUGGESTION_SOURCES = {
+    'category': {
+        'list_method': 'get_categories',
+        'name_field': 'display_name',
+        'query_params': {
+            'system_category': 'not_in.(Unspecified, Per Diem, Mileage, Activity)'
+        },
+        'is_user_scoped': False
+    },
+    'project': {
+        'list_method': 'get_projects',
+        'name_field': 'display_name',
+        'query_params': {},
+        'is_user_scoped': True
+    },
+    'cost_center': {
+        'list_method': 'get_cost_centers',
+        'name_field': 'name',
+        'query_params': {},
+        'is_user_scoped': True
+    }
+}
+
+SUGGESTION_INDEX_PAGE_SIZE = 200
+SUGGESTION_LIMIT = 10
+
+# Built indexes of this process, keyed by their snapshot key (org, org metadata version, kind and user if user scoped)
+# Kept for a minute so snapshots refreshed by other processes are picked up
+_suggestion_indexes = LRUCache(max_size=300, timeout=60)
+
+
+class SuggestionIndex:
+    '''
+        In-memory index answering `ilike.%text%` suggestion queries for a list of records.
+
+        Records are kept sorted by name and each name is indexed by its trigrams,
+        so a search only checks the names containing every trigram of the text.
+    '''
+
+    def __init__(self, records: List[Dict], synced_at: float) -> None:
+        self.synced_at = synced_at
+        self.records = sorted(records, key=lambda record: record['name'].lower())
+        self._names = [record['name'].lower() for record in self.records]
+
+        self._trigram_positions: Dict[str, List[int]] = {}
+        for position, name in enumerate(self._names):
+            for trigram in set(get_trigrams(name)):
+                self._trigram_positions.setdefault(trigram, []).append(position)
+
+
+    def search(self, text: str, limit: int = SUGGESTION_LIMIT, record_filter: Callable = None) -> List[Dict]:
+        text = text.lower()
+
+        trigrams = set(get_trigrams(text))
+
+        if trigrams:
+            position_lists = sorted((self._trigram_positions.get(trigram, []) for trigram in trigrams), key=len)
+            positions = set(position_lists[0])
+            for position_list in position_lists[1:]:
+                positions.intersection_update(position_list)
+            positions = sorted(positions)
+        else:
+            positions = range(len(self.records))
+
+        matches = []
+        for position in positions:
+            record = self.records[position]
+            if text in self._names[position] and (record_filter is None or record_filter(record)):
+                matches.append(record)
+                if len(matches) == limit:
+                    break
+
+        return matches
+
+
+def rank_suggestions(values: List[str], text: str, limit: int) -> List[str]:
+    '''
+        Filters values containing `text` (case insensitive) and ranks exact matches first,
+        then values starting with it, then values with a word starting with it, then the rest.
+        Values of the same rank keep their order.
+    '''
+    text = text.lower().strip()
+
+    if not text:
+        return values[:limit]
+
+    ranked_values = [[], [], [], []]
+
+    for value in values:
+        lowered_value = value.lower()
+
+        if text not in lowered_value:
+            continue
+
+        if lowered_value == text:
+            rank = 0
+        elif lowered_value.startswith(text):
+            rank = 1
+        elif ' {}'.format(text) in lowered_value:
+            rank = 2
+        else:
+            rank = 3
+
+        ranked_values[rank].append(value)
+
+    return [value for values_of_rank in ranked_values for value in values_of_rank][:limit]
+
+
+def get_trigrams(text: str) -> List[str]:
+    return [text[index:index + 3] for index in range(len(text) - 2)]
+
+
+def search_suggestions(fyle_expense, kind: str, text: str, record_filter: Callable = None) -> Union[List[Dict], None]:
+    '''
+        Returns suggestions of `kind` from the org's (or user's) index, None when the index isn't built yet
+        (a build is scheduled, the caller should fall back to the remote query meanwhile).
+    '''
+    if not fyle_expense.org_id:
+        return None
+
+    snapshot_key = get_snapshot_key(fyle_expense, kind)
+
+    index = _suggestion_indexes.get(snapshot_key)
+
+    if index is None:
+        snapshot = cache.get(snapshot_key)
+
+        if snapshot is None:
+            schedule_suggestion_index_refresh(fyle_expense, kind)
+            return None
+
+        index = SuggestionIndex(snapshot['records'], snapshot['synced_at'])
+        _suggestion_indexes.set(snapshot_key, index)
+
+    if index.synced_at + settings.FYLE_SUGGESTION_INDEX_REFRESH_INTERVAL <= time.time():
+        schedule_suggestion_index_refresh(fyle_expense, kind)
+
+    return index.search(text, record_filter=record_filter)
+
+
+def schedule_suggestion_index_refresh(fyle_expense, kind: str) -> None:
+    refresh_lock_key = '{}.refreshing'.format(get_snapshot_key(fyle_expense, kind))
+
+    # Only one refresh of an index is queued at a time
+    if cache.add(refresh_lock_key, True, settings.FYLE_SUGGESTION_INDEX_REFRESH_INTERVAL):
+        async_task(
+            TaskLane.BULK,
+            'fyle_slack_app.fyle.expenses.tasks.refresh_suggestion_index',
+            fyle_expense.slack_user_id,
+            kind
+        )
+
+
+def refresh_suggestion_index(fyle_expense, kind: str) -> None:
+    '''
+        Stores a snapshot of the records to index in the cache.
+        An existing snapshot is updated with the records changed since it was synced,
+        a missing one is built by paging through the whole list.
+    '''
+    snapshot_key = get_snapshot_key(fyle_expense, kind)
+
+    # Lock taken when the refresh got queued is released even if the refresh fails, so the next search queues it again
+    try:
+        store_suggestion_snapshot(fyle_expense, kind, snapshot_key)
+    finally:
+        cache.delete('{}.refreshing'.format(snapshot_key))
+
+
+def store_suggestion_snapshot(fyle_expense, kind: str, snapshot_key: str) -> None:
+    snapshot = cache.get(snapshot_key)
+
+    # Records updated while the list is being fetched are picked up by the next refresh
+    synced_at = time.time()
+
+    if snapshot is None:
+        records = {
+            record['id']: record
+            for record in fetch_suggestion_records(fyle_expense, kind, {'is_enabled': 'eq.{}'.format(True)})
+            if record['is_enabled']
+        }
+    else:
+        records = {record['id']: record for record in snapshot['records']}
+
+        updated_since = datetime.datetime.fromtimestamp(snapshot['synced_at'], tz=datetime.timezone.utc)
+        changed_records = fetch_suggestion_records(fyle_expense, kind, {'updated_at': 'gte.{}'.format(updated_since.isoformat())})
+
+        for record in changed_records:
+            if record['is_enabled']:
+                records[record['id']] = record
+            else:
+                records.pop(record['id'], None)
+
+    cache.set(snapshot_key, {
+        'records': list(records.values()),
+        'synced_at': synced_at
+    }, settings.FYLE_SUGGESTION_INDEX_TIMEOUT)
+
+
+def fetch_suggestion_records(fyle_expense, kind: str, filters: Dict) -> List[Dict]:
+    suggestion_source = SUGGESTION_SOURCES[kind]
+    list_records = getattr(fyle_expense, suggestion_source['list_method'])
+    name_field = suggestion_source['name_field']
+
+    records = []
+    offset = 0
+
+    while True:
+        query_params = {
+            'offset': offset,
+            'limit': str(SUGGESTION_INDEX_PAGE_SIZE),
+            'order': 'id.asc',
+            **suggestion_source['query_params'],
+            **filters
+        }
+
+        response = list_records(query_params)
+
+        for record in response['data']:
+            records.append({
+                'id': record['id'],
+                'name': record[name_field],
+                'is_enabled': record['is_enabled'],
+                'restricted_project_ids': record.get('restricted_project_ids')
+            })
+
+        offset += SUGGESTION_INDEX_PAGE_SIZE
+        if offset >= response['count']:
+            break
+
+    return records
+
+
+def get_snapshot_key(fyle_expense, kind: str) -> str:
+    snapshot_key = '{}.{}_suggestion_index'.format(fyle_expense.org_id, kind)
+
+    if SUGGESTION_SOURCES[kind]['is_user_scoped']:
+        snapshot_key = '{}.{}'.format(snapshot_key, fyle_expense.slack_user_id)
+
+    return snapshot_key
@@ -0,0 +1,65 @@
+import datetime
+
+from django.conf import settings
+
+from fyle_slack_app.models.users import User
+from fyle_slack_app.fyle.expenses.views import FyleExpense
+from fyle_slack_app.fyle.expenses import exchange_rates, suggestion_index
+from fyle_slack_app.libs import logger, utils
+from fyle_slack_app.libs.task_lanes import TaskLane, async_task
+
+
+logger = logger.get_logger(__name__)
+
+
+def refresh_suggestion_index(user_id: str, kind: str) -> None:
+    user = utils.get_or_none(User, slack_user_id=user_id)
+
+    if user is None:
+        logger.info('User unlinked before refreshing %s suggestion index -> %s', kind, user_id)
+        return
+
+    fyle_expense = FyleExpense(user)
+
+    suggestion_index.refresh_suggestion_index(fyle_expense, kind)
+
+
+def prefetch_exchange_rates() -> None:
+    # Scheduled daily, queues caching of today's rates of the foreign currencies each org uses the most
+    current_date = datetime.datetime.today().strftime('%Y-%m-%d')
+
+    org_ids = User.objects.exclude(fyle_org_id='').order_by().values_list('fyle_org_id', flat=True).distinct()
+
+    for org_id in org_ids:
+        async_task(TaskLane.BULK, 'fyle_slack_app.fyle.expenses.tasks.prefetch_org_exchange_rates', org_id, current_date)
+
+
+def prefetch_org_exchange_rates(org_id: str, current_date: str) -> None:
+    foreign_currencies = exchange_rates.get_most_used_currencies(org_id, settings.FYLE_EXCHANGE_RATE_PREFETCH_LIMIT)
+
+    if len(foreign_currencies) == 0:
+        return
+
+    home_currency = exchange_rates.get_org_home_currency(org_id)
+
+    user = User.objects.filter(fyle_org_id=org_id).first()
+
+    if user is None:
+        logger.info('Users of org unlinked before prefetching exchange rates -> %s', org_id)
+        return
+
+    try:
+        fyle_expense = FyleExpense(user)
+    # pylint: disable=broad-except
+    except Exception as error:
+        logger.error('Error while connecting to Fyle to prefetch exchange rates for org -> %s', org_id)
+        logger.error('Error -> %s', error)
+        return
+
+    for foreign_currency in foreign_currencies:
+        try:
+            exchange_rates.get_exchange_rate(foreign_currency, home_currency, current_date, fyle_expense.fetch_exchange_rate)
+        # pylint: disable=broad-except
+        except Exception as error:
+            logger.error('Error while prefetching %s to %s exchange rate for org -> %s', foreign_currency, home_currency, org_id)
+            logger.error('Error -> %s', error)
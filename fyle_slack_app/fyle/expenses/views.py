@@ -1,4 +1,4 @@
-from typing import Dict, List
+from typing import Callable, Dict, List
 
 import datetime
 
@@ -10,10 +10,16 @@ from fyle_slack_app.fyle.utils import get_fyle_sdk_connection
 from fyle_slack_app.models.users import User
 from fyle_slack_app.fyle import utils as fyle_utils
 from fyle_slack_app.fyle.notifications.views import FyleNotificationView
-from fyle_slack_app.libs import assertions, http
+from fyle_slack_app.fyle.expenses.org_metadata import get_org_metadata
+from fyle_slack_app.fyle.expenses import exchange_rates, lookup_cache
+from fyle_slack_app.libs import assertions, currencies, http
+from fyle_slack_app.libs.concurrency import run_concurrently
 from fyle_slack_app import tracking
 
 
+# Deadline shared by the Fyle calls made to render the expense form
+EXPENSE_FORM_DETAILS_TIMEOUT = 20
+
 
 # pylint: disable=too-many-public-methods
 class FyleExpense:
@@ -21,11 +27,33 @@ class FyleExpense:
     connection: Platform = None
 
     def __init__(self, user: User) -> None:
-        self.connection = get_fyle_sdk_connection(user.fyle_refresh_token)
+        self.slack_user_id = user.slack_user_id
+        self.org_id = user.fyle_org_id
+        self.refresh_token = user.fyle_refresh_token
+        self.cluster_domain = fyle_utils.get_user_cluster_domain(user)
+        self.connection = get_fyle_sdk_connection(user.fyle_refresh_token, self.cluster_domain)
+
+
+    def list_resources(self, path: str, query_params: Dict, sdk_list: Callable) -> Dict:
+        '''
+            Lists resources with the SDK, or with a request bounded by the deadline when one is set (`http.deadline`).
+            SDK calls can't be bounded by a deadline, they have no timeout and are retried with a backoff.
+        '''
+        if http.get_deadline() is None:
+            return sdk_list(query_params)
+
+        response = fyle_utils.get_from_fyle_platform(path, query_params, self.refresh_token, self.cluster_domain)
+        fyle_utils.raise_for_platform_error(response)
+
+        return response.json()
 
 
     def get_expense_fields(self, query_params: Dict) -> Dict:
-        return self.connection.v1.spender.expense_fields.list(query_params=query_params)
+        return self.list_resources(
+            'spender/expense_fields',
+            query_params,
+            lambda query_params: self.connection.v1.spender.expense_fields.list(query_params=query_params)
+        )
 
 
     def get_default_expense_fields(self) -> Dict:
@@ -38,7 +66,11 @@ class FyleExpense:
             'is_custom': 'eq.{}'.format(False)
         }
 
-        return self.get_expense_fields(default_expense_fields_query_params)
+        return get_org_metadata(
+            self.org_id,
+            'default_expense_fields',
+            lambda: self.get_expense_fields(default_expense_fields_query_params)
+        )
 
 
     def get_custom_fields_by_category_id(self, category_id: str) -> Dict:
@@ -51,7 +83,12 @@ class FyleExpense:
             'category_ids': 'cs.[{}]'.format(int(category_id))
         }
 
-        return self.get_expense_fields(custom_fields_query_params)
+        return get_org_metadata(
+            self.org_id,
+            'custom_fields',
+            lambda: self.get_expense_fields(custom_fields_query_params),
+            int(category_id)
+        )
 
 
     def get_merchants_expense_field(self) -> Dict:
@@ -64,15 +101,27 @@ class FyleExpense:
             'is_custom': 'eq.{}'.format(False)
         }
 
-        return self.get_expense_fields(query_params)
+        return get_org_metadata(
+            self.org_id,
+            'merchants_expense_field',
+            lambda: self.get_expense_fields(query_params)
+        )
 
 
     def get_categories(self, query_params: Dict) -> Dict:
-        return self.connection.v1.spender.categories.list(query_params=query_params)
+        return self.list_resources(
+            'spender/categories',
+            query_params,
+            lambda query_params: self.connection.v1.spender.categories.list(query_params=query_params)
+        )
 
 
     def get_projects(self, query_params: Dict) -> Dict:
-        return self.connection.v1.spender.projects.list(query_params=query_params)
+        return self.list_resources(
+            'spender/projects',
+            query_params,
+            lambda query_params: self.connection.v1.spender.projects.list(query_params=query_params)
+        )
 
     def get_merchants(self, query_text: str) -> Dict:
         query_params = {
@@ -81,10 +130,18 @@ class FyleExpense:
             'order': 'display_name.asc',
             'q': query_text
         }
-        return self.connection.v1.spender.merchants.list(query_params=query_params)
+        return self.list_resources(
+            'spender/merchants',
+            query_params,
+            lambda query_params: self.connection.v1.spender.merchants.list(query_params=query_params)
+        )
 
     def get_cost_centers(self, query_params: Dict) -> Dict:
-        return self.connection.v1.spender.cost_centers.list(query_params=query_params)
+        return self.list_resources(
+            'spender/cost_centers',
+            query_params,
+            lambda query_params: self.connection.v1.spender.cost_centers.list(query_params=query_params)
+        )
 
 
     def get_expenses(self, query_params: Dict) -> Dict:
@@ -92,30 +149,73 @@ class FyleExpense:
 
 
     def get_reports(self, query_params: Dict) -> Dict:
-        return self.connection.v1.spender.reports.list(query_params=query_params)
+        return self.list_resources(
+            'spender/reports',
+            query_params,
+            lambda query_params: self.connection.v1.spender.reports.list(query_params=query_params)
+        )
 
 
     def get_employees(self, query_params: Dict) -> Dict:
-        return self.connection.v1.spender.employees.list(query_params=query_params)
+        return self.list_resources(
+            'spender/employees',
+            query_params,
+            lambda query_params: self.connection.v1.spender.employees.list(query_params=query_params)
+        )
+
+
+    def get_employees_by_email_prefix(self, email_prefix: str) -> Dict:
+        def fetch_employees(email_prefix: str) -> Dict:
+            query_params = {
+                'offset': 0,
+                'limit': str(lookup_cache.EMPLOYEE_SUGGESTION_LIMIT),
+                'order': 'email.asc',
+                'email': 'ilike.{}%'.format(email_prefix),
+            }
+            return self.get_employees(query_params)
+
+        return lookup_cache.get_employees_by_email_prefix(self.org_id, email_prefix, fetch_employees)
 
 
     def get_places_autocomplete(self, query: str) -> Dict:
-        return self.connection.v1.common.places_autocomplete.list(q=query)
+        return lookup_cache.get_places_autocomplete(
+            self.org_id,
+            query,
+            lambda query: self.list_resources(
+                'common/places/autocomplete',
+                {'q': query},
+                lambda query_params: self.connection.v1.common.places_autocomplete.list(q=query_params['q'])
+            )
+        )
 
 
     def get_place_by_place_id(self, place_id: str) -> Dict:
-        return self.connection.v1.common.places.get_by_id(place_id)
+        return lookup_cache.get_place_by_place_id(place_id, self.connection.v1.common.places.get_by_id)
 
 
     def get_exchange_rate(self, from_currency: str, to_currency: str) -> Dict:
         current_date = datetime.datetime.today().strftime('%Y-%m-%d')
+
+        # Rates of currencies an org uses often are prefetched daily
+        if self.org_id:
+            exchange_rates.track_currency_usage(self.org_id, to_currency, from_currency)
+
+        return exchange_rates.get_exchange_rate(from_currency, to_currency, current_date, self.fetch_exchange_rate)
+
+
+    def fetch_exchange_rate(self, from_currency: str, to_currency: str, date: str) -> float:
         exchange_rate = self.connection.v1.common.currencies_exchange_rate.get(
-            from_currency, to_currency, current_date
+            from_currency, to_currency, date
         )
         return exchange_rate['data']['exchange_rate']
 
 
     def check_project_availability(self) -> bool:
+        # Projects a spender can pick are scoped to them
+        return get_org_metadata(self.org_id, 'is_project_available', self.fetch_project_availability, self.slack_user_id)
+
+
+    def fetch_project_availability(self) -> bool:
         projects_query_params = {
             'offset': 0,
             'limit': '1',
@@ -131,6 +231,11 @@ class FyleExpense:
 
 
     def check_cost_center_availability(self) -> bool:
+        # Cost centers a spender can pick are scoped to them
+        return get_org_metadata(self.org_id, 'is_cost_center_available', self.fetch_cost_center_availability, self.slack_user_id)
+
+
+    def fetch_cost_center_availability(self) -> bool:
         cost_centers_query_params = {
             'offset': 0,
             'limit': '1',
@@ -146,27 +251,18 @@ class FyleExpense:
 
 
     def upsert_expense(self, expense_payload: Dict, refresh_token: str) -> Dict:
-        access_token = fyle_utils.get_fyle_access_token(refresh_token)
-        cluster_domain = fyle_utils.get_cluster_domain(refresh_token)
-
-        url = '{}/platform/v1/spender/expenses'.format(cluster_domain)
-        headers = {
-            'content-type': 'application/json',
-            'Authorization': 'Bearer {}'.format(access_token)
-        }
-
         expense_payload = {
             'data': expense_payload
         }
 
-        response = http.post(url, json=expense_payload, headers=headers)
+        response = fyle_utils.post_to_fyle_platform('spender/expenses', expense_payload, refresh_token, self.cluster_domain)
         assertions.assert_valid(response.status_code == 200, 'Error creating expense')
         return response.json()['data']
 
 
     @staticmethod
     def get_currencies():
-        return ['ADP','AED','AFA','ALL','AMD','ANG','AOA','ARS','ATS','AUD','AWG','AZM','BAM','BBD','BDT','BEF','BGL','BGN','BHD','BIF','BMD','BND','BOB','BOV','BRL','BSD','BTN','BWP','BYB','BZD','CAD','CDF','CHF','CLF','CLP','CNY','COP','CRC','CUP','CVE','CYP','CZK','DEM','DJF','DKK','DOP','DZD','ECS','ECV','EEK','EGP','ERN','ESP','ETB','EUR','FIM','FJD','FKP','FRF','GBP','GEL','GHC','GIP','GMD','GNF','GRD','GTQ','GWP','GYD','HKD','HNL','HRK','HTG','HUF','IDE','IDR','IEP','ILS','INR','IQD','IRR','ISK','ITL','JMD','JOD','JPY','KES','KGS','KHR','KMF','KPW','KRW','KWD','KYD','KZT','LAK','LBP','LKR','LRD','LSL','LTL','LUF','LVL','LYD','MAD','MDL','MGF','MKD','MMK','MNT','MOP','MRO','MTL','MUR','MVR','MWK','MXN','MXV','MYR','MZM','NAD','NGN','NIO','NLG','NOK','NPR','NZD','OMR','PAB','PEN','PGK','PHP','PKR','PLN','PTE','PYG','QAR','ROL','RUB','RUR','RWF','RYR','SAR','SBD','SCR','SDP','SEK','SGD','SHP','SIT','SKK','SLL','SOS','SRG','STD','SVC','SYP','SZL','THB','TJR','TMM','TND','TOP','TPE','TRL','TTD','TWD','TZS','UAH','UGX','USD','USN','USS','UYU','UZS','VEB','VND','VUV','WST','XAF','XCD','XDR','XEU','XOF','XPF','YER','YUN','ZAR','ZMK','ZRN','ZWD']
+        return list(currencies.CURRENCIES)
 
 
     @staticmethod
@@ -191,16 +287,20 @@ class FyleExpense:
 
         fyle_expense = FyleExpense(user)
 
-        fyle_profile = fyle_utils.get_fyle_profile(user.fyle_refresh_token)
+        # These calls don't depend on each other, so they are made in parallel
+        form_details = run_concurrently({
+            'fyle_profile': lambda: fyle_utils.get_fyle_profile(user.fyle_refresh_token, fyle_expense.cluster_domain),
+            'default_expense_fields': fyle_expense.get_default_expense_fields,
+            'is_project_available': fyle_expense.check_project_availability,
+            'is_cost_center_available': fyle_expense.check_cost_center_availability
+        }, timeout=EXPENSE_FORM_DETAILS_TIMEOUT)
 
-        home_currency = fyle_profile['org']['currency']
+        home_currency = form_details['fyle_profile']['org']['currency']
 
-        default_expense_fields = fyle_expense.get_default_expense_fields()
+        mandatory_fields_mapping = fyle_expense.get_expense_fields_mandatory_mapping(form_details['default_expense_fields'])
 
-        mandatory_fields_mapping = fyle_expense.get_expense_fields_mandatory_mapping(default_expense_fields)
-
-        is_project_available = fyle_expense.check_project_availability()
-        is_cost_center_available = fyle_expense.check_cost_center_availability()
+        is_project_available = form_details['is_project_available']
+        is_cost_center_available = form_details['is_cost_center_available']
 
         # Create a expense fields render property and set them optional in the form
         fields_render_property = {
@@ -254,16 +354,20 @@ class FyleExpense:
             add_to_report = expense_form_details['add_to_report']
             project = expense_form_details['project']
 
-        current_ui_blocks = slack_payload['view']['blocks']
+        # Custom fields of the picked category are stored once loaded, the form shown may not have them yet
+        if form_metadata is not None and 'custom_fields' in form_metadata:
+            custom_field_blocks = form_metadata['custom_fields']
+        else:
+            current_ui_blocks = slack_payload['view']['blocks']
 
-        custom_field_blocks = []
+            custom_field_blocks = []
 
-        for block in current_ui_blocks:
-            if 'custom_field' in block['block_id'] or 'additional_field' in block['block_id']:
-                custom_field_blocks.append(block)
+            for block in current_ui_blocks:
+                if 'custom_field' in block['block_id'] or 'additional_field' in block['block_id']:
+                    custom_field_blocks.append(block)
 
-        if len(custom_field_blocks) == 0:
-            custom_field_blocks = None
+            if len(custom_field_blocks) == 0:
+                custom_field_blocks = None
 
         current_form_details = {
             'fields_render_property': fields_render_property,
@@ -275,6 +379,24 @@ class FyleExpense:
         return current_form_details
 
 
+    @staticmethod
+    def update_form_metadata(view_id: str, form_details: Dict) -> Dict:
+        '''
+            Stores changes of the expense form of a view, re-renders of the form are built from the stored details.
+        '''
+        cache_key = '{}.form_metadata'.format(view_id)
+        form_metadata = cache.get(cache_key)
+
+        if form_metadata is None:
+            form_metadata = form_details
+        else:
+            form_metadata.update(form_details)
+
+        cache.set(cache_key, form_metadata)
+
+        return form_metadata
+
+
     def get_expense_by_id(self, expense_id: str) -> Dict:
         query_params = {
             'id': 'eq.{}'.format(expense_id),
@@ -0,0 +1,75 @@
+from typing import Dict, List, Tuple
+
+import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from fyle_slack_app.libs import task_lanes
+from fyle_slack_app.libs.task_lanes import TaskLane
+from fyle_slack_app.models import NotificationDigestEvent
+
+
+# Slack doesn't accept messages with more blocks than this
+SLACK_MESSAGE_MAX_BLOCKS = 50
+
+
+def buffer_notification(slack_user_id: str, notification_role: str, notification_type: str, webhook_data: Dict) -> None:
+    '''
+        Buffers a notification for the user's next digest, scheduling the digest at the end of the window
+        if none is pending. Notifications buffered until the digest is sent are part of it.
+    '''
+    NotificationDigestEvent.objects.create(
+        slack_user_id=slack_user_id,
+        notification_role=notification_role,
+        notification_type=notification_type,
+        webhook_data=webhook_data
+    )
+
+    if cache.add(get_digest_key(slack_user_id), True, settings.FYLE_NOTIFICATION_DIGEST_WINDOW):
+        # pylint: disable=import-outside-toplevel
+        from django_q.models import Schedule
+
+        task_lanes.schedule(
+            TaskLane.NOTIFICATIONS,
+            'fyle_slack_app.fyle.notifications.tasks.send_notification_digest',
+            slack_user_id,
+            schedule_type=Schedule.ONCE,
+            next_run=timezone.now() + datetime.timedelta(seconds=settings.FYLE_NOTIFICATION_DIGEST_WINDOW)
+        )
+
+
+def get_buffered_notifications(slack_user_id: str) -> List[NotificationDigestEvent]:
+    # Notifications buffered from here on are sent in a new digest
+    cache.delete(get_digest_key(slack_user_id))
+
+    return list(NotificationDigestEvent.objects.filter(slack_user_id=slack_user_id).order_by('created_at', 'id'))
+
+
+def delete_buffered_notifications(digest_events: List[NotificationDigestEvent]) -> None:
+    NotificationDigestEvent.objects.filter(id__in=[digest_event.id for digest_event in digest_events]).delete()
+
+
+def group_digest_messages(digest_messages: List[Tuple[List[Dict], str]], max_blocks: int) -> List[List[Tuple[List[Dict], str]]]:
+    '''
+        Groups the messages of a digest so the blocks of a group, with a divider after each message, fit in `max_blocks`.
+    '''
+    groups = []
+    group_blocks = max_blocks
+
+    for message in digest_messages:
+        message_blocks = len(message[0]) + 1
+
+        if group_blocks + message_blocks > max_blocks:
+            groups.append([])
+            group_blocks = 0
+
+        groups[-1].append(message)
+        group_blocks += message_blocks
+
+    return groups
+
+
+def get_digest_key(slack_user_id: str) -> str:
+    return '{}.notification_digest'.format(slack_user_id)
@@ -0,0 +1,147 @@
+from typing import Dict, Iterable, NamedTuple, Union
+
+import uuid
+
+from django.core.cache import cache
+
+from fyle_slack_app.libs.lru_cache import LRUCache
+from fyle_slack_app.models import NotificationPreference, UserSubscriptionDetail
+from fyle_slack_app.models.notification_preferences import NotificationType
+
+
+# Bit of each notification type in the enabled notifications mask of a route
+NOTIFICATION_TYPE_BITS = {
+    notification_type.value: 1 << position for position, notification_type in enumerate(NotificationType)
+}
+
+# Routes are shared by processes through the cache, a change moves the webhooks it affects to a new generation
+# which drops the routes of older ones. Kept for an hour in case a change doesn't go through the ORM
+WEBHOOK_ROUTE_CACHE_TIMEOUT = 3600
+
+# Seconds a process keeps routes of its own in front of the cache, a change is picked up by other processes within this time
+WEBHOOK_ROUTE_LOCAL_TIMEOUT = 10
+WEBHOOK_ROUTE_LOCAL_CACHE_SIZE = 10000
+
+
+class WebhookRoute(NamedTuple):
+    slack_user_id: str
+    slack_team_id: str
+    slack_dm_channel_id: str
+    bot_access_token: str
+    enabled_notifications: int
+    digest_notifications: int = 0
+
+    def is_enabled(self, notification_type: str) -> bool:
+        return bool(self.enabled_notifications & NOTIFICATION_TYPE_BITS.get(notification_type, 0))
+
+    def is_digest_enabled(self, notification_type: str) -> bool:
+        return bool(self.digest_notifications & NOTIFICATION_TYPE_BITS.get(notification_type, 0))
+
+
+# Routes of this process keyed by webhook id
+_webhook_routes = LRUCache(max_size=WEBHOOK_ROUTE_LOCAL_CACHE_SIZE, timeout=WEBHOOK_ROUTE_LOCAL_TIMEOUT)
+
+
+def get_webhook_route(webhook_id: str) -> Union[WebhookRoute, None]:
+    '''
+        Returns where the notifications of a webhook go and which of them the user has enabled,
+        None if no subscription has the webhook id.
+
+        Routes are loaded per webhook and cached until a change to the data they are built from drops them,
+        webhooks without a subscription aren't cached, their subscription might be getting created in bulk.
+
+        A route is cached along with the generation of the webhook it was loaded in, so a route loaded before
+        a change was committed but cached after it was dropped is never served.
+    '''
+    route = _webhook_routes.get(webhook_id)
+
+    if route is None:
+        route_cache_key = get_webhook_route_cache_key(webhook_id)
+        generation_cache_key = get_webhook_generation_cache_key(webhook_id)
+
+        cached_entries = cache.get_many([route_cache_key, generation_cache_key])
+        generation = cached_entries.get(generation_cache_key)
+        route_entry = cached_entries.get(route_cache_key)
+
+        if generation is not None and route_entry is not None and route_entry[0] == generation:
+            route = route_entry[1]
+
+        else:
+            if generation is None:
+                generation = get_webhook_generation(generation_cache_key)
+
+            route = load_webhook_routes(webhook_id=webhook_id).get(webhook_id)
+            if route is not None:
+                cache.set(route_cache_key, (generation, route), WEBHOOK_ROUTE_CACHE_TIMEOUT)
+
+        if route is not None:
+            _webhook_routes.set(webhook_id, route)
+
+    return route
+
+
+def get_webhook_generation(generation_cache_key: str) -> str:
+    # Generations are unique tokens which replace each other, incrementing a counter isn't atomic on the database cache
+    cache.add(generation_cache_key, uuid.uuid4().hex, WEBHOOK_ROUTE_CACHE_TIMEOUT)
+
+    # Read back as another process might have started the generation, or a change moved to a new one, in the meantime
+    return cache.get(generation_cache_key)
+
+
+def load_webhook_routes(**subscription_filters: str) -> Dict[str, WebhookRoute]:
+    subscriptions = UserSubscriptionDetail.objects.filter(**subscription_filters).values_list(
+        'webhook_id',
+        'slack_user_id',
+        'slack_user__slack_team_id',
+        'slack_user__slack_dm_channel_id',
+        'slack_user__slack_team__bot_access_token'
+    )
+
+    subscriptions = list(subscriptions)
+    slack_user_ids = {subscription[1] for subscription in subscriptions}
+
+    enabled_preferences = NotificationPreference.objects.filter(is_enabled=True)
+    if subscription_filters:
+        enabled_preferences = enabled_preferences.filter(slack_user_id__in=slack_user_ids)
+
+    enabled_notifications = {}
+    digest_notifications = {}
+    for slack_user_id, notification_type, is_digest_enabled in enabled_preferences.values_list('slack_user_id', 'notification_type', 'is_digest_enabled'):
+        notification_type_bit = NOTIFICATION_TYPE_BITS.get(notification_type, 0)
+
+        enabled_notifications[slack_user_id] = enabled_notifications.get(slack_user_id, 0) | notification_type_bit
+
+        if is_digest_enabled is True:
+            digest_notifications[slack_user_id] = digest_notifications.get(slack_user_id, 0) | notification_type_bit
+
+    return {
+        webhook_id: WebhookRoute(
+            slack_user_id=slack_user_id,
+            slack_team_id=slack_team_id,
+            slack_dm_channel_id=slack_dm_channel_id,
+            bot_access_token=bot_access_token,
+            enabled_notifications=enabled_notifications.get(slack_user_id, 0),
+            digest_notifications=digest_notifications.get(slack_user_id, 0)
+        )
+        for webhook_id, slack_user_id, slack_team_id, slack_dm_channel_id, bot_access_token in subscriptions
+    }
+
+
+def get_webhook_route_cache_key(webhook_id: str) -> str:
+    return '{}.webhook_route'.format(webhook_id)
+
+
+def get_webhook_generation_cache_key(webhook_id: str) -> str:
+    return '{}.webhook_generation'.format(webhook_id)
+
+
+def invalidate_webhook_routes(webhook_ids: Iterable[str]) -> None:
+    webhook_ids = list(webhook_ids)
+
+    cache.set_many(
+        {get_webhook_generation_cache_key(webhook_id): uuid.uuid4().hex for webhook_id in webhook_ids},
+        WEBHOOK_ROUTE_CACHE_TIMEOUT
+    )
+
+    for webhook_id in webhook_ids:
+        _webhook_routes.delete(webhook_id)
@@ -0,0 +1,70 @@
+from typing import Dict
+
+from fyle_slack_app.fyle.notifications import digest
+from fyle_slack_app.fyle.notifications.views import FyleApproverNotification, FyleFylerNotification
+from fyle_slack_app.libs import logger
+from fyle_slack_app.models import User
+from fyle_slack_app.slack.ui.notifications import messages as notification_messages
+from fyle_slack_app.slack.web_client import FyleSlackWebClient
+
+
+logger = logger.get_logger(__name__)
+
+
+NOTIFICATION_VIEWS = {
+    FyleFylerNotification.notification_role: FyleFylerNotification,
+    FyleApproverNotification.notification_role: FyleApproverNotification
+}
+
+
+def process_notification(notification_role: str, webhook_id: str, webhook_data: Dict) -> None:
+    logger.info('Processing queued %s notification for webhook -> %s', notification_role, webhook_id)
+
+    notification_view = NOTIFICATION_VIEWS[notification_role]()
+    notification_view.handle_notification(webhook_id, webhook_data)
+
+
+def send_notification_digest(slack_user_id: str) -> None:
+    digest_events = digest.get_buffered_notifications(slack_user_id)
+
+    if not digest_events:
+        return
+
+    user = User.objects.select_related('slack_team').filter(slack_user_id=slack_user_id).first()
+
+    if user is None:
+        digest.delete_buffered_notifications(digest_events)
+        return
+
+    slack_client = FyleSlackWebClient(token=user.slack_team.bot_access_token, team_id=user.slack_team_id)
+
+    # Messages of the buffered notifications are rendered by their handlers, as they would be sent on their own
+    digest_messages = []
+    for digest_event in digest_events:
+        notification_view = NOTIFICATION_VIEWS[digest_event.notification_role]()
+        notification_view.digest_messages = digest_messages
+        # pylint: disable=protected-access
+        notification_view._initialize_event_handlers()
+
+        handler = notification_view.event_handlers[digest_event.notification_type]
+
+        # A notification which can't be rendered shouldn't hold back the rest of the digest
+        try:
+            handler(digest_event.webhook_data, user, slack_client)
+        # pylint: disable=broad-except
+        except Exception as error:
+            logger.error('Rendering %s notification for digest of %s failed - %s', digest_event.notification_type, slack_user_id, error)
+
+    # A digest of a single notification is sent as the notification itself
+    if len(digest_messages) == 1:
+        digest_blocks, title_text = digest_messages[0]
+        slack_client.chat_postMessage(text=title_text, channel=user.slack_dm_channel_id, blocks=digest_blocks)
+
+    else:
+        # Leaving room for the digest header and its divider
+        for digest_messages_group in digest.group_digest_messages(digest_messages, digest.SLACK_MESSAGE_MAX_BLOCKS - 2):
+            digest_blocks, title_text = notification_messages.get_notifications_digest(digest_messages_group, len(digest_messages))
+            slack_client.chat_postMessage(text=title_text, channel=user.slack_dm_channel_id, blocks=digest_blocks)
+
+    # Notifications are kept until the digest is sent, a digest Slack didn't take is sent along with the next one
+    digest.delete_buffered_notifications(digest_events)
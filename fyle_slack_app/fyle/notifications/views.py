@@ -1,7 +1,8 @@
-from typing import Dict
+from typing import Dict, List, Tuple
 
 import json
 
+from django.conf import settings
 from django.http.request import HttpRequest
 from django.http.response import JsonResponse
 from django.views import View
@@ -9,13 +10,16 @@ from django.views import View
 from slack_sdk.web.client import WebClient
 
 from fyle_slack_app import tracking
-from fyle_slack_app.libs import utils, assertions, logger
+from fyle_slack_app.libs import assertions, logger
+from fyle_slack_app.libs.task_lanes import TaskLane, async_task
 from fyle_slack_app.fyle import utils as fyle_utils
 from fyle_slack_app.fyle.corporate_cards.views import FyleCorporateCard
 from fyle_slack_app.slack import utils as slack_utils
 from fyle_slack_app.slack.ui.notifications import messages as notification_messages
-from fyle_slack_app.models import User, NotificationPreference, UserSubscriptionDetail
-from fyle_slack_app.models.notification_preferences import NotificationType
+from fyle_slack_app.fyle.notifications import digest, routing
+from fyle_slack_app.models import User
+from fyle_slack_app.models.notification_preferences import NotificationType, NON_DIGEST_NOTIFICATION_TYPES
+from fyle_slack_app.slack.web_client import FyleSlackWebClient
 
 logger = logger.get_logger(__name__)
 
@@ -24,9 +28,50 @@ class FyleNotificationView(View):
 
     event_handlers: Dict = {}
 
+    # Role the webhooks of the view are subscribed for, the queued webhooks are processed by the view of their role
+    notification_role: str = None
+
+    # Notifications are collected here instead of being sent when the view renders a digest
+    digest_messages: List[Tuple[List[Dict], str]] = None
+
     def post(self, request: HttpRequest, webhook_id: str) -> JsonResponse:
         webhook_data = json.loads(request.body)
 
+        if settings.FYLE_NOTIFICATIONS_QUEUE_ENABLED is True:
+            return self.enqueue_notification(webhook_id, webhook_data)
+
+        return self.handle_notification(webhook_id, webhook_data)
+
+
+    def enqueue_notification(self, webhook_id: str, webhook_data: Dict) -> JsonResponse:
+        '''
+            Queues the webhook for the notifications cluster and acknowledges it right away,
+            so bursts of webhooks (e.g. reports paid at month end) don't hold up web workers.
+        '''
+        event_type = '{}_{}'.format(webhook_data['resource'], webhook_data['action'])
+
+        self._initialize_event_handlers()
+
+        if event_type not in self.event_handlers:
+            return JsonResponse({}, status=200)
+
+        webhook_route = routing.get_webhook_route(webhook_id)
+        assertions.assert_found(webhook_route, 'User subscription not found with webhook id: {}'.format(webhook_id))
+
+        # Notifications the user has disabled are dropped without being queued
+        if webhook_route.is_enabled(event_type):
+            async_task(
+                TaskLane.NOTIFICATIONS,
+                'fyle_slack_app.fyle.notifications.tasks.process_notification',
+                self.notification_role,
+                webhook_id,
+                webhook_data
+            )
+
+        return JsonResponse({}, status=200)
+
+
+    def handle_notification(self, webhook_id: str, webhook_data: Dict) -> JsonResponse:
         resource = webhook_data['resource']
         action = webhook_data['action']
 
@@ -46,24 +91,37 @@ class FyleNotificationView(View):
 
         if handler is not None:
 
-            user_subscription_detail = utils.get_or_none(UserSubscriptionDetail, webhook_id=webhook_id)
-            assertions.assert_found(user_subscription_detail, 'User subscription not found with webhook id: {}'.format(webhook_id))
+            # Whether to notify and where is answered from the routes kept in memory
+            webhook_route = routing.get_webhook_route(webhook_id)
+            assertions.assert_found(webhook_route, 'User subscription not found with webhook id: {}'.format(webhook_id))
 
-            slack_user_id = user_subscription_detail.slack_user_id
+            # Digest is enabled only for enabled notifications, they are sent together at the end of the digest window
+            if webhook_route.is_digest_enabled(event_type) and event_type not in NON_DIGEST_NOTIFICATION_TYPES:
+                digest.buffer_notification(webhook_route.slack_user_id, self.notification_role, event_type, webhook_data)
 
-            user_notification_preference = NotificationPreference.objects.get(slack_user_id=slack_user_id, notification_type=event_type)
+            elif webhook_route.is_enabled(event_type):
 
-            if user_notification_preference.is_enabled is True:
+                # Team is used in tracking the notification
+                user = User.objects.select_related('slack_team').get(slack_user_id=webhook_route.slack_user_id)
 
-                user = User.objects.get(slack_user_id=slack_user_id)
-
-                slack_client = slack_utils.get_slack_client(user.slack_team_id)
+                slack_client = FyleSlackWebClient(token=webhook_route.bot_access_token, team_id=webhook_route.slack_team_id)
 
                 return handler(webhook_data, user, slack_client)
 
         return JsonResponse({}, status=200)
 
 
+    def send_notification(self, slack_client: WebClient, user: User, title_text: str, blocks: List[Dict]) -> None:
+        if self.digest_messages is not None:
+            self.digest_messages.append((blocks, title_text))
+        else:
+            slack_client.chat_postMessage(
+                text=title_text,
+                channel=user.slack_dm_channel_id,
+                blocks=blocks
+            )
+
+
     @staticmethod
     def get_event_data(user: User) -> Dict:
         event_data = {
@@ -113,6 +171,8 @@ class FyleNotificationView(View):
 
 class FyleFylerNotification(FyleNotificationView):
 
+    notification_role = 'fyler'
+
     def _initialize_event_handlers(self) -> None:
         self.event_handlers = {
             NotificationType.REPORT_PARTIALLY_APPROVED.value: self.handle_report_partially_approved,
@@ -137,11 +197,7 @@ class FyleFylerNotification(FyleNotificationView):
             report_url
         )
 
-        slack_client.chat_postMessage(
-            text=title_text,
-            channel=user.slack_dm_channel_id,
-            blocks=report_notification_message
-        )
+        self.send_notification(slack_client, user, title_text, report_notification_message)
 
         self.track_notification('Report Partially Approved Notification Received', user, 'REPORT', report)
 
@@ -159,11 +215,7 @@ class FyleFylerNotification(FyleNotificationView):
             report_url
         )
 
-        slack_client.chat_postMessage(
-            text=title_text,
-            channel=user.slack_dm_channel_id,
-            blocks=report_notification_message
-        )
+        self.send_notification(slack_client, user, title_text, report_notification_message)
 
         self.track_notification('Report Payment Processing Notification Received', user, 'REPORT', report)
 
@@ -184,11 +236,7 @@ class FyleFylerNotification(FyleNotificationView):
             report_sendback_reason
         )
 
-        slack_client.chat_postMessage(
-            text=title_text,
-            channel=user.slack_dm_channel_id,
-            blocks=report_notification_message
-        )
+        self.send_notification(slack_client, user, title_text, report_notification_message)
 
         self.track_notification('Report Approver Sendback Notification Received', user, 'REPORT', report)
 
@@ -206,11 +254,7 @@ class FyleFylerNotification(FyleNotificationView):
             report_url
         )
 
-        slack_client.chat_postMessage(
-            text=title_text,
-            channel=user.slack_dm_channel_id,
-            blocks=report_notification_message
-        )
+        self.send_notification(slack_client, user, title_text, report_notification_message)
 
         self.track_notification('Report Submitted Notification Received', user, 'REPORT', report)
 
@@ -235,11 +279,7 @@ class FyleFylerNotification(FyleNotificationView):
 
             report_notification_message, title_text = notification_messages.get_report_commented_notification(report, user_display_name, report_url, report_comment)
 
-            slack_client.chat_postMessage(
-                text=title_text,
-                channel=user.slack_dm_channel_id,
-                blocks=report_notification_message
-            )
+            self.send_notification(slack_client, user, title_text, report_notification_message)
 
             self.track_notification('Report Commented Notification Received', user, 'REPORT', report)
 
@@ -264,11 +304,7 @@ class FyleFylerNotification(FyleNotificationView):
 
             expense_notification_message, title_text = notification_messages.get_expense_commented_notification(expense, user_display_name, expense_url, expense_comment)
 
-            slack_client.chat_postMessage(
-                text=title_text,
-                channel=user.slack_dm_channel_id,
-                blocks=expense_notification_message
-            )
+            self.send_notification(slack_client, user, title_text, expense_notification_message)
 
             self.track_notification('Expense Commented Notification Received', user, 'EXPENSE', expense)
 
@@ -280,10 +316,12 @@ class FyleFylerNotification(FyleNotificationView):
 
         corporate_card_id = list(expense['matched_corporate_card_transaction_ids'])[0]
 
-        corporate_card_transaction = FyleCorporateCard(user).get_corporate_card_transaction(corporate_card_id)
+        fyle_corporate_card = FyleCorporateCard(user)
+
+        corporate_card_transaction = fyle_corporate_card.get_corporate_card_transaction(corporate_card_id)
 
         # Fetch corporate card
-        card = FyleCorporateCard(user).get_corporate_card_by_id(corporate_card_transaction['corporate_card_id'])
+        card = fyle_corporate_card.get_corporate_card_by_id(corporate_card_transaction['corporate_card_id'])
 
         if card and card[0] and card[0]['is_visa_enrolled'] is True:
             expense_url = fyle_utils.get_fyle_resource_url(user.fyle_refresh_token, expense, 'EXPENSE')
@@ -294,11 +332,7 @@ class FyleFylerNotification(FyleNotificationView):
                 corporate_card_transaction
             )
 
-            slack_client.chat_postMessage(
-                text=title_text,
-                channel=user.slack_dm_channel_id,
-                blocks=card_expense_notification_message
-            )
+            self.send_notification(slack_client, user, title_text, card_expense_notification_message)
 
             self.track_notification('Visa Card Expense Notification Received', user, 'EXPENSE', expense)
 
@@ -316,11 +350,7 @@ class FyleFylerNotification(FyleNotificationView):
             report_url
         )
 
-        slack_client.chat_postMessage(
-            text=title_text,
-            channel=user.slack_dm_channel_id,
-            blocks=report_notification_message
-        )
+        self.send_notification(slack_client, user, title_text, report_notification_message)
 
         self.track_notification('Report Paid Notification Received', user, 'REPORT', report)
 
@@ -329,6 +359,8 @@ class FyleFylerNotification(FyleNotificationView):
 
 class FyleApproverNotification(FyleNotificationView):
 
+    notification_role = 'approver'
+
     def _initialize_event_handlers(self) -> None:
         self.event_handlers = {
             NotificationType.REPORT_SUBMITTED.value: self.handle_report_submitted
@@ -354,11 +386,7 @@ class FyleApproverNotification(FyleNotificationView):
                 report_url
             )
 
-            slack_client.chat_postMessage(
-                text=title_text,
-                channel=user.slack_dm_channel_id,
-                blocks=report_notification_message
-            )
+            self.send_notification(slack_client, user, title_text, report_notification_message)
 
             self.track_notification('Report Approval Notification Received', user, 'REPORT', report)
 
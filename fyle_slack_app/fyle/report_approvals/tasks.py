@@ -1,10 +1,11 @@
 from typing import Dict, List
 
-from slack_sdk.web import WebClient
 from fyle.platform import exceptions
 
+from slack_sdk.web import WebClient
+
 from fyle_slack_app.slack import utils as slack_utils
-from fyle_slack_app.models import Team, User, UserFeedback
+from fyle_slack_app.models import User, UserFeedback
 from fyle_slack_app.models.user_feedbacks import FeedbackTrigger
 from fyle_slack_app.fyle.report_approvals.views import FyleReportApproval
 from fyle_slack_app.libs import logger
@@ -17,12 +18,9 @@ from fyle_slack_app.slack.ui import common_messages
 logger = logger.get_logger(__name__)
 
 
-def process_report_approval(report_id: str, user_id: str, team_id: str, message_timestamp: str, notification_message: List[Dict], is_approved_from_modal: bool) -> Dict:
+def process_report_approval(report_id: str, user_id: str, team_id: str, message_timestamp: str, notification_message: List[Dict], is_approved_from_modal: bool, *, is_digest_message: bool = False) -> Dict:
 
-    slack_team = utils.get_or_none(Team, id=team_id)
-    assertions.assert_found(slack_team, 'Slack team not registered')
-
-    slack_client = WebClient(token=slack_team.bot_access_token)
+    slack_client = slack_utils.get_slack_client(team_id)
 
     user = utils.get_or_none(User, slack_user_id=user_id)
     assertions.assert_found(user, 'Approver not found')
@@ -74,11 +72,7 @@ def process_report_approval(report_id: str, user_id: str, team_id: str, message_
                 notification_message[3]['elements'][0]['value'] = report_id
                 notification_message[3]['elements'][0]['action_id'] = 'approve_report'
 
-                slack_client.chat_update(
-                    channel=user.slack_dm_channel_id,
-                    blocks=notification_message,
-                    ts=message_timestamp
-                )
+                update_approval_notification(slack_client, user, report_id, message_timestamp, notification_message, is_digest_message=is_digest_message)
 
                 message = 'Seems like an error occured while approving this report :face_with_head_bandage: \n' \
                     'Please try approving again or `Review in Fyle` to approve directly from Fyle :zap:'
@@ -99,6 +93,23 @@ def process_report_approval(report_id: str, user_id: str, team_id: str, message_
             report_message
         )
 
+    update_approval_notification(
+        slack_client, user, report_id, message_timestamp, report_notification_message, is_digest_message=is_digest_message, title_text=title_text
+    )
+
+
+def update_approval_notification(slack_client: WebClient, user: User, report_id: str, message_timestamp: str, report_notification_message: List[Dict], *, is_digest_message: bool, title_text: str = None) -> None:
+    if is_digest_message is True:
+        # Only the report's blocks of the digest are replaced, reading the digest as it is now
+        # so reports approved from the same digest in the meantime aren't reverted
+        digest_message = slack_utils.get_slack_latest_parent_message(user, slack_client, message_timestamp)
+        digest_blocks = digest_message['blocks']
+
+        notification_start, notification_end = notification_messages.get_notification_blocks_range(digest_blocks, report_id)
+
+        report_notification_message = digest_blocks[:notification_start] + report_notification_message + digest_blocks[notification_end:]
+        title_text = digest_message['text']
+
     slack_client.chat_update(
         text=title_text,
         channel=user.slack_dm_channel_id,
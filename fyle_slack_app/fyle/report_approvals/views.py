@@ -13,7 +13,8 @@ class FyleReportApproval:
     connection: Platform = None
 
     def __init__(self, user: User) -> None:
-        self.connection = fyle_utils.get_fyle_sdk_connection(user.fyle_refresh_token)
+        cluster_domain = fyle_utils.get_user_cluster_domain(user)
+        self.connection = fyle_utils.get_fyle_sdk_connection(user.fyle_refresh_token, cluster_domain)
 
 
     def get_approver_reports(self, query_params: Dict) -> Dict:
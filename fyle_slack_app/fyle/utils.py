@@ -1,34 +1,226 @@
-from typing import Dict, Union
+from typing import Any, Callable, Dict, Union
+
+import time
+import functools
+import threading
 
 import requests
 
 
-from fyle.platform import Platform
+from fyle.platform import Platform, exceptions
+from fyle.platform.globals.config import config
+from fyle.platform.internals.api_base import ApiBase
 
 from django.conf import settings
 
 from fyle_slack_app.libs import http, assertions, utils
+from fyle_slack_app.libs.concurrency import SingleFlight
+from fyle_slack_app.libs.lru_cache import LRUCache
+from fyle_slack_app.models.users import User
 from fyle_slack_app.models.user_subscription_details import SubscriptionType
 
 
 FYLE_TOKEN_URL = '{}/oauth/token'.format(settings.FYLE_ACCOUNTS_URL)
 
+# Access tokens are refreshed this many seconds before they actually expire
+FYLE_ACCESS_TOKEN_EXPIRY_BUFFER = 120
 
-def get_fyle_sdk_connection(refresh_token: str) -> Platform:
-    cluster_domain = get_cluster_domain(refresh_token)
+# Used when the token response doesn't tell us how long the access token is valid
+FYLE_ACCESS_TOKEN_DEFAULT_EXPIRY = 3600
 
-    FYLE_PLATFORM_URL = '{}/platform/v1'.format(cluster_domain)
+# Access tokens of this process, keyed by hashed refresh token
+# Each entry holds the access token and the epoch time after which it should be refreshed
+_fyle_access_tokens: Dict[str, Dict] = {}
+_fyle_access_tokens_lock = threading.Lock()
+_fyle_access_token_refreshes = SingleFlight()
 
-    return Platform(
-        server_url=FYLE_PLATFORM_URL,
-        token_url=FYLE_TOKEN_URL,
-        client_id=settings.FYLE_CLIENT_ID,
-        client_secret=settings.FYLE_CLIENT_SECRET,
-        refresh_token=refresh_token
-    )
+# Exceptions the SDK raises for the error statuses of platform APIs
+PLATFORM_ERROR_EXCEPTIONS = {
+    400: exceptions.WrongParamsError,
+    401: exceptions.InvalidTokenError,
+    403: exceptions.NoPrivilegeError,
+    404: exceptions.NotFoundItemError,
+    498: exceptions.ExpiredTokenError,
+    500: exceptions.InternalServerError
+}
+
+# Live platform connections of this process, keyed by hashed refresh token
+_fyle_sdk_connections = LRUCache(
+    max_size=settings.FYLE_SDK_CONNECTION_CACHE_SIZE,
+    idle_timeout=settings.FYLE_SDK_CONNECTION_IDLE_TIMEOUT
+)
+
+
+class FylePlatformAPI:
+    '''
+        Stands in for the SDK's API namespaces (`v1`, `v1.spender`, ...) of a connection,
+        so that every API method called through the connection is made by `FylePlatformConnection.call`.
+    '''
+
+    def __init__(self, connection: 'FylePlatformConnection', api: Any) -> None:
+        self.connection = connection
+        self.api = api
+
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self.api, name)
+
+        # API methods are looked up from the SDK at call time, so that they can be patched in tests
+        if callable(attribute):
+            return lambda *args, **kwargs: self.connection.call(attribute, *args, **kwargs)
+
+        return FylePlatformAPI(self.connection, attribute)
+
+
+class FylePlatformResource:
+    '''
+        Stands in for an SDK resource (e.g. `v1.spender.expenses`) while one of its methods is called through a connection,
+        its requests are then made by the connection instead of the resource's `api`.
+    '''
+
+    def __init__(self, resource: Any, api: 'FylePlatformRequests') -> None:
+        self.resource = resource
+        self.api = api
+
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.resource, name)
+
+
+class FylePlatformRequests:
+    '''
+        Makes the requests of SDK resources (in place of the SDK's `ApiBase`) for a connection.
+    '''
+
+    def __init__(self, connection: 'FylePlatformConnection', role: str) -> None:
+        self.connection = connection
+        self.role = role
+
+
+    def make_get_request(self, api_url: str, query_params: Dict = None) -> Dict:
+        params = {}
+        for param, value in (query_params or {}).items():
+            if value is not None:
+                params[param] = str(value).lower() if isinstance(value, bool) else value
+
+        return self.connection.request('GET', '{}{}'.format(self.role, api_url), params=params)
+
+
+    def make_post_request(self, api_url: str, payload: Dict) -> Dict:
+        return self.connection.request('POST', '{}{}'.format(self.role, api_url), json=payload)
+
+
+class FylePlatformConnection(Platform):
+    '''
+        Platform connection which takes its access token from the access token store of this process
+        instead of doing a token exchange of its own.
+
+        The SDK keeps the credentials of a connection in a module level config shared by every connection
+        of the process and makes its requests without a timeout. So API methods called through the connection
+        have their requests made by `request`, with the connection's own credentials over the pooled session of `libs.http`.
+    '''
+
+    def __init__(self, server_url: str, refresh_token: str) -> None:
+        self.server_url = server_url
+        self.refresh_token = refresh_token
+        self.connection_key = utils.get_hashed_args(refresh_token)
+
+        super().__init__(
+            server_url=server_url,
+            token_url=FYLE_TOKEN_URL,
+            client_id=settings.FYLE_CLIENT_ID,
+            client_secret=settings.FYLE_CLIENT_SECRET,
+            refresh_token=refresh_token
+        )
+
+
+    @property
+    def v1(self) -> FylePlatformAPI:
+        return FylePlatformAPI(self, self.v1_api)
+
+
+    @v1.setter
+    def v1(self, v1_api: Any) -> None:
+        self.v1_api = v1_api
 
-# Caching for 1 hour
-@utils.cache_this(timeout=3600)
+
+    def set_server_url(self) -> None:
+        config.set('FYLE', 'SERVER_URL', self.server_url)
+
+
+    def update_access_token(self) -> None:
+        access_token = get_fyle_access_token(self.refresh_token)
+        config.set('AUTH', 'ACCESS_TOKEN', access_token)
+
+
+    def call(self, api_method: Callable, *args, **kwargs) -> Any:
+        resource = getattr(api_method, '__self__', None)
+
+        # Methods of SDK resources make their requests through the `api` of the resource
+        if isinstance(getattr(resource, 'api', None), ApiBase):
+            api_method = functools.partial(
+                api_method.__func__,
+                FylePlatformResource(resource, FylePlatformRequests(self, resource.api.role))
+            )
+
+        return api_method(*args, **kwargs)
+
+
+    def request(self, method: str, path: str, **kwargs: Any) -> Dict:
+        '''
+            Makes a platform API request, retried once with a freshly looked up cluster domain (and access token)
+            if Fyle rejects it with a 401 or redirects it elsewhere, like `post_to_fyle_platform` does.
+        '''
+        response = self._request(method, path, **kwargs)
+
+        if response.status_code == 401 or response.is_redirect:
+            self.server_url = '{}/platform/v1'.format(refresh_cluster_domain(self.refresh_token))
+            _fyle_sdk_connections.set(self.connection_key, self)
+
+            response = self._request(method, path, **kwargs)
+
+        raise_for_platform_error(response)
+
+        return response.json()
+
+
+    def _request(self, method: str, path: str, **kwargs: Any) -> requests.Response:
+        headers = {
+            'Authorization': 'Bearer {}'.format(get_fyle_access_token(self.refresh_token))
+        }
+
+        url = '{}/{}'.format(self.server_url, path)
+
+        return http.http_request(method, url, headers=headers, allow_redirects=False, **kwargs)
+
+
+def get_fyle_sdk_connection(refresh_token: str, cluster_domain: str = None) -> Platform:
+    connection_key = utils.get_hashed_args(refresh_token)
+
+    connection = _fyle_sdk_connections.get(connection_key)
+
+    if connection is None:
+        if not cluster_domain:
+            cluster_domain = get_cluster_domain(refresh_token)
+
+        FYLE_PLATFORM_URL = '{}/platform/v1'.format(cluster_domain)
+
+        connection = FylePlatformConnection(server_url=FYLE_PLATFORM_URL, refresh_token=refresh_token)
+
+        _fyle_sdk_connections.set(connection_key, connection)
+
+    return connection
+
+
+def invalidate_fyle_sdk_connection(refresh_token: str) -> None:
+    connection_key = utils.get_hashed_args(refresh_token)
+    _fyle_sdk_connections.delete(connection_key)
+    invalidate_fyle_access_token(refresh_token)
+
+
+# Caching for 1 hour, refreshed in background during the last 5 minutes
+# and kept in process memory for a minute, since a single request looks it up several times
+@utils.cache_this(timeout=3600, refresh_ahead=300, jitter=0.1, local_timeout=60)
 def get_cluster_domain(fyle_refresh_token: str) -> str:
     access_token = get_fyle_access_token(fyle_refresh_token)
     cluster_domain_url = '{}/oauth/cluster'.format(settings.FYLE_ACCOUNTS_URL)
@@ -43,7 +235,60 @@ def get_cluster_domain(fyle_refresh_token: str) -> str:
     return response.json()['cluster_domain']
 
 
+def get_user_cluster_domain(user: User) -> str:
+    # Cluster domain of a user practically never changes, it is looked up once and stored on the user
+    if not user.fyle_cluster_domain:
+        user.fyle_cluster_domain = get_cluster_domain(user.fyle_refresh_token)
+        User.objects.filter(pk=user.pk).update(fyle_cluster_domain=user.fyle_cluster_domain)
+
+    return user.fyle_cluster_domain
+
+
+def refresh_cluster_domain(fyle_refresh_token: str) -> str:
+    # Stored cluster domain got rejected by Fyle, look it up again and store it for the users of this token
+    get_cluster_domain.invalidate(fyle_refresh_token)
+    invalidate_fyle_sdk_connection(fyle_refresh_token)
+
+    cluster_domain = get_cluster_domain(fyle_refresh_token)
+    User.objects.filter(fyle_refresh_token=fyle_refresh_token).update(fyle_cluster_domain=cluster_domain)
+
+    return cluster_domain
+
+
 def get_fyle_access_token(fyle_refresh_token: str) -> str:
+    token_key = utils.get_hashed_args(fyle_refresh_token)
+
+    access_token = _get_stored_fyle_access_token(token_key)
+
+    # Only one caller per refresh token hits Fyle, others wait for that exchange to complete
+    if access_token is None:
+        access_token = _fyle_access_token_refreshes.do(token_key, _refresh_fyle_access_token, token_key, fyle_refresh_token)
+
+    return access_token
+
+
+def invalidate_fyle_access_token(fyle_refresh_token: str) -> None:
+    token_key = utils.get_hashed_args(fyle_refresh_token)
+    with _fyle_access_tokens_lock:
+        _fyle_access_tokens.pop(token_key, None)
+
+
+def _get_stored_fyle_access_token(token_key: str) -> Union[str, None]:
+    with _fyle_access_tokens_lock:
+        access_token_details = _fyle_access_tokens.get(token_key)
+
+    if access_token_details is None or access_token_details['refresh_at'] <= time.time():
+        return None
+
+    return access_token_details['access_token']
+
+
+def _refresh_fyle_access_token(token_key: str, fyle_refresh_token: str) -> str:
+    # Another caller might have refreshed the token while this one was waiting to refresh it
+    access_token = _get_stored_fyle_access_token(token_key)
+    if access_token is not None:
+        return access_token
+
     payload = {
         'grant_type': 'refresh_token',
         'refresh_token': fyle_refresh_token,
@@ -55,10 +300,21 @@ def get_fyle_access_token(fyle_refresh_token: str) -> str:
         'Content-Type': 'application/json'
     }
 
-    oauth_response = requests.post('{}/oauth/token'.format(settings.FYLE_ACCOUNTS_URL), json=payload, headers=headers)
+    oauth_response = http.post(FYLE_TOKEN_URL, json=payload, headers=headers)
     assertions.assert_good(oauth_response.status_code == 200, 'Error fetching fyle token details')
 
-    return oauth_response.json()['access_token']
+    oauth_response = oauth_response.json()
+
+    access_token = oauth_response['access_token']
+    expires_in = oauth_response.get('expires_in', FYLE_ACCESS_TOKEN_DEFAULT_EXPIRY)
+
+    with _fyle_access_tokens_lock:
+        _fyle_access_tokens[token_key] = {
+            'access_token': access_token,
+            'refresh_at': time.time() + max(expires_in - FYLE_ACCESS_TOKEN_EXPIRY_BUFFER, 0)
+        }
+
+    return access_token
 
 
 def get_fyle_refresh_token(code: str) -> str:
@@ -77,10 +333,11 @@ def get_fyle_refresh_token(code: str) -> str:
     return oauth_response.json()['refresh_token']
 
 
-# Caching for 1 hour
-@utils.cache_this(timeout=3600)
-def get_fyle_profile(refresh_token: str) -> Dict:
-    connection = get_fyle_sdk_connection(refresh_token)
+# Caching for 1 hour, refreshed in background during the last 5 minutes
+# and kept in process memory for a minute, since a single request looks it up several times
+@utils.cache_this(timeout=3600, refresh_ahead=300, jitter=0.1, local_timeout=60)
+def get_fyle_profile(refresh_token: str, cluster_domain: str = None) -> Dict:
+    connection = get_fyle_sdk_connection(refresh_token, cluster_domain)
     fyle_profile_response = connection.v1.spender.my_profile.get()
     return fyle_profile_response['data']
 
@@ -149,56 +406,98 @@ def upsert_fyle_subscription(cluster_domain: str, access_token: str, subscriptio
     return subscription
 
 
-def create_receipt(receipt_payload: Dict, refresh_token: str) -> Dict:
+def post_to_fyle_platform(path: str, payload: Dict, refresh_token: str, cluster_domain: str = None) -> requests.Response:
+    '''
+        POSTs to a Fyle platform API of the user's cluster.
+
+        The stored cluster domain is used when given, the call is retried once with a freshly looked up
+        cluster domain if Fyle rejects it with a 401 or redirects it elsewhere.
+    '''
+    if not cluster_domain:
+        cluster_domain = get_cluster_domain(refresh_token)
+
+    response = _post_to_fyle_platform(path, payload, refresh_token, cluster_domain)
+
+    if response.status_code == 401 or response.is_redirect:
+        cluster_domain = refresh_cluster_domain(refresh_token)
+        response = _post_to_fyle_platform(path, payload, refresh_token, cluster_domain)
+
+    return response
+
+
+def _post_to_fyle_platform(path: str, payload: Dict, refresh_token: str, cluster_domain: str) -> requests.Response:
     access_token = get_fyle_access_token(refresh_token)
-    cluster_domain = get_cluster_domain(refresh_token)
 
-    url = '{}/platform/v1/spender/files'.format(cluster_domain)
+    url = '{}/platform/v1/{}'.format(cluster_domain, path)
     headers = {
         'content-type': 'application/json',
         'Authorization': 'Bearer {}'.format(access_token)
     }
 
-    payload = {
-        'data': receipt_payload
-    }
+    return http.post(url, json=payload, headers=headers, allow_redirects=False)
 
-    response = http.post(url, json=payload, headers=headers)
-    assertions.assert_valid(response.status_code == 200, 'Error creating receipt file in Fyle')
-    return response.json()['data']
 
+def get_from_fyle_platform(path: str, query_params: Dict, refresh_token: str, cluster_domain: str = None) -> requests.Response:
+    '''
+        GETs a Fyle platform API of the user's cluster, retried like `post_to_fyle_platform`.
+
+        Unlike SDK calls, the request (along with the token exchange and retry) is bounded by `http.deadline`.
+    '''
+    if not cluster_domain:
+        cluster_domain = get_cluster_domain(refresh_token)
 
-def generate_receipt_url(receipt_id: Dict, refresh_token: str) -> Dict:
+    response = _get_from_fyle_platform(path, query_params, refresh_token, cluster_domain)
+
+    if response.status_code == 401 or response.is_redirect:
+        cluster_domain = refresh_cluster_domain(refresh_token)
+        response = _get_from_fyle_platform(path, query_params, refresh_token, cluster_domain)
+
+    return response
+
+
+def _get_from_fyle_platform(path: str, query_params: Dict, refresh_token: str, cluster_domain: str) -> requests.Response:
     access_token = get_fyle_access_token(refresh_token)
-    cluster_domain = get_cluster_domain(refresh_token)
 
-    url = '{}/platform/v1/spender/files/generate_urls'.format(cluster_domain)
+    url = '{}/platform/v1/{}'.format(cluster_domain, path)
     headers = {
-        'content-type': 'application/json',
         'Authorization': 'Bearer {}'.format(access_token)
     }
 
+    return http.get(url, params=query_params, headers=headers, allow_redirects=False)
+
+
+def raise_for_platform_error(response: requests.Response) -> None:
+    # Platform API calls made without the SDK raise the exceptions the SDK would for the same response
+    if response.status_code == 200:
+        return
+
+    platform_exception = PLATFORM_ERROR_EXCEPTIONS.get(response.status_code, exceptions.PlatformError)
+    raise platform_exception('Error: {}'.format(response.status_code), response.text)
+
+
+def create_receipt(receipt_payload: Dict, refresh_token: str, cluster_domain: str = None) -> Dict:
+    payload = {
+        'data': receipt_payload
+    }
+
+    response = post_to_fyle_platform('spender/files', payload, refresh_token, cluster_domain)
+    assertions.assert_valid(response.status_code == 200, 'Error creating receipt file in Fyle')
+    return response.json()['data']
+
+
+def generate_receipt_url(receipt_id: Dict, refresh_token: str, cluster_domain: str = None) -> Dict:
     payload = {
         'data': {
             'id': receipt_id
         }
     }
 
-    response = http.post(url, json=payload, headers=headers)
+    response = post_to_fyle_platform('spender/files/generate_urls', payload, refresh_token, cluster_domain)
     assertions.assert_valid(response.status_code == 200, 'Error creating receipt url')
     return response.json()['data']
 
 
-def attach_receipt_to_expense(expense_id: str, receipt_id: str, refresh_token: str) -> Dict:
-    access_token = get_fyle_access_token(refresh_token)
-    cluster_domain = get_cluster_domain(refresh_token)
-
-    url = '{}/platform/v1/spender/expenses/attach_receipt'.format(cluster_domain)
-    headers = {
-        'content-type': 'application/json',
-        'Authorization': 'Bearer {}'.format(access_token)
-    }
-
+def attach_receipt_to_expense(expense_id: str, receipt_id: str, refresh_token: str, cluster_domain: str = None) -> Dict:
     payload = {
         'data': {
             'id': expense_id,
@@ -206,7 +505,7 @@ def attach_receipt_to_expense(expense_id: str, receipt_id: str, refresh_token: s
         }
     }
 
-    response = http.post(url, json=payload, headers=headers)
+    response = post_to_fyle_platform('spender/expenses/attach_receipt', payload, refresh_token, cluster_domain)
     assertions.assert_valid(response.status_code == 200, 'Error attaching receipt to expense')
     return response.json()['data']
 
@@ -240,16 +539,7 @@ def is_receipt_file_supported(file_info: Dict) -> Union[bool, str]:
     return is_receipt_supported, response_message
 
 
-def extract_expense_from_receipt(receipt_payload: Dict, refresh_token: str) -> Dict:
-    access_token = get_fyle_access_token(refresh_token)
-    cluster_domain = get_cluster_domain(refresh_token)
-
-    url = '{}/platform/v1/spender/expenses/create_from_receipt'.format(cluster_domain)
-    headers = {
-        'content-type': 'application/json',
-        'Authorization': 'Bearer {}'.format(access_token)
-    }
-
-    response = http.post(url, json=receipt_payload, headers=headers)
+def extract_expense_from_receipt(receipt_payload: Dict, refresh_token: str, cluster_domain: str = None) -> Dict:
+    response = post_to_fyle_platform('spender/expenses/create_from_receipt', receipt_payload, refresh_token, cluster_domain)
     assertions.assert_valid(response.status_code == 200, 'Error while creating an expense from receipt')
     return response.json()['data']
@@ -0,0 +1,84 @@
+from typing import Any, Callable, Dict, Hashable
+
+import threading
+
+from concurrent import futures
+
+from django.db import connections
+
+
+class SingleFlight:
+    '''
+        Collapses concurrent calls for the same key into a single execution.
+
+        The first caller for a key runs the function, every other caller which arrives
+        while that call is still in flight waits for it and receives the same result (or exception).
+    '''
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Dict] = {}
+
+
+    def do(self, key: Hashable, function: Callable, *args: Any, **kwargs: Any) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = {
+                    'done': threading.Event(),
+                    'result': None,
+                    'error': None
+                }
+                self._calls[key] = call
+
+        if not is_leader:
+            call['done'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result']
+
+        try:
+            call['result'] = function(*args, **kwargs)
+            return call['result']
+        except Exception as error:
+            call['error'] = error
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call['done'].set()
+
+
+def run_concurrently(calls: Dict[str, Callable], timeout: float) -> Dict[str, Any]:
+    '''
+        Runs independent zero argument callables in parallel threads and returns their results by name.
+
+        All calls share a deadline of `timeout` seconds, `TimeoutError` is raised if any of them
+        hasn't finished by then, and the error of a failed call is raised in the caller.
+        Calls run in threads of their own, so they must not depend on state of other users
+        held in module level config (e.g. Fyle SDK credentials).
+    '''
+    executor = futures.ThreadPoolExecutor(max_workers=len(calls))
+
+    try:
+        pending_calls = {
+            name: executor.submit(_run_and_close_db_connections, function)
+            for name, function in calls.items()
+        }
+
+        _, not_done = futures.wait(pending_calls.values(), timeout=timeout)
+        if not_done:
+            raise TimeoutError('{} calls did not finish in {} seconds'.format(len(not_done), timeout))
+
+        return {name: call.result() for name, call in pending_calls.items()}
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _run_and_close_db_connections(function: Callable) -> Any:
+    # Threads get DB connections of their own, close them since nothing else will
+    try:
+        return function()
+    finally:
+        connections.close_all()
@@ -0,0 +1,113 @@
+from typing import Iterable, List, NamedTuple, Tuple, Union
+
+import bisect
+
+from types import MappingProxyType
+
+from babel.numbers import get_currency_precision, get_currency_symbol, list_currencies
+
+
+# Currencies an expense can be created in
+CURRENCIES: Tuple[str, ...] = (
+    'ADP', 'AED', 'AFA', 'ALL', 'AMD', 'ANG', 'AOA', 'ARS', 'ATS', 'AUD', 'AWG', 'AZM', 'BAM', 'BBD', 'BDT', 'BEF',
+    'BGL', 'BGN', 'BHD', 'BIF', 'BMD', 'BND', 'BOB', 'BOV', 'BRL', 'BSD', 'BTN', 'BWP', 'BYB', 'BZD', 'CAD', 'CDF',
+    'CHF', 'CLF', 'CLP', 'CNY', 'COP', 'CRC', 'CUP', 'CVE', 'CYP', 'CZK', 'DEM', 'DJF', 'DKK', 'DOP', 'DZD', 'ECS',
+    'ECV', 'EEK', 'EGP', 'ERN', 'ESP', 'ETB', 'EUR', 'FIM', 'FJD', 'FKP', 'FRF', 'GBP', 'GEL', 'GHC', 'GIP', 'GMD',
+    'GNF', 'GRD', 'GTQ', 'GWP', 'GYD', 'HKD', 'HNL', 'HRK', 'HTG', 'HUF', 'IDE', 'IDR', 'IEP', 'ILS', 'INR', 'IQD',
+    'IRR', 'ISK', 'ITL', 'JMD', 'JOD', 'JPY', 'KES', 'KGS', 'KHR', 'KMF', 'KPW', 'KRW', 'KWD', 'KYD', 'KZT', 'LAK',
+    'LBP', 'LKR', 'LRD', 'LSL', 'LTL', 'LUF', 'LVL', 'LYD', 'MAD', 'MDL', 'MGF', 'MKD', 'MMK', 'MNT', 'MOP', 'MRO',
+    'MTL', 'MUR', 'MVR', 'MWK', 'MXN', 'MXV', 'MYR', 'MZM', 'NAD', 'NGN', 'NIO', 'NLG', 'NOK', 'NPR', 'NZD', 'OMR',
+    'PAB', 'PEN', 'PGK', 'PHP', 'PKR', 'PLN', 'PTE', 'PYG', 'QAR', 'ROL', 'RUB', 'RUR', 'RWF', 'RYR', 'SAR', 'SBD',
+    'SCR', 'SDP', 'SEK', 'SGD', 'SHP', 'SIT', 'SKK', 'SLL', 'SOS', 'SRG', 'STD', 'SVC', 'SYP', 'SZL', 'THB', 'TJR',
+    'TMM', 'TND', 'TOP', 'TPE', 'TRL', 'TTD', 'TWD', 'TZS', 'UAH', 'UGX', 'USD', 'USN', 'USS', 'UYU', 'UZS', 'VEB',
+    'VND', 'VUV', 'WST', 'XAF', 'XCD', 'XDR', 'XEU', 'XOF', 'XPF', 'YER', 'YUN', 'ZAR', 'ZMK', 'ZRN', 'ZWD',
+)
+
+
+class CurrencyDetails(NamedTuple):
+    code: str
+    # Number of decimal digits as per iso4217
+    precision: int
+    # Symbol of the currency, or the code followed by a space for currencies without a symbol
+    display_symbol: str
+    # Format string of an absolute amount, to the precision of the currency with thousand separators
+    amount_format: str
+
+
+def _build_currency_details(currency: str) -> CurrencyDetails:
+    # If given a currency that babel doesn't know, precision defaults to 2 and symbol to the currency code
+    precision = get_currency_precision(currency)
+    currency_symbol = get_currency_symbol(currency)
+
+    # Add a space to the currency, if the currency doesn't have any symbol
+    # Example, if currency is OMR, for amount 100 this will end up displaying OMR 100 instead of OMR100
+    display_symbol = currency_symbol if currency != currency_symbol else currency_symbol + ' '
+
+    return CurrencyDetails(
+        code=currency,
+        precision=precision,
+        display_symbol=display_symbol,
+        amount_format='{:,.' + str(precision) + 'f}'
+    )
+
+
+# Built once at import, babel lookups are too slow to be done for every amount rendered
+CURRENCY_DETAILS: MappingProxyType = MappingProxyType({
+    currency: _build_currency_details(currency)
+    for currency in sorted(set(CURRENCIES) | set(list_currencies()))
+})
+
+_SORTED_CURRENCIES: Tuple[str, ...] = tuple(sorted(CURRENCIES))
+
+
+def get_currency_details(currency: str) -> CurrencyDetails:
+    if currency is None:
+        raise ValueError('Error while fetching currency details: Currency is None!')
+
+    currency_details = CURRENCY_DETAILS.get(currency)
+
+    # Currencies unknown to babel are formatted with its defaults as well
+    if currency_details is None:
+        currency_details = _build_currency_details(currency)
+
+    return currency_details
+
+
+def get_currencies_by_prefix(prefix: str) -> List[str]:
+    prefix = prefix.upper()
+
+    start = bisect.bisect_left(_SORTED_CURRENCIES, prefix)
+
+    matching_currencies = []
+    for currency in _SORTED_CURRENCIES[start:]:
+        if not currency.startswith(prefix):
+            break
+        matching_currencies.append(currency)
+
+    return matching_currencies
+
+
+def format_amount(amount: Union[str, int, float], currency: str) -> str:
+    if amount is None:
+        raise ValueError('Error while formatting amount: Amount is None!')
+
+    # Convert and clean the amount, if it is a string
+    if isinstance(amount, str):
+        # An amount with '.' as the decimal separator and ',' as the thousand separator is expected for conversion to work properly
+        amount = float(amount.replace(',', ''))
+
+    currency_details = get_currency_details(currency)
+
+    # Sign to add at the beginning
+    sign = '-' if amount < 0 else ''
+
+    # Format fails for cases like 2.665 and 2.675 both returns 2.67 so adding the 1e-9 helps in handling the precision issues
+    # link https://docs.python.org/3/tutorial/floatingpoint.html#tut-fp-issues
+    formatted_amount = currency_details.amount_format.format(abs(amount) + 1e-9)
+
+    return f'{sign}{currency_details.display_symbol}{formatted_amount}'
+
+
+def format_amounts(amounts: Iterable[Tuple[Union[str, int, float], str]]) -> List[str]:
+    # Formats many (amount, currency) pairs at once, e.g. every expense of a report
+    return [format_amount(amount, currency) for amount, currency in amounts]
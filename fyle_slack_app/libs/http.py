@@ -1,18 +1,101 @@
-from typing import Any, Callable, Dict, Tuple
+from typing import Any, Callable, Dict, Iterator, Tuple, Union
 
+import os
 import json
+import time
+import threading
+import contextlib
+
 import requests
 
+from requests.adapters import HTTPAdapter
+
+from django.conf import settings
+
 from fyle_slack_app.libs import logger
 
 
 logger = logger.get_logger(__name__)
 
+_session: requests.Session = None
+_session_pid: int = None
+_session_lock = threading.Lock()
+
+# Epoch time by which the outbound calls of a thread have to complete, see `deadline`
+_deadlines = threading.local()
+
+
+def get_session() -> requests.Session:
+    '''
+        Returns the `requests.Session` shared by all outbound HTTP calls of this process.
+
+        The session keeps a keep-alive connection pool per host, so sequential calls to Fyle, S3 and Slack
+        don't pay for a new TCP + TLS handshake every time.
+        Sockets can't be shared across processes, so gunicorn and django-q workers forked
+        from a parent that already had a session get a fresh one.
+    '''
+    # pylint: disable=global-statement
+    global _session, _session_pid
+
+    current_pid = os.getpid()
+
+    if _session is None or _session_pid != current_pid:
+        with _session_lock:
+            if _session is None or _session_pid != current_pid:
+                session = requests.Session()
+
+                adapter = HTTPAdapter(
+                    pool_connections=settings.HTTP_POOL_CONNECTIONS,
+                    pool_maxsize=settings.HTTP_POOL_MAXSIZE
+                )
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+
+                _session = session
+                _session_pid = current_pid
+
+    return _session
+
+
+@contextlib.contextmanager
+def deadline(seconds: float) -> Iterator[None]:
+    '''
+        Bounds the outbound HTTP calls this thread makes within the block (token exchanges, cluster domain lookups,
+        retries) to `seconds` overall. Each call times out at what is left of the budget,
+        and `requests.Timeout` is raised for calls made once it is spent.
+    '''
+    previous_deadline_at = get_deadline()
+
+    deadline_at = time.time() + seconds
+    if previous_deadline_at is not None:
+        deadline_at = min(deadline_at, previous_deadline_at)
+
+    _deadlines.deadline_at = deadline_at
+    try:
+        yield
+    finally:
+        _deadlines.deadline_at = previous_deadline_at
+
+
+def get_deadline() -> Union[float, None]:
+    return getattr(_deadlines, 'deadline_at', None)
+
 
 def http_request(method: str, url: str, headers: Dict = None, **kwargs: Any) -> requests.Response:
     headers = requests.structures.CaseInsensitiveDict(headers)
 
-    resp = requests.request(
+    deadline_at = get_deadline()
+
+    if deadline_at is None:
+        kwargs.setdefault('timeout', (settings.HTTP_CONNECT_TIMEOUT, settings.HTTP_READ_TIMEOUT))
+    else:
+        remaining_time = deadline_at - time.time()
+        if remaining_time <= 0:
+            raise requests.Timeout('Deadline passed before {} {}'.format(method, url))
+
+        kwargs['timeout'] = (min(settings.HTTP_CONNECT_TIMEOUT, remaining_time), remaining_time)
+
+    resp = get_session().request(
         method=method,
         url=url,
         headers=headers,
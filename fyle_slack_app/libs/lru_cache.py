@@ -0,0 +1,85 @@
+from typing import Any, Dict, Hashable
+
+import threading
+import time
+
+from collections import OrderedDict
+
+
+class LRUCache:
+    '''
+        Bounded, thread safe, in-process LRU cache.
+
+        - `max_size` caps the number of entries, the least recently used entry is evicted first
+        - `timeout` (seconds) expires an entry this long after it was set
+        - `idle_timeout` (seconds) expires an entry which hasn't been read for this long
+    '''
+
+    def __init__(self, max_size: int, timeout: float = None, idle_timeout: float = None) -> None:
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and self._is_expired(entry, now):
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                return default
+
+            entry['accessed_at'] = now
+            self._entries.move_to_end(key)
+
+            return entry['value']
+
+
+    def set(self, key: Hashable, value: Any, timeout: float = None) -> None:
+        now = time.monotonic()
+        timeout = self.timeout if timeout is None else timeout
+
+        with self._lock:
+            self._entries[key] = {
+                'value': value,
+                'accessed_at': now,
+                'expires_at': now + timeout if timeout is not None else None
+            }
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+    def delete(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+
+        return entry['value'] if entry is not None else None
+
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+    def _is_expired(self, entry: Dict, now: float) -> bool:
+        if entry['expires_at'] is not None and entry['expires_at'] <= now:
+            return True
+
+        if self.idle_timeout is not None and entry['accessed_at'] + self.idle_timeout <= now:
+            return True
+
+        return False
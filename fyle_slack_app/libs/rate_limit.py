@@ -0,0 +1,48 @@
+from typing import Union
+
+import threading
+import time
+
+
+class TokenBucket:
+    '''
+        Thread safe token bucket allowing `rate` calls per second with bursts of up to `capacity` calls.
+
+        `reserve()` takes a token and returns how long the caller has to wait before making its call,
+        calls reserved while the bucket is empty are spaced out in the order they were reserved.
+        With `max_delay`, no token is taken and None is returned if the caller would have to wait longer.
+        `block()` keeps the bucket empty for a while, e.g. after the remote side asked to back off.
+    '''
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+
+        self._lock = threading.Lock()
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+
+
+    def reserve(self, max_delay: float = None) -> Union[float, None]:
+        with self._lock:
+            now = time.monotonic()
+
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+
+            delay = 0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+
+            if max_delay is not None and delay > max_delay:
+                return None
+
+            self._tokens -= 1
+
+            return delay
+
+
+    def block(self, seconds: float) -> None:
+        with self._lock:
+            now = time.monotonic()
+
+            self._tokens = min(self._tokens, -seconds * self.rate)
+            self._updated_at = now
@@ -0,0 +1,51 @@
+from typing import Any
+
+import enum
+
+from django.conf import settings
+
+
+class TaskLane(enum.Enum):
+    # Tasks a user is waiting on, e.g. modal updates and report approvals
+    INTERACTIVE = 'interactive'
+    # Fyle webhooks turned into Slack notifications
+    NOTIFICATIONS = 'notifications'
+    # Long running work and background refreshes, e.g. installation broadcasts and uninstalls
+    BULK = 'bulk'
+
+
+def async_task(lane: TaskLane, func: str, *args: Any, **kwargs: Any) -> str:
+    '''
+        Queues a django-q task in a lane. Each lane is a queue processed by a cluster of its own
+        (see `Q_CLUSTER_LANES`), so a burst of bulk work doesn't hold up the tasks users are waiting on.
+
+        Lanes are always picked explicitly, a plain `async_task` queues to the lane of the cluster it is called from.
+    '''
+    # pylint: disable=import-outside-toplevel
+    from django_q.brokers import get_broker
+    from django_q.tasks import async_task as queue_task
+
+    q_options = kwargs.pop('q_options', {})
+    q_options['broker'] = get_broker(settings.Q_CLUSTER_LANES[lane.value]['name'])
+
+    return queue_task(func, *args, q_options=q_options, **kwargs)
+
+
+def schedule(lane: TaskLane, func: str, *args: Any, **kwargs: Any) -> Any:
+    '''
+        Schedules a django-q task in a lane. django-q queues every schedule on the cluster running the scheduler
+        (the interactive lane), so the schedule only runs `queue_scheduled_task`, which queues the task in its lane.
+    '''
+    # pylint: disable=import-outside-toplevel
+    from django_q.tasks import schedule as schedule_task
+
+    return schedule_task('fyle_slack_app.libs.task_lanes.queue_scheduled_task', lane.value, func, *args, **kwargs)
+
+
+def get_scheduled_task_args(lane: TaskLane, func: str, *args: Any) -> str:
+    # Arguments of a `Schedule` created directly, django-q stores them as the repr of a tuple
+    return repr((lane.value, func, *args))
+
+
+def queue_scheduled_task(lane: str, func: str, *args: Any, **kwargs: Any) -> str:
+    return async_task(TaskLane(lane), func, *args, **kwargs)
@@ -1,4 +1,4 @@
-from typing import Any, Dict, Union, Callable
+from typing import Any, Dict, NamedTuple, Union, Callable
 
 import base64
 import datetime
@@ -6,6 +6,8 @@ import json
 import hashlib
 import string
 import random
+import threading
+import time
 
 from functools import wraps
 from urllib.parse import quote_plus, urlencode
@@ -13,10 +15,31 @@ from urllib.parse import quote_plus, urlencode
 from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
 from django.conf import settings
+from django.db import connections
 from django.db.models.base import Model
 
+from fyle_slack_app.libs import logger
+from fyle_slack_app.libs.concurrency import SingleFlight
+from fyle_slack_app.libs.lru_cache import LRUCache
+
+
+logger = logger.get_logger(__name__)
+
 FYLE_BRANCHIO_BASE_URI = settings.FYLE_BRANCHIO_BASE_URI
 
+# How long a process may hold the lock for computing a cached value
+CACHE_LOCK_TIMEOUT = 30
+
+# How long other processes wait for the lock holder to cache the value before computing it themselves
+CACHE_LOCK_WAIT = 5
+CACHE_LOCK_POLL_INTERVAL = 0.05
+
+
+class CacheEntry(NamedTuple):
+    value: Any
+    # Epoch time after which the entry should be refreshed in background, None if refresh-ahead is off
+    refresh_at: Union[float, None]
+
 
 def get_or_none(model: Model, **kwargs: Any) -> Union[None, Model]:
     try:
@@ -70,30 +93,170 @@ def generate_random_string(string_length=10):
     return ''.join(random.choice(letters) for _ in range(string_length))
 
 
-# Default timeout for cache is 60 seconds
-def cache_this(timeout: int = None) -> Callable:
+def cache_this(timeout: int = None, refresh_ahead: int = None, jitter: float = 0,
+               local_timeout: int = None, local_max_size: int = 1000) -> Callable:
+    '''
+        Caches the response of the decorated function in the django cache for `timeout` seconds.
+
+        - Only one caller computes a missing entry, concurrent callers wait for its result
+          (threads of a process share the call, processes coordinate through a lock in the cache)
+        - `refresh_ahead` (seconds) serves the cached value during the last seconds of its lifetime
+          while a background task refreshes it, so popular entries never expire under load
+        - `jitter` (fraction of `timeout`) randomly extends the timeout of each entry,
+          so entries cached at the same time don't all expire at the same time
+        - `local_timeout` (seconds) adds an in-process LRU of `local_max_size` entries in front of the
+          django cache, repeated lookups within a process then skip the cache backend round trip.
+          Keep it short, entries invalidated by other processes are served from it until it expires
+    '''
     def decorator(function: Callable) -> Callable:
+        cached_function = CachedFunction(
+            function,
+            timeout=timeout,
+            refresh_ahead=refresh_ahead,
+            jitter=jitter,
+            local_timeout=local_timeout,
+            local_max_size=local_max_size
+        )
+
         @wraps(function)
         def function_wrapper(*args: Any, **kwargs: Any) -> Callable:
+            return cached_function.get(args, kwargs)
 
-            if timeout is None:
-                raise Exception('Timeout not specified for caching')
+        function_wrapper.refresh = cached_function.refresh
+        function_wrapper.invalidate = cached_function.invalidate
 
-            # Creating hash of the function arguments passed
-            hashed_args = get_hashed_args(args, kwargs)
+        return function_wrapper
+    return decorator
 
-            # Creating a cache key with prefix as function name
-            # and suffix as hashed function arguments
-            cache_key = '{}.{}'.format(function.__name__, hashed_args)
 
-            response = cache.get(cache_key)
+class CachedFunction:
+    '''
+        Entries of a function decorated with `cache_this`, see its options.
+    '''
 
-            # If cache doesn't return anything call the original function
-            # and cache the function response
-            if response is None:
-                response = function(*args, **kwargs)
-                cache.set(cache_key, response, timeout)
+    def __init__(self, function: Callable, *, timeout: int, refresh_ahead: int, jitter: float,
+                 local_timeout: int, local_max_size: int) -> None:
+        self.function = function
+        self.timeout = timeout
+        self.refresh_ahead = refresh_ahead
+        self.jitter = jitter
 
-            return response
-        return function_wrapper
-    return decorator
+        self.in_flight_calls = SingleFlight()
+
+        self.local_cache = None
+        if local_timeout is not None:
+            self.local_cache = LRUCache(max_size=local_max_size, timeout=local_timeout)
+
+
+    def get(self, args: Any, kwargs: Any) -> Any:
+        if self.timeout is None:
+            raise Exception('Timeout not specified for caching')
+
+        cache_key = self.get_cache_key(args, kwargs)
+
+        # Entries due for a refresh are looked up in the django cache, which holds the refreshed value
+        if self.local_cache is not None:
+            entry = self.local_cache.get(cache_key)
+            if entry is not None and (entry.refresh_at is None or entry.refresh_at > time.time()):
+                return entry.value
+
+        entry = cache.get(cache_key)
+
+        # If cache doesn't return anything call the original function
+        # and cache the function response
+        if not isinstance(entry, CacheEntry):
+            return self.in_flight_calls.do(cache_key, self.compute_once, cache_key, args, kwargs)
+
+        if entry.refresh_at is not None and entry.refresh_at <= time.time():
+            self.schedule_refresh(args, kwargs)
+        else:
+            self.set_local_entry(cache_key, entry)
+
+        return entry.value
+
+
+    def refresh(self, *args: Any, **kwargs: Any) -> Any:
+        cache_key = self.get_cache_key(args, kwargs)
+        return self.in_flight_calls.do(cache_key, self.compute, cache_key, args, kwargs)
+
+
+    def invalidate(self, *args: Any, **kwargs: Any) -> None:
+        cache_key = self.get_cache_key(args, kwargs)
+        cache.delete(cache_key)
+        if self.local_cache is not None:
+            self.local_cache.delete(cache_key)
+
+
+    def get_cache_key(self, args: Any, kwargs: Any) -> str:
+        # Creating hash of the function arguments passed
+        hashed_args = get_hashed_args(args, kwargs)
+
+        # Creating a cache key with prefix as function name
+        # and suffix as hashed function arguments
+        return '{}.{}'.format(self.function.__name__, hashed_args)
+
+
+    def set_local_entry(self, cache_key: str, entry: CacheEntry) -> None:
+        if self.local_cache is not None:
+            self.local_cache.set(cache_key, entry)
+
+
+    def compute(self, cache_key: str, args: Any, kwargs: Any) -> Any:
+        response = self.function(*args, **kwargs)
+
+        entry_timeout = self.timeout + random.randint(0, int(self.timeout * self.jitter))
+
+        refresh_at = None
+        if self.refresh_ahead is not None:
+            refresh_at = time.time() + entry_timeout - self.refresh_ahead
+
+        entry = CacheEntry(response, refresh_at)
+        cache.set(cache_key, entry, entry_timeout)
+        self.set_local_entry(cache_key, entry)
+
+        return response
+
+
+    def compute_once(self, cache_key: str, args: Any, kwargs: Any) -> Any:
+        lock_key = '{}.lock'.format(cache_key)
+
+        if cache.add(lock_key, True, CACHE_LOCK_TIMEOUT):
+            try:
+                return self.compute(cache_key, args, kwargs)
+            finally:
+                cache.delete(lock_key)
+
+        # Some other process is computing this entry, wait for it to show up in cache
+        wait_until = time.time() + CACHE_LOCK_WAIT
+        while time.time() < wait_until:
+            time.sleep(CACHE_LOCK_POLL_INTERVAL)
+            entry = cache.get(cache_key)
+            if isinstance(entry, CacheEntry):
+                self.set_local_entry(cache_key, entry)
+                return entry.value
+
+        return self.compute(cache_key, args, kwargs)
+
+
+    def schedule_refresh(self, args: Any, kwargs: Any) -> None:
+        # Only one refresh is scheduled for an entry until it is refreshed
+        # Refreshed by a thread of this process, a queued task would store the arguments (e.g. refresh tokens)
+        if cache.add('{}.refresh'.format(self.get_cache_key(args, kwargs)), True, self.refresh_ahead):
+            threading.Thread(
+                target=refresh_cached_entry,
+                args=(self.refresh, args, kwargs),
+                name='cache-refresh',
+                daemon=True
+            ).start()
+
+
+def refresh_cached_entry(refresh: Callable, args: Any, kwargs: Any) -> None:
+    # Recomputes an entry cached by `cache_this` before it expires, a failed refresh leaves the entry to expire
+    try:
+        refresh(*args, **kwargs)
+    # pylint: disable=broad-except
+    except Exception as error:
+        logger.error('Error while refreshing cached entry: %s', error)
+    finally:
+        # Connections opened by this thread aren't closed by the request or task
+        connections.close_all()
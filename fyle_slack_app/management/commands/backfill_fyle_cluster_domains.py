@@ -0,0 +1,48 @@
+import requests
+
+from django.core.management.base import BaseCommand
+
+from fyle_slack_app.models import User
+from fyle_slack_app.fyle import utils as fyle_utils
+from fyle_slack_app.libs import assertions, logger
+
+
+logger = logger.get_logger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Stores the Fyle cluster domain of users linked before it was stored on the user'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        users = User.objects.filter(fyle_cluster_domain='').only('id', 'fyle_refresh_token')
+
+        updated_users = []
+        updated_count = 0
+        failed_count = 0
+
+        for user in users.iterator(chunk_size=batch_size):
+            try:
+                user.fyle_cluster_domain = fyle_utils.get_cluster_domain(user.fyle_refresh_token)
+            except (assertions.InvalidUsage, requests.RequestException):
+                logger.error('Unable to fetch cluster domain of user with id -> %s', user.id)
+                failed_count += 1
+                continue
+
+            updated_users.append(user)
+
+            if len(updated_users) == batch_size:
+                User.objects.bulk_update(updated_users, ['fyle_cluster_domain'])
+                updated_count += len(updated_users)
+                updated_users = []
+
+        if updated_users:
+            User.objects.bulk_update(updated_users, ['fyle_cluster_domain'])
+            updated_count += len(updated_users)
+
+        self.stdout.write('Cluster domain stored for {} users, {} failed'.format(updated_count, failed_count))
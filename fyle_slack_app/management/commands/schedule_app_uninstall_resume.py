@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from django_q.models import Schedule
+
+from fyle_slack_app.libs.task_lanes import TaskLane, get_scheduled_task_args
+
+
+class Command(BaseCommand):
+    help = 'Schedules the check which resumes app uninstalls that crashed or timed out'
+
+    def handle(self, *args, **options):
+        # Schedules are run by the interactive cluster, the schedule only queues the task in the bulk lane
+        _, created = Schedule.objects.update_or_create(
+            name='Resume app uninstalls',
+            defaults={
+                'func': 'fyle_slack_app.libs.task_lanes.queue_scheduled_task',
+                'args': get_scheduled_task_args(TaskLane.BULK, 'fyle_slack_app.slack.events.tasks.resume_app_uninstalls'),
+                'schedule_type': Schedule.MINUTES,
+                'minutes': 10
+            }
+        )
+
+        self.stdout.write('App uninstall resume {}'.format('scheduled' if created else 'rescheduled'))
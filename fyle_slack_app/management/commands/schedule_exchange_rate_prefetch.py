@@ -0,0 +1,29 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from django_q.models import Schedule
+
+from fyle_slack_app.libs.task_lanes import TaskLane, get_scheduled_task_args
+
+
+class Command(BaseCommand):
+    help = 'Schedules the daily prefetch of exchange rates of the foreign currencies orgs use the most'
+
+    def handle(self, *args, **options):
+        # Running shortly after midnight, when the rates of the new day are needed
+        next_run = timezone.localtime().replace(hour=0, minute=10, second=0, microsecond=0) + datetime.timedelta(days=1)
+
+        # Schedules are run by the interactive cluster, the schedule only queues the task in the bulk lane
+        _, created = Schedule.objects.update_or_create(
+            name='Prefetch exchange rates',
+            defaults={
+                'func': 'fyle_slack_app.libs.task_lanes.queue_scheduled_task',
+                'args': get_scheduled_task_args(TaskLane.BULK, 'fyle_slack_app.fyle.expenses.tasks.prefetch_exchange_rates'),
+                'schedule_type': Schedule.DAILY,
+                'next_run': next_run
+            }
+        )
+
+        self.stdout.write('Exchange rate prefetch {}, next run at {}'.format('scheduled' if created else 'rescheduled', next_run))
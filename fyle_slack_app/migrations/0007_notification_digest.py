@@ -0,0 +1,33 @@
+# Generated by Django 4.2.29 on 2026-10-18 11:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fyle_slack_app', '0006_user_fyle_cluster_domain'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationpreference',
+            name='is_digest_enabled',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='NotificationDigestEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('notification_type', models.CharField(max_length=120)),
+                ('notification_role', models.CharField(max_length=120)),
+                ('webhook_data', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('slack_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='fyle_slack_app.user', to_field='slack_user_id')),
+            ],
+            options={
+                'db_table': 'notification_digest_events',
+            },
+        ),
+    ]
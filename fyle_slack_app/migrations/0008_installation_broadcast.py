@@ -0,0 +1,29 @@
+# Generated by Django 4.2.29 on 2026-10-18 11:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fyle_slack_app', '0007_notification_digest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InstallationBroadcast',
+            fields=[
+                ('slack_team', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='fyle_slack_app.team')),
+                ('cursor', models.CharField(max_length=255, null=True)),
+                ('messaged_user_ids', models.JSONField(default=list)),
+                ('messaged_count', models.IntegerField(default=0)),
+                ('is_completed', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'installation_broadcasts',
+            },
+        ),
+    ]
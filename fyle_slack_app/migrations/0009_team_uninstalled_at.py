@@ -0,0 +1,18 @@
+# Generated by Django 4.2.29 on 2026-10-18 11:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fyle_slack_app', '0008_installation_broadcast'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='team',
+            name='uninstalled_at',
+            field=models.DateTimeField(null=True),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from fyle_slack_app.models.teams import Team
+from fyle_slack_app.models.installation_broadcasts import InstallationBroadcast
 from fyle_slack_app.models.users import User
 from fyle_slack_app.models.report_polling_details import ReportPollingDetail
 from fyle_slack_app.models.notification_preferences import NotificationPreference
+from fyle_slack_app.models.notification_digest_events import NotificationDigestEvent
 from fyle_slack_app.models.user_subscription_details import UserSubscriptionDetail
 from fyle_slack_app.models.user_feedbacks import UserFeedback, UserFeedbackResponse
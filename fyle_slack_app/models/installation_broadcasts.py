@@ -0,0 +1,22 @@
+from django.db import models
+
+from fyle_slack_app.models.teams import Team
+
+
+class InstallationBroadcast(models.Model):
+
+    class Meta:
+        db_table = 'installation_broadcasts'
+
+    slack_team = models.OneToOneField(Team, on_delete=models.CASCADE, primary_key=True)
+    # Cursor of the `users.list` page being broadcast to, None for the first page
+    cursor = models.CharField(max_length=255, null=True)
+    # Members of the current page who were already messaged
+    messaged_user_ids = models.JSONField(default=list)
+    messaged_count = models.IntegerField(default=0)
+    is_completed = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return '{} - {}'.format(self.slack_team_id, self.messaged_count)
@@ -0,0 +1,18 @@
+from django.db import models
+
+from fyle_slack_app.models.users import User
+
+
+class NotificationDigestEvent(models.Model):
+
+    class Meta:
+        db_table = 'notification_digest_events'
+
+    slack_user = models.ForeignKey(User, on_delete=models.CASCADE, to_field='slack_user_id')
+    notification_type = models.CharField(max_length=120)
+    notification_role = models.CharField(max_length=120)
+    webhook_data = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return '{} - {}'.format(self.slack_user_id, self.notification_type)
@@ -20,7 +20,13 @@ class NotificationType(enum.Enum):
     # Expense notification types
     EXPENSE_COMMENTED = 'EXPENSE_COMMENTED'
     EXPENSE_MATCHED = 'EXPENSE_MATCHED'
-    
+
+
+# Notification types which are always sent on their own, even with digest enabled
+# Receipts of matched card expenses are attached by replying to their notification
+NON_DIGEST_NOTIFICATION_TYPES = [
+    NotificationType.EXPENSE_MATCHED.value
+]
 
 
 class NotificationPreference(models.Model):
@@ -32,6 +38,8 @@ class NotificationPreference(models.Model):
     slack_user = models.ForeignKey(User, on_delete=models.CASCADE, to_field='slack_user_id')
     notification_type = models.CharField(max_length=120)
     is_enabled = models.BooleanField(default=True)
+    # Enabled notifications of the type are sent together in one message per digest window
+    is_digest_enabled = models.BooleanField(default=False)
 
     def __str__(self) -> str:
         return "{} - {}".format(self.slack_user.id, self.notification_type)
@@ -9,6 +9,8 @@ class Team(models.Model):
     name = models.CharField(max_length=120)
     bot_user_id = models.CharField(max_length=120)
     bot_access_token = models.CharField(max_length=256)
+    # Set while the app's uninstall is being torn down, the team is deleted once it is done
+    uninstalled_at = models.DateTimeField(null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -14,8 +14,19 @@ class User(models.Model):
     fyle_refresh_token = models.TextField()
     fyle_user_id = models.CharField(max_length=120, unique=True)
     fyle_org_id = models.CharField(max_length=255, blank=True)
+    fyle_cluster_domain = models.CharField(max_length=255, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+
+        # Kept to tell a rotated refresh token on save without querying the stored one again
+        user.loaded_fyle_refresh_token = user.__dict__.get('fyle_refresh_token')
+
+        return user
+
+
     def __str__(self) -> str:
         return "{} - {}".format(self.slack_user_id, self.email)
@@ -1,7 +1,11 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
-from fyle_slack_app.models import User, NotificationPreference
+from fyle_slack_app.models import Team, User, NotificationPreference, UserSubscriptionDetail
 from fyle_slack_app.models.notification_preferences import NotificationType
+from fyle_slack_app.fyle import utils as fyle_utils
+from fyle_slack_app.fyle.notifications import routing
+from fyle_slack_app.slack import directory as slack_directory, utils as slack_utils
 
 
 # This signal acts as a trigger when a user is created
@@ -20,3 +24,63 @@ def create_notification_preference(sender, instance, created, **kwargs):
 
         # Creating notification preferences in bulk for a user
         NotificationPreference.objects.bulk_create(notification_preferences)
+
+
+# Drops the cached Fyle connection of a user when their refresh token is rotated
+@receiver(pre_save, sender=User)
+def invalidate_rotated_fyle_connection(sender, instance, **kwargs):
+    # Compared with the token the user was loaded with, users created in this process have nothing to compare with
+    loaded_refresh_token = getattr(instance, 'loaded_fyle_refresh_token', None)
+
+    if loaded_refresh_token is not None and loaded_refresh_token != instance.fyle_refresh_token:
+        fyle_utils.invalidate_fyle_sdk_connection(loaded_refresh_token)
+        instance.loaded_fyle_refresh_token = instance.fyle_refresh_token
+
+
+# Drops the cached Fyle connection of a user when they unlink their Fyle account
+@receiver(post_delete, sender=User)
+def invalidate_unlinked_fyle_connection(sender, instance, **kwargs):
+    fyle_utils.invalidate_fyle_sdk_connection(instance.fyle_refresh_token)
+
+
+# Webhook routes are built from users, their team, notification preferences and subscriptions,
+# only the routes of the webhooks a change affects are dropped
+@receiver(post_save, sender=UserSubscriptionDetail)
+@receiver(post_delete, sender=UserSubscriptionDetail)
+def invalidate_subscription_webhook_route(sender, instance, **kwargs):
+    invalidate_webhook_routes_on_commit([instance.webhook_id])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=NotificationPreference)
+@receiver(post_delete, sender=NotificationPreference)
+def invalidate_user_webhook_routes(sender, instance, **kwargs):
+    webhook_ids = UserSubscriptionDetail.objects.filter(slack_user_id=instance.slack_user_id).values_list('webhook_id', flat=True)
+    invalidate_webhook_routes_on_commit(list(webhook_ids))
+
+
+@receiver(post_save, sender=Team)
+@receiver(post_delete, sender=Team)
+def invalidate_team_webhook_routes(sender, instance, **kwargs):
+    webhook_ids = UserSubscriptionDetail.objects.filter(slack_user__slack_team_id=instance.id).values_list('webhook_id', flat=True)
+    invalidate_webhook_routes_on_commit(list(webhook_ids))
+
+
+def invalidate_webhook_routes_on_commit(webhook_ids):
+    # Dropped once the change is committed, so that routes aren't loaded again from the data before it
+    if webhook_ids:
+        transaction.on_commit(lambda: routing.invalidate_webhook_routes(webhook_ids))
+
+
+# Drops the cached Slack client of a team when the app is reinstalled (new bot token) or uninstalled
+@receiver(post_save, sender=Team)
+@receiver(post_delete, sender=Team)
+def invalidate_team_slack_client(sender, instance, **kwargs):
+    slack_utils.invalidate_slack_client(instance.id)
+
+
+# Drops the workspace directory of a team when the app is uninstalled
+@receiver(post_delete, sender=Team)
+def invalidate_team_slack_directory(sender, instance, **kwargs):
+    slack_directory.invalidate_slack_directory(instance.id)
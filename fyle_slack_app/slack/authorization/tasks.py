@@ -1,31 +1,106 @@
-from slack_sdk import WebClient
+from typing import Dict
+
+from concurrent import futures
+from datetime import timedelta
+from functools import partial
+
+from slack_sdk.errors import SlackApiError
+from slack_sdk.web import WebClient
+
+from django.conf import settings
+from django.utils import timezone
 
 from fyle_slack_app.fyle import utils as fyle_utils
-from fyle_slack_app.libs import utils, assertions
-from fyle_slack_app.models import Team
+from fyle_slack_app.libs import assertions, logger
+from fyle_slack_app.libs.task_lanes import TaskLane, async_task
+from fyle_slack_app.models import InstallationBroadcast
 from fyle_slack_app.slack import utils as slack_utils
 from fyle_slack_app.slack.ui.authorization import messages
 
 
+logger = logger.get_logger(__name__)
+
+INSTALLATION_BROADCAST_PAGE_SIZE = 200
+
+
 def broadcast_installation_message(slack_team_id: str) -> None:
-    slack_team = utils.get_or_none(Team, id=slack_team_id)
-    assertions.assert_found(slack_team, 'slack team is not registered')
+    '''
+        Sends the pre authorization message to every member of a workspace, one `users.list` page per task.
+        The task of the next page is queued once a page is done.
 
-    slack_client = WebClient(token=slack_team.bot_access_token)
+        Progress is checkpointed after every few messages, so a broadcast which crashed or timed out
+        is picked up by `resume_installation_broadcasts` without messaging anyone twice.
+    '''
+    broadcast, _ = InstallationBroadcast.objects.get_or_create(slack_team_id=slack_team_id)
 
-    slack_workspace_users = slack_client.users_list()
+    if broadcast.is_completed:
+        return
+
+    slack_client = slack_utils.get_slack_client(slack_team_id)
+
+    slack_workspace_users = slack_client.users_list(limit=INSTALLATION_BROADCAST_PAGE_SIZE, cursor=broadcast.cursor)
     assertions.assert_good(slack_workspace_users['ok'] is True)
 
-    for workspace_user in slack_workspace_users['members']:
-        if workspace_user['deleted'] is False and workspace_user['is_bot'] is False:
+    messaged_user_ids = set(broadcast.messaged_user_ids)
+
+    pending_workspace_users = [
+        workspace_user for workspace_user in slack_workspace_users['members']
+        if workspace_user['deleted'] is False and workspace_user['is_bot'] is False and workspace_user['id'] not in messaged_user_ids
+    ]
+
+    # Messages are sent a few at a time, the client keeps them within Slack's rate limits
+    batch_size = settings.SLACK_BROADCAST_CONCURRENCY
+
+    with futures.ThreadPoolExecutor(max_workers=batch_size) as executor:
+        for batch_start in range(0, len(pending_workspace_users), batch_size):
+            batch = pending_workspace_users[batch_start:batch_start + batch_size]
+
+            messaged_user_ids.update(executor.map(partial(send_installation_message, slack_client), batch))
+
+            broadcast.messaged_user_ids = list(messaged_user_ids)
+            broadcast.messaged_count += len(batch)
+            broadcast.save()
+
+    next_cursor = slack_workspace_users.get('response_metadata', {}).get('next_cursor')
+
+    broadcast.cursor = next_cursor or None
+    broadcast.messaged_user_ids = []
+    broadcast.is_completed = not next_cursor
+    broadcast.save()
+
+    if broadcast.is_completed is False:
+        async_task(TaskLane.BULK, 'fyle_slack_app.slack.authorization.tasks.broadcast_installation_message', slack_team_id)
+    else:
+        logger.info('Installation message broadcast to %s members of team %s', broadcast.messaged_count, slack_team_id)
+
+
+def send_installation_message(slack_client: WebClient, workspace_user: Dict) -> str:
+    # A member who can't be messaged shouldn't hold back the rest of the broadcast
+    try:
+        fyle_oauth_url = fyle_utils.get_fyle_oauth_url(workspace_user['id'], workspace_user['team_id'])
+
+        workspace_user_dm_channel_id = slack_utils.get_slack_user_dm_channel_id(slack_client, workspace_user['id'])
+
+        pre_auth_message = messages.get_pre_authorization_message(workspace_user['real_name'], fyle_oauth_url)
+
+        slack_client.chat_postMessage(
+            channel=workspace_user_dm_channel_id,
+            blocks=pre_auth_message
+        )
+    except SlackApiError as error:
+        logger.error('Error while sending installation message to %s - %s', workspace_user['id'], error)
+
+    return workspace_user['id']
+
 
-            fyle_oauth_url = fyle_utils.get_fyle_oauth_url(workspace_user['id'], workspace_user['team_id'])
+def resume_installation_broadcasts() -> None:
+    # Broadcasts save progress every few messages, one which hasn't for a while is no longer running
+    stale_before = timezone.now() - timedelta(seconds=settings.SLACK_BROADCAST_STALE_TIMEOUT)
 
-            workspace_user_dm_channel_id = slack_utils.get_slack_user_dm_channel_id(slack_client, workspace_user['id'])
+    for broadcast in InstallationBroadcast.objects.filter(is_completed=False, updated_at__lt=stale_before):
+        logger.info('Resuming installation broadcast of team %s after %s members', broadcast.slack_team_id, broadcast.messaged_count)
 
-            pre_auth_message = messages.get_pre_authorization_message(workspace_user['real_name'], fyle_oauth_url)
+        # Touching the broadcast so it isn't queued again while the resumed task runs
+        broadcast.save(update_fields=['updated_at'])
 
-            slack_client.chat_postMessage(
-                channel=workspace_user_dm_channel_id,
-                blocks=pre_auth_message
-            )
+        async_task(TaskLane.BULK, 'fyle_slack_app.slack.authorization.tasks.broadcast_installation_message', broadcast.slack_team_id)
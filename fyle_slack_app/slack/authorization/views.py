@@ -1,14 +1,15 @@
 from django.http import HttpResponseRedirect, HttpRequest
 from django.conf import settings
 from django.views import View
-from django_q.tasks import async_task
 
 from slack_sdk.web import WebClient
 
 from fyle_slack_app.models import Team
 from fyle_slack_app.libs import utils, assertions, logger
+from fyle_slack_app.libs.task_lanes import TaskLane, async_task
 from fyle_slack_app.slack import utils as slack_utils
 from fyle_slack_app import tracking
+from fyle_slack_app.slack.web_client import FyleSlackWebClient
 
 
 logger = logger.get_logger(__name__)
@@ -30,7 +31,7 @@ class SlackAuthorization(View):
         code = request.GET.get('code')
 
         # An empty string is a valid token for this request
-        slack_client = WebClient('')
+        slack_client = FyleSlackWebClient('')
 
         auth_response = slack_client.oauth_v2_access(
             client_id=settings.SLACK_CLIENT_ID,
@@ -49,14 +50,15 @@ class SlackAuthorization(View):
         slack_team = utils.get_or_none(Team, id=team_id)
 
         if slack_team is not None:
-            # Update bot access token
+            # Update bot access token, a reinstall also stops a teardown of the team still running
             slack_team.bot_access_token = bot_access_token
+            slack_team.uninstalled_at = None
             slack_team.save()
 
             # If slack team already exists means
             # Slack bot is already installed in the workspace
             # Send user a message that bot is already installed
-            slack_client = WebClient(token=bot_access_token)
+            slack_client = FyleSlackWebClient(token=bot_access_token, team_id=team_id)
             slack_user_dm_channel_id = slack_utils.get_slack_user_dm_channel_id(slack_client, user_id)
 
             self.send_bot_already_installed_message(slack_client, slack_user_dm_channel_id)
@@ -71,9 +73,9 @@ class SlackAuthorization(View):
             )
 
             # Background task to broadcast pre auth message to all slack workspace members
-            async_task('fyle_slack_app.slack.authorization.tasks.broadcast_installation_message', team_id)
+            async_task(TaskLane.BULK, 'fyle_slack_app.slack.authorization.tasks.broadcast_installation_message', team_id)
 
-            slack_client = WebClient(token=bot_access_token)
+            slack_client = FyleSlackWebClient(token=bot_access_token, team_id=team_id)
 
             # Tracking slack bot installation to Mixpanel
             self.track_installation(user_id, slack_team, slack_client)
@@ -2,12 +2,12 @@ from typing import Callable, Dict
 
 from django.http.response import JsonResponse
 
-from django_q.tasks import async_task
 
 from fyle.platform import exceptions
 
 from fyle_slack_app.libs import utils, assertions, logger
-from fyle_slack_app.fyle.utils import get_fyle_oauth_url, get_fyle_profile
+from fyle_slack_app.libs.task_lanes import TaskLane, async_task
+from fyle_slack_app.fyle.utils import get_fyle_oauth_url, get_fyle_profile, get_user_cluster_domain
 from fyle_slack_app.models import User, NotificationPreference
 from fyle_slack_app.slack.ui.common_messages import IN_PROGRESS_MESSAGE
 from fyle_slack_app.slack.ui.dashboard import messages as dashboard_messages
@@ -63,6 +63,7 @@ class SlackCommandHandler:
         message_ts = message['message']['ts']
 
         async_task(
+            TaskLane.INTERACTIVE,
             'fyle_slack_app.slack.commands.tasks.fyle_unlink_account',
             user_id,
             team_id,
@@ -92,10 +93,10 @@ class SlackCommandHandler:
         user = utils.get_or_none(User, slack_user_id=user_id)
         assertions.assert_found(user, 'Slack user not found')
 
-        user_notification_preferences = NotificationPreference.objects.values('notification_type', 'is_enabled').filter(slack_user_id=user_id).order_by('-notification_type')
+        user_notification_preferences = NotificationPreference.objects.values('notification_type', 'is_enabled', 'is_digest_enabled').filter(slack_user_id=user_id).order_by('-notification_type')
 
         try:
-            fyle_profile = get_fyle_profile(user.fyle_refresh_token)
+            fyle_profile = get_fyle_profile(user.fyle_refresh_token, get_user_cluster_domain(user))
 
             notification_preference_blocks = notification_preference_messages.get_notification_preferences_blocks(user_notification_preferences, fyle_profile['roles'])
 
@@ -124,6 +125,7 @@ class SlackCommandHandler:
         user = utils.get_or_none(User, slack_user_id=user_id)
 
         async_task(
+            TaskLane.INTERACTIVE,
             'fyle_slack_app.slack.commands.tasks.open_expense_form',
             user,
             team_id,
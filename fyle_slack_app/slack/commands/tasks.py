@@ -39,9 +39,9 @@ def fyle_unlink_account(user_id: str, team_id: str, user_dm_channel_id: str, mes
 
         # Disabling user subscription
         access_token = fyle_utils.get_fyle_access_token(user.fyle_refresh_token)
-        cluster_domain = fyle_utils.get_cluster_domain(user.fyle_refresh_token)
+        cluster_domain = fyle_utils.get_user_cluster_domain(user)
 
-        fyle_profile = fyle_utils.get_fyle_profile(user.fyle_refresh_token)
+        fyle_profile = fyle_utils.get_fyle_profile(user.fyle_refresh_token, cluster_domain)
 
         for subscription_type in SubscriptionType:
             subscription_webhook_details = SUBSCRIPTON_WEBHOOK_DETAILS_MAPPING[subscription_type]
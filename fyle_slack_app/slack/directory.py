@@ -0,0 +1,212 @@
+from typing import Dict, Union
+
+import math
+import time
+import uuid
+import zlib
+
+from slack_sdk.errors import SlackApiError
+from slack_sdk.web import WebClient
+
+from django.conf import settings
+from django.core.cache import cache
+
+from fyle_slack_app.libs.lru_cache import LRUCache
+from fyle_slack_app.libs.task_lanes import TaskLane, async_task
+
+
+SLACK_DIRECTORY_PAGE_SIZE = 200
+
+# Members stored per cache entry of a directory, an entry is read for each member resolved from it
+SLACK_DIRECTORY_CHUNK_SIZE = 1000
+
+# Seconds a queued load holds off other loads of the directory, a load that failed is queued again after it
+SLACK_DIRECTORY_REFRESH_LOCK_TIMEOUT = 600
+
+# Seconds members looked up by email (found or not) are kept while the directory isn't loaded
+SLACK_MEMBER_LOOKUP_TIMEOUT = 300
+
+# Slack user ids of this process keyed by team and email, an empty id when the email isn't of a member
+# Kept for a minute so members updated through other processes are picked up
+_slack_members = LRUCache(max_size=10000, timeout=60)
+
+
+def get_slack_user_id(slack_client: WebClient, email: str) -> Union[str, None]:
+    '''
+        Returns the Slack user id of the workspace member with `email`, None if no member has it.
+
+        Members are resolved from the team's directory, stored as chunks of members keyed by email, so once
+        it is loaded neither members nor emails missing from the workspace need a call to Slack.
+        Until then (a load is scheduled) the member is looked up by email, and the answer kept for a few minutes.
+    '''
+    team_id = slack_client.team_id
+    member_key = get_member_key(team_id, email.lower())
+
+    slack_user_id = _slack_members.get(member_key)
+
+    if slack_user_id is None:
+        directory = get_slack_directory(team_id)
+
+        if directory is not None and directory['loaded_at'] + settings.SLACK_DIRECTORY_REFRESH_INTERVAL <= time.time():
+            schedule_slack_directory_refresh(team_id)
+
+        members = get_directory_chunk(team_id, directory, email.lower()) if directory is not None else None
+
+        if members is None:
+            # An evicted chunk is looked up like a directory that isn't loaded
+            schedule_slack_directory_refresh(team_id)
+
+            slack_user_id = cache.get(member_key)
+            if slack_user_id is None:
+                slack_user_id = lookup_slack_member(slack_client, member_key, email)
+
+        else:
+            # Every member of a loaded directory has their email stored
+            slack_user_id = members.get(email.lower(), '')
+
+        _slack_members.set(member_key, slack_user_id)
+
+    return slack_user_id or None
+
+
+def lookup_slack_member(slack_client: WebClient, member_key: str, email: str) -> str:
+    try:
+        slack_user_id = slack_client.users_lookupByEmail(email=email)['user']['id']
+    except SlackApiError as error:
+        if error.response['error'] != 'users_not_found':
+            raise
+        slack_user_id = ''
+
+    cache.set(member_key, slack_user_id, SLACK_MEMBER_LOOKUP_TIMEOUT)
+
+    return slack_user_id
+
+
+def get_slack_directory(team_id: str) -> Union[Dict, None]:
+    return cache.get(get_directory_key(team_id))
+
+
+def get_directory_chunk(team_id: str, directory: Dict, email: str) -> Union[Dict, None]:
+    return cache.get(get_chunk_key(team_id, directory, email))
+
+
+def schedule_slack_directory_refresh(team_id: str) -> None:
+    refresh_lock_key = '{}.refreshing'.format(get_directory_key(team_id))
+
+    # Only one load of a directory is queued at a time
+    if cache.add(refresh_lock_key, True, SLACK_DIRECTORY_REFRESH_LOCK_TIMEOUT):
+        async_task(
+            TaskLane.BULK,
+            'fyle_slack_app.slack.events.tasks.refresh_slack_directory',
+            team_id
+        )
+
+
+def load_slack_directory(slack_client: WebClient) -> None:
+    '''
+        Stores the Slack user id of each of the workspace's members by email, paging through `users.list`.
+    '''
+    directory_key = get_directory_key(slack_client.team_id)
+
+    try:
+        store_slack_directory(slack_client, directory_key)
+    finally:
+        cache.delete('{}.refreshing'.format(directory_key))
+
+
+def store_slack_directory(slack_client: WebClient, directory_key: str) -> None:
+    # Members changed while the list is being fetched are picked up by the next load
+    loaded_at = time.time()
+
+    members = {}
+    cursor = None
+
+    while True:
+        slack_workspace_users = slack_client.users_list(limit=SLACK_DIRECTORY_PAGE_SIZE, cursor=cursor)
+
+        for workspace_user in slack_workspace_users['members']:
+            email = get_member_email(workspace_user)
+            if email is not None:
+                members[email] = workspace_user['id']
+
+        cursor = slack_workspace_users.get('response_metadata', {}).get('next_cursor')
+        if not cursor:
+            break
+
+    # Chunks of a load are keyed by its id, so lookups keep reading the previous load's chunks until it is replaced
+    directory = {
+        'loaded_at': loaded_at,
+        'load_id': uuid.uuid4().hex,
+        'chunk_count': max(1, math.ceil(len(members) / SLACK_DIRECTORY_CHUNK_SIZE))
+    }
+
+    chunks = {get_chunk_key(slack_client.team_id, directory, chunk_index=index): {} for index in range(directory['chunk_count'])}
+    for email, slack_user_id in members.items():
+        chunks[get_chunk_key(slack_client.team_id, directory, email)][email] = slack_user_id
+
+    cache.set_many(chunks, settings.SLACK_DIRECTORY_CACHE_TIMEOUT)
+    cache.set(directory_key, directory, settings.SLACK_DIRECTORY_CACHE_TIMEOUT)
+
+
+def update_slack_directory_member(team_id: str, workspace_user: Dict) -> None:
+    '''
+        Applies a `team_join` / `user_change` event to the member's entry of the team's directory.
+
+        A member who changed their email keeps resolving from their previous one until the directory is loaded again,
+        the event doesn't tell which email they had.
+    '''
+    email = workspace_user.get('profile', {}).get('email')
+
+    if not email:
+        return
+
+    email = email.lower()
+    member_key = get_member_key(team_id, email)
+
+    directory = get_slack_directory(team_id)
+
+    if directory is not None:
+        chunk_key = get_chunk_key(team_id, directory, email)
+        members = cache.get(chunk_key)
+
+        if members is not None:
+            if get_member_email(workspace_user) is None:
+                members.pop(email, None)
+            else:
+                members[email] = workspace_user['id']
+
+            cache.set(chunk_key, members, settings.SLACK_DIRECTORY_CACHE_TIMEOUT)
+
+    # Lookups made while the directory isn't loaded are asked again
+    cache.delete(member_key)
+    _slack_members.delete(member_key)
+
+
+def invalidate_slack_directory(team_id: str) -> None:
+    # Entries of members are left to expire, they are looked up again until the directory is loaded
+    cache.delete(get_directory_key(team_id))
+
+
+def get_member_email(workspace_user: Dict) -> Union[str, None]:
+    # Deactivated members and bots aren't resolved, notifications about them fall back to their name
+    if workspace_user.get('deleted') is True or workspace_user.get('is_bot') is True:
+        return None
+
+    email = workspace_user.get('profile', {}).get('email')
+
+    return email.lower() if email else None
+
+
+def get_directory_key(team_id: str) -> str:
+    return '{}.slack_directory'.format(team_id)
+
+
+def get_chunk_key(team_id: str, directory: Dict, email: str = None, chunk_index: int = None) -> str:
+    if chunk_index is None:
+        chunk_index = zlib.crc32(email.encode()) % directory['chunk_count']
+
+    return '{}.{}.{}'.format(get_directory_key(team_id), directory['load_id'], chunk_index)
+
+
+def get_member_key(team_id: str, email: str) -> str:
+    return '{}.{}.slack_member'.format(team_id, email)
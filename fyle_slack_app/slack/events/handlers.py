@@ -8,14 +8,14 @@ from django.http import JsonResponse
 from django.utils import timezone
 from django.core.cache import cache
 from django.conf import settings
-from django_q.tasks import schedule, async_task
 from django_q.models import Schedule
 
-from fyle_slack_app.models import User
-from fyle_slack_app.fyle.utils import get_fyle_oauth_url, get_fyle_profile, get_fyle_sdk_connection
+from fyle_slack_app.models import Team, User
+from fyle_slack_app.fyle.utils import get_fyle_oauth_url, get_fyle_profile, get_fyle_sdk_connection, get_user_cluster_domain
 from fyle_slack_app.libs import utils, assertions, logger
+from fyle_slack_app.libs.task_lanes import TaskLane, async_task, schedule
 from fyle_slack_app.slack.ui.dashboard import messages
-from fyle_slack_app.slack import utils as slack_utils
+from fyle_slack_app.slack import directory as slack_directory, utils as slack_utils
 
 
 logger = logger.get_logger(__name__)
@@ -28,6 +28,7 @@ class SlackEventHandler:
     def _initialize_event_callback_handlers(self):
         self._event_callback_handlers = {
             'team_join': self.handle_new_user_joined,
+            'user_change': self.handle_user_changed,
             'app_home_opened': self.handle_app_home_opened,
             'app_uninstalled': self.handle_app_uninstalled,
             'file_shared': self.handle_file_shared
@@ -56,8 +57,13 @@ class SlackEventHandler:
 
     def handle_app_uninstalled(self, slack_payload: Dict, team_id: str) -> JsonResponse:
 
+        # Marking the team as being uninstalled, a reinstall clears the mark and stops the teardown
+        # Updates skip save signals, the team's client and routes are still needed while it is torn down
+        Team.objects.filter(id=team_id, uninstalled_at__isnull=True).update(uninstalled_at=timezone.now(), updated_at=timezone.now())
+
         # Deleting team details in background task
         async_task(
+            TaskLane.BULK,
             'fyle_slack_app.slack.events.tasks.uninstall_app',
             team_id
         )
@@ -72,7 +78,11 @@ class SlackEventHandler:
 
     def handle_new_user_joined(self, slack_payload: Dict, team_id: str) -> None:
         user_id = slack_payload['event']['user']['id']
-        schedule('fyle_slack_app.slack.events.tasks.new_user_joined_pre_auth_message',
+
+        slack_directory.update_slack_directory_member(team_id, slack_payload['event']['user'])
+
+        schedule(TaskLane.BULK,
+                 'fyle_slack_app.slack.events.tasks.new_user_joined_pre_auth_message',
                  user_id,
                  team_id,
                  schedule_type=Schedule.ONCE,
@@ -80,6 +90,12 @@ class SlackEventHandler:
                 )
 
 
+    def handle_user_changed(self, slack_payload: Dict, team_id: str) -> JsonResponse:
+        slack_directory.update_slack_directory_member(team_id, slack_payload['event']['user'])
+
+        return JsonResponse({}, status=200)
+
+
     def handle_app_home_opened(self, slack_payload: Dict, team_id: str) -> JsonResponse:
         user_id = slack_payload['event']['user']
         user = utils.get_or_none(User, slack_user_id=user_id)
@@ -88,8 +104,9 @@ class SlackEventHandler:
 
         # User is not present i.e. user hasn't done Fyle authorization
         if user is not None:
-            platform = get_fyle_sdk_connection(user.fyle_refresh_token)
-            spender_profile = get_fyle_profile(user.fyle_refresh_token)
+            cluster_domain = get_user_cluster_domain(user)
+            platform = get_fyle_sdk_connection(user.fyle_refresh_token, cluster_domain)
+            spender_profile = get_fyle_profile(user.fyle_refresh_token, cluster_domain)
             home_currency = spender_profile['org']['currency']
             sent_back_reports, draft_reports = self.get_sent_back_and_draft_reports(platform, user_id)
             unreported_expenses, incomplete_expenses = self.get_unreported_and_incomplete_expenses(platform, user_id)
@@ -119,6 +136,7 @@ class SlackEventHandler:
         user_id = slack_payload['event']['user_id']
 
         async_task(
+            TaskLane.INTERACTIVE,
             'fyle_slack_app.slack.events.tasks.handle_file_shared',
             file_id,
             user_id,
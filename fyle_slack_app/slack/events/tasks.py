@@ -1,17 +1,24 @@
 import base64
-from typing import Dict, Union
+from typing import Dict, List, Union
+from concurrent import futures
+from datetime import timedelta
 from slack_sdk import WebClient
 
 from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
 from fyle_slack_app.fyle.expenses.views import FyleExpense
 
 from fyle_slack_app.fyle.utils import get_fyle_oauth_url
 from fyle_slack_app.libs import utils, assertions, logger
-from fyle_slack_app.models import Team, User, UserSubscriptionDetail
+from fyle_slack_app.libs.task_lanes import TaskLane, async_task
+from fyle_slack_app.models import Team, User, NotificationPreference, NotificationDigestEvent, ReportPollingDetail, UserSubscriptionDetail, \
+    UserFeedback, UserFeedbackResponse
 from fyle_slack_app.models.user_subscription_details import SubscriptionType
 from fyle_slack_app.fyle import utils as fyle_utils
+from fyle_slack_app.fyle.notifications import routing
 from fyle_slack_app.slack.interactives.block_action_handlers import BlockActionHandler
-from fyle_slack_app.slack import utils as slack_utils
+from fyle_slack_app.slack import directory as slack_directory, utils as slack_utils
 from fyle_slack_app.slack.ui.authorization import messages
 from fyle_slack_app.slack.ui.expenses import messages as expense_messages
 from fyle_slack_app.slack.ui import common_messages
@@ -30,6 +37,10 @@ SUBSCRIPTON_WEBHOOK_DETAILS_MAPPING = {
     }
 }
 
+# Rows deleted along with the users and feedbacks kept without them, every relation of `User` is one of these
+USER_DELETED_RELATIONS = [NotificationPreference, NotificationDigestEvent, ReportPollingDetail, UserSubscriptionDetail]
+USER_NULLED_RELATIONS = [UserFeedback, UserFeedbackResponse]
+
 
 def new_user_joined_pre_auth_message(user_id: str, team_id: str) -> None:
     # Check if the user has already authorized Fyle account
@@ -37,10 +48,7 @@ def new_user_joined_pre_auth_message(user_id: str, team_id: str) -> None:
     user = utils.get_or_none(User, slack_user_id=user_id)
 
     if user is None:
-        team = utils.get_or_none(Team, id=team_id)
-        assertions.assert_found(team, 'Slack team not registered')
-
-        slack_client = WebClient(token=team.bot_access_token)
+        slack_client = slack_utils.get_slack_client(team_id)
 
         user_info = slack_client.users_info(user=user_id)
         assertions.assert_good(user_info['ok'] is True)
@@ -59,50 +67,174 @@ def new_user_joined_pre_auth_message(user_id: str, team_id: str) -> None:
             )
 
 
-def uninstall_app(team_id: str) -> None:
+def refresh_slack_directory(team_id: str) -> None:
+    slack_client = slack_utils.get_slack_client(team_id)
+    slack_directory.load_slack_directory(slack_client)
+
+
+def uninstall_app(team_id: str, attempt: int = 1, failed_slack_user_ids: List[str] = None) -> None:
+    '''
+        Disables the Fyle subscriptions of the team's users and deletes the team, a batch of users per task.
+
+        Users are deleted as soon as their subscriptions are disabled, so a teardown which crashed or timed out
+        is resumed by `resume_app_uninstalls` with only the users left.
+        Users whose subscriptions couldn't be disabled are kept and skipped by the following batches, then retried
+        by another pass over the team, up to `SLACK_UNINSTALL_ATTEMPTS` passes after which they are deleted anyway.
+        The teardown stops once the team is no longer being uninstalled, i.e. the app got reinstalled meanwhile.
+    '''
+    failed_slack_user_ids = failed_slack_user_ids or []
+
     team = utils.get_or_none(Team, id=team_id)
 
-    if team is not None:
+    if team is None or team.uninstalled_at is None:
+        return
+
+    # Updates skip save signals, the team's client and routes are still needed while it is torn down
+    Team.objects.filter(id=team_id, uninstalled_at__isnull=False).update(updated_at=timezone.now())
+
+    users = list(
+        User.objects.filter(slack_team_id=team_id).exclude(slack_user_id__in=failed_slack_user_ids).order_by('slack_user_id')[:settings.SLACK_UNINSTALL_BATCH_SIZE]
+    )
+
+    subscription_details = {}
+    for subscription_detail in UserSubscriptionDetail.objects.filter(slack_user_id__in=[user.slack_user_id for user in users]):
+        subscription_details.setdefault(subscription_detail.slack_user_id, []).append(subscription_detail)
+
+    failed_users = disable_users_subscriptions(users, subscription_details)
+
+    if failed_users and attempt >= settings.SLACK_UNINSTALL_ATTEMPTS:
+        # Subscriptions which can't be disabled are left to Fyle, their webhooks find no subscription here
+        logger.error('Deleting users of team %s whose subscriptions could not be disabled: %s', team_id, [user.fyle_user_id for user in failed_users])
+        failed_users = []
+
+    deleted_users = [user for user in users if user not in failed_users]
+    failed_slack_user_ids = failed_slack_user_ids + [user.slack_user_id for user in failed_users]
+
+    is_last_batch = len(users) < settings.SLACK_UNINSTALL_BATCH_SIZE
+
+    with transaction.atomic():
+        # Locking the team so a reinstall waits for the batch, and the batch isn't deleted if a reinstall came first
+        if not Team.objects.select_for_update().filter(id=team_id, uninstalled_at__isnull=False).exists():
+            logger.info('Uninstall of team %s stopped, the app got reinstalled', team_id)
+            return
+
+        webhook_ids = [subscription_detail.webhook_id for user in deleted_users for subscription_detail in subscription_details.get(user.slack_user_id, [])]
+        delete_users(deleted_users, webhook_ids)
+
+        if is_last_batch is True and not failed_slack_user_ids:
+            # Deleting team :)
+            team.delete()
+
+    if is_last_batch is False:
+        async_task(TaskLane.BULK, 'fyle_slack_app.slack.events.tasks.uninstall_app', team_id, attempt, failed_slack_user_ids)
+    elif failed_slack_user_ids:
+        async_task(TaskLane.BULK, 'fyle_slack_app.slack.events.tasks.uninstall_app', team_id, attempt + 1)
 
-        users = User.objects.filter(slack_team_id=team_id)
 
-        # Disabling subscription for users in the team
-        for user in users:
-            access_token = fyle_utils.get_fyle_access_token(user.fyle_refresh_token)
-            cluster_domain = fyle_utils.get_cluster_domain(user.fyle_refresh_token)
+def disable_users_subscriptions(users: List[User], subscription_details: Dict[str, List[UserSubscriptionDetail]]) -> List[User]:
+    '''
+        Disables the Fyle subscriptions of `users`, returns the users whose subscriptions couldn't be disabled.
+    '''
+    failed_users = []
 
-            fyle_profile = fyle_utils.get_fyle_profile(user.fyle_refresh_token)
+    # Cluster domains missing on users linked before they were stored are looked up (and stored) here, outside the threads
+    cluster_users = {}
+    for user in users:
+        try:
+            cluster_domain = fyle_utils.get_user_cluster_domain(user)
+        # pylint: disable=broad-except
+        except Exception as error:
+            logger.error('Error while fetching cluster domain of user: %s - %s', user.fyle_user_id, error)
+            failed_users.append(user)
+            continue
+
+        cluster_users.setdefault(cluster_domain, []).append(user)
+
+    # Users are queued cluster by cluster, so calls to a cluster share its pooled connections
+    with futures.ThreadPoolExecutor(max_workers=settings.SLACK_UNINSTALL_CONCURRENCY) as executor:
+        disabled_subscriptions = {
+            executor.submit(disable_user_subscriptions, user, cluster_domain, subscription_details.get(user.slack_user_id, [])): user
+            for cluster_domain, users_of_cluster in cluster_users.items()
+            for user in users_of_cluster
+        }
+
+    for disabled_subscription, user in disabled_subscriptions.items():
+        if disabled_subscription.result() is False:
+            failed_users.append(user)
+
+    return failed_users
+
+
+def delete_users(users: List[User], webhook_ids: List[str]) -> None:
+    '''
+        Deletes users along with the rows referencing them. A cascaded delete sends delete signals for every
+        preference and subscription of the users, so rows are deleted in bulk per model and the caches kept by
+        those signals are invalidated once for all the users, `webhook_ids` being the webhooks of their subscriptions.
+    '''
+    if not users:
+        return
+
+    slack_user_ids = tuple(user.slack_user_id for user in users)
+
+    for model in USER_NULLED_RELATIONS:
+        model.objects.filter(user__in=slack_user_ids).update(user=None)
+
+    with connection.cursor() as cursor:
+        for model in USER_DELETED_RELATIONS + [User]:
+            # pylint: disable=protected-access
+            cursor.execute('DELETE FROM {} WHERE slack_user_id IN %s'.format(model._meta.db_table), [slack_user_ids])
+
+    for user in users:
+        fyle_utils.invalidate_fyle_sdk_connection(user.fyle_refresh_token)
+
+    routing.invalidate_webhook_routes(webhook_ids)
+
+
+def disable_user_subscriptions(user: User, cluster_domain: str, subscription_details: List[UserSubscriptionDetail]) -> bool:
+    if not subscription_details:
+        return True
+
+    try:
+        access_token = fyle_utils.get_fyle_access_token(user.fyle_refresh_token)
+
+        for subscription_detail in subscription_details:
+            subscription_type = SubscriptionType(subscription_detail.subscription_type)
+            subscription_webhook_details = SUBSCRIPTON_WEBHOOK_DETAILS_MAPPING[subscription_type]
+
+            webhook_url = '{}/{}'.format(subscription_webhook_details['webhook_url'], subscription_detail.webhook_id)
+
+            subscription_payload = {}
+            subscription_payload['data'] = {
+                'id': subscription_detail.subscription_id,
+                'webhook_url': webhook_url,
+                'is_enabled': False
+            }
 
-            for subscription_type in SubscriptionType:
-                subscription_webhook_details = SUBSCRIPTON_WEBHOOK_DETAILS_MAPPING[subscription_type]
+            subscription = fyle_utils.upsert_fyle_subscription(cluster_domain, access_token, subscription_payload, subscription_type)
 
-                subscription_role_required = subscription_webhook_details['role_required']
+            if subscription.status_code != 200:
+                logger.error('Error while disabling %s subscription for user: %s ', subscription_webhook_details['role_required'], user.fyle_user_id)
+                return False
 
-                if subscription_role_required in fyle_profile['roles']:
-                    fyle_user_id = user.fyle_user_id
+    # pylint: disable=broad-except
+    except Exception as error:
+        logger.error('Error while disabling subscriptions for user: %s - %s', user.fyle_user_id, error)
+        return False
 
-                    subscription_detail = UserSubscriptionDetail.objects.get(
-                        slack_user_id=user.slack_user_id,
-                        subscription_type=subscription_type.value
-                    )
+    return True
 
-                    webhook_url = subscription_webhook_details['webhook_url']
-                    webhook_url = '{}/{}'.format(webhook_url, subscription_detail.webhook_id)
 
-                    subscription_payload = {}
-                    subscription_payload['data'] = {
-                        'id': subscription_detail.subscription_id,
-                        'webhook_url': webhook_url,
-                        'is_enabled': False
-                    }
+def resume_app_uninstalls() -> None:
+    # Uninstalls touch their team after every batch, one which hasn't for a while is no longer running
+    stale_before = timezone.now() - timedelta(seconds=settings.SLACK_UNINSTALL_STALE_TIMEOUT)
 
-                    subscription = fyle_utils.upsert_fyle_subscription(cluster_domain, access_token, subscription_payload, subscription_type)
+    for team_id in Team.objects.filter(uninstalled_at__isnull=False, updated_at__lt=stale_before).values_list('id', flat=True):
+        logger.info('Resuming uninstall of team %s', team_id)
 
-                    if subscription.status_code != 200:
-                        logger.error('Error while disabling %s subscription for user: %s ', subscription_role_required, fyle_user_id)
+        # Touching the team so it isn't queued again while the resumed task runs
+        Team.objects.filter(id=team_id).update(updated_at=timezone.now())
 
-        # Deleting team :)
-        team.delete()
+        async_task(TaskLane.BULK, 'fyle_slack_app.slack.events.tasks.uninstall_app', team_id)
 
 
 def handle_file_shared(file_id: str, user_id: str, team_id: str):
@@ -156,7 +288,8 @@ def handle_file_shared(file_id: str, user_id: str, team_id: str):
             }
         }
         try:
-            expense = fyle_utils.extract_expense_from_receipt(receipt_payload, user.fyle_refresh_token)
+            cluster_domain = fyle_utils.get_user_cluster_domain(user)
+            expense = fyle_utils.extract_expense_from_receipt(receipt_payload, user.fyle_refresh_token, cluster_domain)
             view_expense_message = expense_messages.view_expense_message(expense, user)
             slack_client.chat_postMessage(channel=user.slack_dm_channel_id, blocks=view_expense_message, thread_ts=message_ts, reply_broadcast=True)
         except assertions.InvalidUsage:
@@ -202,10 +335,11 @@ def handle_upload_and_attach_receipt(slack_client: WebClient, user: User, file_i
     }
 
     try:
-        receipt = fyle_utils.create_receipt(receipt_payload, user.fyle_refresh_token)
-        receipt_urls = fyle_utils.generate_receipt_url(receipt['id'], user.fyle_refresh_token)
+        cluster_domain = fyle_utils.get_user_cluster_domain(user)
+        receipt = fyle_utils.create_receipt(receipt_payload, user.fyle_refresh_token, cluster_domain)
+        receipt_urls = fyle_utils.generate_receipt_url(receipt['id'], user.fyle_refresh_token, cluster_domain)
         fyle_utils.upload_file_to_s3(receipt_urls['upload_url'], file_content, receipt_urls['content_type'])
-        fyle_utils.attach_receipt_to_expense(expense_id, receipt['id'], user.fyle_refresh_token)
+        fyle_utils.attach_receipt_to_expense(expense_id, receipt['id'], user.fyle_refresh_token, cluster_domain)
 
         # Update slack thread message as well as the parent message accordingly
         file_attached_update_in_slack(user, slack_client, expense_id, parent_message, message_ts, thread_ts)
@@ -2,16 +2,17 @@ from typing import Callable, Dict
 
 from django.core.cache import cache
 from django.http import JsonResponse
-from django_q.tasks import async_task
 
 from fyle_slack_app.fyle.expenses.views import FyleExpense
-from fyle_slack_app.models.notification_preferences import NotificationType
+from fyle_slack_app.models.notification_preferences import NotificationType, NON_DIGEST_NOTIFICATION_TYPES
 from fyle_slack_app.libs import assertions, utils, logger
+from fyle_slack_app.libs.task_lanes import TaskLane, async_task
 from fyle_slack_app.slack.utils import get_slack_client
 from fyle_slack_app.slack.ui.expenses import messages as expense_messages
 from fyle_slack_app.models import User, NotificationPreference, UserFeedback
 from fyle_slack_app.slack.ui.feedbacks import messages as feedback_messages
 from fyle_slack_app.slack.ui.modals import messages as modal_messages
+from fyle_slack_app.slack.ui.notifications import messages as notification_messages
 from fyle_slack_app.slack.ui import common_messages
 from fyle_slack_app.slack import utils as slack_utils
 from fyle_slack_app import tracking
@@ -128,9 +129,14 @@ class BlockActionHandler:
         message_blocks = slack_payload['message']['blocks']
         is_approved_from_modal = slack_payload['is_approved_from_modal'] if 'is_approved_from_modal' in slack_payload else False
 
+        # Approval notifications can be part of a digest, only the blocks of this report are updated
+        notification_start, notification_end = notification_messages.get_notification_blocks_range(message_blocks, report_id)
+        notification_message = message_blocks[notification_start:notification_end]
+        is_digest_message = len(notification_message) < len(message_blocks)
+
         # Overriding the 'approve' cta text to 'approving'
         in_progress_message_block = common_messages.IN_PROGRESS_MESSAGE[slack_utils.AsyncOperation.APPROVING_REPORT.value]
-        message_blocks[3]['elements'][0] = in_progress_message_block
+        notification_message[3]['elements'][0] = in_progress_message_block
 
         slack_client = slack_utils.get_slack_client(team_id)
         user_dm_channel_id = slack_utils.get_slack_user_dm_channel_id(slack_client, user_id)
@@ -141,13 +147,15 @@ class BlockActionHandler:
         )
 
         async_task(
+            TaskLane.INTERACTIVE,
             'fyle_slack_app.fyle.report_approvals.tasks.process_report_approval',
             report_id,
             user_id,
             team_id,
             message_ts,
-            message_blocks,
-            is_approved_from_modal
+            notification_message,
+            is_approved_from_modal,
+            is_digest_message=is_digest_message
         )
 
         return JsonResponse({}, status=200)
@@ -171,12 +179,14 @@ class BlockActionHandler:
             'expense_mandatory_receipt_missing_notification_preference': NotificationType.EXPENSE_MATCHED.value
         }
 
-        is_enabled = True if value == 'enable' else False
-
         notification_type = ACTION_NOTIFICATION_PREFERENCE_MAPPING[action_id]
 
+        is_enabled = True if value in ['enable', 'digest'] else False
+        is_digest_enabled = True if value == 'digest' and notification_type not in NON_DIGEST_NOTIFICATION_TYPES else False
+
         notification_preference = NotificationPreference.objects.get(slack_user_id=user_id, notification_type=notification_type)
         notification_preference.is_enabled = is_enabled
+        notification_preference.is_digest_enabled = is_digest_enabled
         notification_preference.save()
 
         return JsonResponse({}, status=200)
@@ -225,17 +235,12 @@ class BlockActionHandler:
                 'sub_project': project['sub_project']
         }
 
-        expense_form_details = {
-            'project': project
-        }
-
-        cache_key = '{}.form_metadata'.format(view_id)
-        form_metadata = cache.get(cache_key)
-        if form_metadata is None:
-            cache.set(cache_key, expense_form_details)
-        else:
-            form_metadata['project'] = project
-            cache.set(cache_key, form_metadata)
+        # Changes are stored in the order they are made, custom fields are shown again once a category is picked
+        FyleExpense.update_form_metadata(view_id, {
+            'project': project,
+            'category_id': None,
+            'custom_fields': None
+        })
 
         current_view = expense_messages.expense_form_loading_modal(title='Create Expense', loading_message='Loading the best expense form :zap:')
         current_view['submit'] = {'type': 'plain_text', 'text': 'Add Expense', 'emoji': True}
@@ -265,12 +270,14 @@ class BlockActionHandler:
         slack_client.views_update(view_id=view_id, view=current_view)
 
         async_task(
+            TaskLane.INTERACTIVE,
             'fyle_slack_app.slack.interactives.tasks.handle_project_selection',
             user,
             team_id,
             project,
-            view_id,
-            slack_payload
+            slack_payload,
+            view_id=view_id,
+            render_version=slack_utils.get_next_view_render_version(view_id, 'project')
         )
 
         return JsonResponse({})
@@ -284,6 +291,12 @@ class BlockActionHandler:
 
         user = utils.get_or_none(User, slack_user_id=user_id)
 
+        # Custom fields of the category are stored by the task once loaded
+        FyleExpense.update_form_metadata(view_id, {
+            'category_id': category_id,
+            'custom_fields': None
+        })
+
         current_view = expense_messages.expense_form_loading_modal(title='Create Expense', loading_message='Loading the best expense form :zap:')
         current_view['submit'] = {'type': 'plain_text', 'text': 'Add Expense', 'emoji': True}
 
@@ -312,12 +325,14 @@ class BlockActionHandler:
         slack_client.views_update(view_id=view_id, view=current_view)
 
         async_task(
+            TaskLane.INTERACTIVE,
             'fyle_slack_app.slack.interactives.tasks.handle_category_selection',
             user,
             team_id,
             category_id,
-            view_id,
-            slack_payload
+            slack_payload,
+            view_id=view_id,
+            render_version=slack_utils.get_next_view_render_version(view_id, 'category')
         )
 
         return JsonResponse({}, status=200)
@@ -332,12 +347,15 @@ class BlockActionHandler:
         view_id = slack_payload['container']['view_id']
 
         async_task(
+            TaskLane.INTERACTIVE,
             'fyle_slack_app.slack.interactives.tasks.handle_currency_selection',
             user,
             selected_currency,
-            view_id,
             team_id,
-            slack_payload
+            slack_payload,
+            view_id=view_id,
+            # Currency and amount changes both render the amount in the home currency, from the latest of the two
+            render_version=slack_utils.get_next_view_render_version(view_id, 'amount')
         )
 
         return JsonResponse({})
@@ -352,12 +370,15 @@ class BlockActionHandler:
         view_id = slack_payload['container']['view_id']
 
         async_task(
+            TaskLane.INTERACTIVE,
             'fyle_slack_app.slack.interactives.tasks.handle_amount_entered',
             user,
             amount_entered,
-            view_id,
             team_id,
-            slack_payload
+            slack_payload,
+            view_id=view_id,
+            # Currency and amount changes both render the amount in the home currency, from the latest of the two
+            render_version=slack_utils.get_next_view_render_version(view_id, 'amount')
         )
 
         return JsonResponse({})
@@ -516,6 +537,7 @@ class BlockActionHandler:
         cache.set(cache_key, form_metadata)
 
         async_task(
+            TaskLane.INTERACTIVE,
             'fyle_slack_app.slack.interactives.tasks.handle_edit_expense',
             user,
             expense_id,
@@ -542,6 +564,7 @@ class BlockActionHandler:
         response = slack_client.views_open(view=loading_modal, trigger_id=slack_payload['trigger_id'])
 
         async_task(
+            TaskLane.INTERACTIVE,
             'fyle_slack_app.slack.interactives.tasks.handle_submit_report_dialog',
             user,
             team_id,
@@ -593,6 +616,7 @@ class BlockActionHandler:
         modal_view_id = modal['view']['id']
 
         async_task(
+            TaskLane.INTERACTIVE,
             'fyle_slack_app.slack.interactives.tasks.handle_fetching_of_report_and_its_expenses',
             user=user,
             team_id=team_id,
@@ -1,5 +1,10 @@
 from typing import Dict, List
 
+from functools import partial
+
+import requests
+
+from django.conf import settings
 from django.core.cache import cache
 from django.http import JsonResponse
 
@@ -7,12 +12,23 @@ from fyle_slack_service.sentry import Sentry
 
 from fyle_slack_app.models.users import User
 from fyle_slack_app.fyle.expenses.views import FyleExpense
-from fyle_slack_app.libs import logger, utils
+from fyle_slack_app.fyle.expenses import suggestion_index
+from fyle_slack_app.libs import currencies, http, logger, utils
+from fyle_slack_app.libs.lru_cache import LRUCache
 from fyle_slack_app.slack import utils as slack_utils
 
 
 logger = logger.get_logger(__name__)
 
+# Options last returned for a select of a view, keyed by view id and action id
+# Served (filtered by the entered text) when Fyle can't answer within the time budget
+_recent_options = LRUCache(max_size=1000, timeout=900)
+
+def is_category_of_project(project_id: int, category: Dict) -> bool:
+    # Categories not restricted to any project are available for every project
+    restricted_project_ids = category['restricted_project_ids']
+    return restricted_project_ids is None or project_id in restricted_project_ids
+
 
 class BlockSuggestionHandler:
 
@@ -60,13 +76,55 @@ class BlockSuggestionHandler:
 
         action_id = slack_payload['action_id']
 
-        handler = self._block_suggestion_handlers.get(action_id, self._handle_invalid_block_suggestions)
+        handler = self._block_suggestion_handlers.get(action_id)
+
+        if handler is None:
+            return self._handle_invalid_block_suggestions(slack_payload, user_id, team_id)
 
-        options = handler(slack_payload, user_id, team_id)
+        view_id = slack_payload.get('view', {}).get('id')
+        recent_options_key = (view_id, action_id)
+
+        # Every Fyle call of the suggestion, including token exchanges and retries, shares the time budget
+        try:
+            with http.deadline(settings.SLACK_BLOCK_SUGGESTION_TIME_BUDGET):
+                options = handler(slack_payload, user_id, team_id)
+        except requests.Timeout:
+            recent_options = _recent_options.get(recent_options_key) if view_id is not None else None
+            options = self.get_fallback_options(slack_payload, recent_options or [])
+
+            logger.warning('Block suggestion %s ran out of time budget, answered with %s fallback options', action_id, len(options))
+        else:
+            if view_id is not None:
+                _recent_options.set(recent_options_key, options)
 
         return JsonResponse({'options': options})
 
 
+    @staticmethod
+    def get_fallback_options(slack_payload: Dict, recent_options: List[Dict]) -> List[Dict]:
+        '''
+            Options for a suggestion Fyle couldn't answer in time,
+            the options last shown in the select which match the entered text.
+            Merchants not found can be entered as they are, so the entered text is offered for them.
+        '''
+        value_entered = slack_payload['value']
+
+        fallback_options = [
+            option for option in recent_options if value_entered.lower() in option['text']['text'].lower()
+        ]
+
+        if not fallback_options and slack_payload['action_id'] == 'merchant' and value_entered:
+            fallback_options = [{
+                'text': {
+                    'type': 'plain_text',
+                    'text': value_entered
+                },
+                'value': value_entered
+            }]
+
+        return fallback_options
+
+
     def handle_category_suggestion(self, slack_payload: Dict, user_id: str, team_id: str) -> List:
 
         user = utils.get_or_none(User, slack_user_id=user_id)
@@ -86,46 +144,52 @@ class BlockSuggestionHandler:
         cache_key = '{}.form_metadata'.format(slack_payload['view']['id'])
         form_metadata = cache.get(cache_key)
 
+        category_filter = None
+
         if form_metadata is not None:
             project = form_metadata.get('project')
             if project is not None:
                 category_query_params['restricted_project_ids'] = 'csn.[{}]'.format(project['id'])
+                category_filter = partial(is_category_of_project, int(project['id']))
+
+        suggested_categories = suggestion_index.search_suggestions(fyle_expense, 'category', category_value_entered, category_filter)
 
-        suggested_categories = fyle_expense.get_categories(category_query_params)
+        # Index isn't built yet for the org, querying Fyle
+        if suggested_categories is None:
+            suggested_categories = fyle_expense.get_categories(category_query_params)
+            suggested_categories = [
+                {'id': category['id'], 'name': category['display_name']} for category in suggested_categories['data']
+            ]
 
         category_options = []
-        if suggested_categories['count'] > 0:
-            for category in suggested_categories['data']:
+        for category in suggested_categories:
 
-                option = {
-                    'text': {
-                        'type': 'plain_text',
-                        'text': category['display_name']
-                    },
-                    'value': str(category['id']),
-                }
-                category_options.append(option)
+            option = {
+                'text': {
+                    'type': 'plain_text',
+                    'text': category['name']
+                },
+                'value': str(category['id']),
+            }
+            category_options.append(option)
 
         return category_options
 
 
     def handle_currency_suggestion(self, slack_payload: Dict, user_id: str, team_id: str) -> List:
 
-        currencies = FyleExpense.get_currencies()
-
         currency_value_entered = slack_payload['value']
 
         currency_options = []
-        for currency in currencies:
-            if currency.startswith(currency_value_entered.upper()):
-                option = {
-                    'text': {
-                        'type': 'plain_text',
-                        'text': currency
-                    },
-                    'value': currency,
-                }
-                currency_options.append(option)
+        for currency in currencies.get_currencies_by_prefix(currency_value_entered):
+            option = {
+                'text': {
+                    'type': 'plain_text',
+                    'text': currency
+                },
+                'value': currency,
+            }
+            currency_options.append(option)
 
         return currency_options
 
@@ -143,20 +207,27 @@ class BlockSuggestionHandler:
         }
 
         fyle_expense = FyleExpense(user)
-        suggested_projects = fyle_expense.get_projects(query_params)
+
+        suggested_projects = suggestion_index.search_suggestions(fyle_expense, 'project', project_value_entered)
+
+        # Index isn't built yet for the org, querying Fyle
+        if suggested_projects is None:
+            suggested_projects = fyle_expense.get_projects(query_params)
+            suggested_projects = [
+                {'id': project['id'], 'name': project['display_name']} for project in suggested_projects['data']
+            ]
 
         project_options = []
-        if suggested_projects['count'] > 0:
-            for project in suggested_projects['data']:
+        for project in suggested_projects:
 
-                option = {
-                    'text': {
-                        'type': 'plain_text',
-                        'text': project['display_name']
-                    },
-                    'value': str(project['id']),
-                }
-                project_options.append(option)
+            option = {
+                'text': {
+                    'type': 'plain_text',
+                    'text': project['name']
+                },
+                'value': str(project['id']),
+            }
+            project_options.append(option)
 
         return project_options
 
@@ -174,19 +245,26 @@ class BlockSuggestionHandler:
         }
 
         fyle_expense = FyleExpense(user)
-        suggested_cost_centers = fyle_expense.get_cost_centers(query_params)
+
+        suggested_cost_centers = suggestion_index.search_suggestions(fyle_expense, 'cost_center', cost_center_value_entered)
+
+        # Index isn't built yet for the org, querying Fyle
+        if suggested_cost_centers is None:
+            suggested_cost_centers = fyle_expense.get_cost_centers(query_params)
+            suggested_cost_centers = [
+                {'id': cost_center['id'], 'name': cost_center['name']} for cost_center in suggested_cost_centers['data']
+            ]
 
         cost_center_options = []
-        if suggested_cost_centers['count'] > 0:
-            for cost_center in suggested_cost_centers['data']:
-                option = {
-                    'text': {
-                        'type': 'plain_text',
-                        'text': cost_center['name']
-                    },
-                    'value': str(cost_center['id']),
-                }
-                cost_center_options.append(option)
+        for cost_center in suggested_cost_centers:
+            option = {
+                'text': {
+                    'type': 'plain_text',
+                    'text': cost_center['name']
+                },
+                'value': str(cost_center['id']),
+            }
+            cost_center_options.append(option)
 
         return cost_center_options
 
@@ -236,14 +314,7 @@ class BlockSuggestionHandler:
 
         fyle_expense = FyleExpense(user)
 
-        query_params = {
-            'offset': 0,
-            'limit': '10',
-            'order': 'email.asc',
-            'email': 'ilike.{}%'.format(user_value_entered),
-        }
-
-        suggested_users = fyle_expense.get_employees(query_params)
+        suggested_users = fyle_expense.get_employees_by_email_prefix(user_value_entered)
 
         user_options = []
         if suggested_users['count'] > 0:
@@ -292,10 +363,14 @@ class BlockSuggestionHandler:
         merchant_options = []
         fyle_expense = FyleExpense(user)
 
-        # Fetch all the options (choices) from Merchant expense field
+        # Fetch all the options (choices) from Merchant expense field, cached for the org
         merchants_expense_field = fyle_expense.get_merchants_expense_field()
         if merchants_expense_field['data'] and len(merchants_expense_field['data'][0]['options']) > 0:
-            suggested_merchants = merchants_expense_field['data'][0]['options']
+            suggested_merchants = suggestion_index.rank_suggestions(
+                merchants_expense_field['data'][0]['options'],
+                merchant_value_entered,
+                limit=100
+            )
 
         else:
             # Fetch the merchant list from merchants table in DB
@@ -38,73 +38,44 @@ def get_additional_currency_details(amount: int, home_currency: str, selected_cu
     return additional_currency_details
 
 
-def handle_project_selection(user: User, team_id: str, project: Dict, view_id: str, slack_payload: Dict) -> None:
-    slack_client = get_slack_client(team_id)
-    fyle_expense = FyleExpense(user)
-
-    current_expense_form_details = fyle_expense.get_current_expense_form_details(slack_payload, user)
-
-    cache_key = '{}.form_metadata'.format(slack_payload['view']['id'])
-    form_metadata = cache.get(cache_key)
+def handle_project_selection(user: User, team_id: str, project: Dict, slack_payload: Dict, *, view_id: str, render_version: str = None) -> None:
+    # The project (and the custom fields it clears) is stored when picked, the form only has to be rendered
+    render_expense_form(user, team_id, slack_payload, view_id=view_id, render_type='project', render_version=render_version)
 
-    # Removing custom fields when project is selected
-    current_expense_form_details['custom_fields'] = None
 
-    current_expense_form_details['selected_project'] = project
+def handle_category_selection(user: User, team_id: str, category_id: str, slack_payload: str, *, view_id: str, render_version: str = None) -> None:
 
-    current_ui_blocks = slack_payload['view']['blocks']
-
-    # Removing loading info from below project input element
-    project_loading_block_index = next((index for (index, d) in enumerate(current_ui_blocks) if d['block_id'] == 'project_loading_block'), None)
-    current_ui_blocks.pop(project_loading_block_index)
-
-    form_metadata['project'] = project
-
-    cache.set(cache_key, form_metadata)
-
-    new_expense_dialog_form = expense_messages.expense_dialog_form(
-        **current_expense_form_details
-    )
-
-    slack_client.views_update(view_id=view_id, view=new_expense_dialog_form)
-
-
-def handle_category_selection(user: User, team_id: str, category_id: str, view_id: str, slack_payload: str) -> None:
-
-    slack_client = get_slack_client(team_id)
+    # A newer category of this view is picked, its task renders the custom fields
+    if not slack_utils.is_latest_view_render(view_id, 'category', render_version):
+        return
 
     fyle_expense = FyleExpense(user)
 
     custom_fields = fyle_expense.get_custom_fields_by_category_id(category_id)
 
-    current_expense_form_details = fyle_expense.get_current_expense_form_details(slack_payload, user)
-
-    current_expense_form_details['custom_fields'] = custom_fields
-
-    current_ui_blocks = slack_payload['view']['blocks']
+    # Storing the custom fields only if neither another category nor a project was picked while they were loading
+    if not slack_utils.is_latest_view_render(view_id, 'category', render_version):
+        return
 
-    # Removing loading info from below category input element
-    category_loading_block_index = next((index for (index, d) in enumerate(current_ui_blocks) if d['block_id'] == 'category_loading_block'), None)
-    current_ui_blocks.pop(category_loading_block_index)
+    form_metadata = cache.get('{}.form_metadata'.format(view_id))
+    if form_metadata is not None and form_metadata.get('category_id') != category_id:
+        return
 
-    new_expense_dialog_form = expense_messages.expense_dialog_form(
-        **current_expense_form_details
-    )
+    FyleExpense.update_form_metadata(view_id, {'custom_fields': custom_fields})
 
-    slack_client.views_update(view_id=view_id, view=new_expense_dialog_form)
+    render_expense_form(user, team_id, slack_payload, view_id=view_id, render_type='category', render_version=render_version)
 
 
-def handle_currency_selection(user: User, selected_currency: str, view_id: str, team_id: str, slack_payload: str) -> None:
+def handle_currency_selection(user: User, selected_currency: str, team_id: str, slack_payload: str, *, view_id: str, render_version: str = None) -> None:
 
-    slack_client = get_slack_client(team_id)
+    # A newer change of the currency or amount of this view is queued, it renders the latest of both
+    if not slack_utils.is_latest_view_render(view_id, 'amount', render_version):
+        return
 
     fyle_expense = FyleExpense(user)
 
     current_expense_form_details = fyle_expense.get_current_expense_form_details(slack_payload, user)
 
-    cache_key = '{}.form_metadata'.format(slack_payload['view']['id'])
-    form_metadata = cache.get(cache_key)
-
     additional_currency_details = current_expense_form_details['additional_currency_details']
 
     home_currency = additional_currency_details['home_currency']
@@ -119,22 +90,14 @@ def handle_currency_selection(user: User, selected_currency: str, view_id: str,
         amount = form_current_state['NUMBER_default_field_amount_block']['claim_amount']['value']
         additional_currency_details = get_additional_currency_details(amount, home_currency, selected_currency, exchange_rate)
 
-    current_expense_form_details['additional_currency_details'] = additional_currency_details
-
-    form_metadata['additional_currency_details'] = additional_currency_details
-
-    cache.set(cache_key, form_metadata)
-
-    expense_form = expense_messages.expense_dialog_form(
-        **current_expense_form_details
-    )
+    store_additional_currency_details(user, team_id, slack_payload, additional_currency_details, view_id=view_id, render_version=render_version)
 
-    slack_client.views_update(view_id=view_id, view=expense_form)
 
+def handle_amount_entered(user: User, amount_entered: float, team_id: str, slack_payload: str, *, view_id: str, render_version: str = None) -> None:
 
-def handle_amount_entered(user: User, amount_entered: float, view_id: str, team_id: str, slack_payload: str) -> None:
-
-    slack_client = get_slack_client(team_id)
+    # A newer change of the currency or amount of this view is queued, it renders the latest of both
+    if not slack_utils.is_latest_view_render(view_id, 'amount', render_version):
+        return
 
     fyle_expense = FyleExpense(user)
 
@@ -144,25 +107,41 @@ def handle_amount_entered(user: User, amount_entered: float, view_id: str, team_
 
     current_expense_form_details = fyle_expense.get_current_expense_form_details(slack_payload, user)
 
-    cache_key = '{}.form_metadata'.format(slack_payload['view']['id'])
-    form_metadata = cache.get(cache_key)
-
     home_currency = current_expense_form_details['additional_currency_details']['home_currency']
 
     exchange_rate = fyle_expense.get_exchange_rate(selected_currency, home_currency)
 
     additional_currency_details = get_additional_currency_details(amount_entered, home_currency, selected_currency, exchange_rate)
 
-    current_expense_form_details['additional_currency_details'] = additional_currency_details
+    store_additional_currency_details(user, team_id, slack_payload, additional_currency_details, view_id=view_id, render_version=render_version)
 
-    form_metadata['additional_currency_details'] = additional_currency_details
 
-    cache.set(cache_key, form_metadata)
+def store_additional_currency_details(user: User, team_id: str, slack_payload: Dict, additional_currency_details: Dict, *, view_id: str, render_version: str = None) -> None:
+    # Storing only if no newer currency or amount came in while this one was being processed
+    if not slack_utils.is_latest_view_render(view_id, 'amount', render_version):
+        return
+
+    FyleExpense.update_form_metadata(view_id, {'additional_currency_details': additional_currency_details})
+
+    render_expense_form(user, team_id, slack_payload, view_id=view_id, render_type='amount', render_version=render_version)
+
+
+def render_expense_form(user: User, team_id: str, slack_payload: Dict, *, view_id: str, render_type: str, render_version: str = None) -> None:
+    '''
+        Renders the expense form of a view with every change stored in its form metadata,
+        including those of other types of renders which are still in progress or were rendered before.
+    '''
+    if not slack_utils.is_latest_view_render(view_id, render_type, render_version):
+        return
+
+    current_expense_form_details = FyleExpense.get_current_expense_form_details(slack_payload, user)
 
     expense_form = expense_messages.expense_dialog_form(
         **current_expense_form_details
     )
 
+    slack_client = get_slack_client(team_id)
+
     slack_client.views_update(view_id=view_id, view=expense_form)
 
 
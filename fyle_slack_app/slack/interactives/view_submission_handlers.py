@@ -6,12 +6,12 @@ from dateutil.parser import parse
 from django.http.response import JsonResponse
 from django.core.cache import cache
 
-from django_q.tasks import async_task
 
 from fyle_slack_app.fyle.expenses.views import FyleExpense
 from fyle_slack_app.models import User
 from fyle_slack_app.slack import utils as slack_utils
 from fyle_slack_app.libs import utils
+from fyle_slack_app.libs.task_lanes import TaskLane, async_task
 from fyle_slack_app.slack.ui.expenses import messages as expense_messages
 from fyle_slack_app.slack.interactives.block_action_handlers import BlockActionHandler
 
@@ -87,6 +87,7 @@ class ViewSubmissionHandler:
             })
 
         async_task(
+            TaskLane.INTERACTIVE,
             'fyle_slack_app.slack.interactives.tasks.handle_upsert_expense',
             user,
             slack_payload['view']['id'],
@@ -150,6 +151,7 @@ class ViewSubmissionHandler:
         private_metadata = utils.decode_state(encoded_private_metadata)
 
         async_task(
+            TaskLane.INTERACTIVE,
             'fyle_slack_app.slack.interactives.tasks.handle_feedback_submission',
             user,
             team_id,
@@ -1,7 +1,7 @@
 from typing import Dict, List
 
 from fyle_slack_app.models import User
-from fyle_slack_app.libs import utils
+from fyle_slack_app.libs import currencies, utils
 
 from fyle_slack_app.fyle import utils as fyle_utils
 from fyle_slack_app.slack import utils as slack_utils
@@ -119,8 +119,10 @@ def get_report_section(report: Dict, report_url: str, private_metadata: str) ->
 def get_report_expenses_section(user: User, report_expenses: List[Dict]) -> List[Dict]:
     expense_section_blocks = []
 
+    display_amounts = currencies.format_amounts((expense['amount'], expense['currency']) for expense in report_expenses)
+
     # Iterate and append all report expenses to report_expenses_dialog message
-    for expense in report_expenses:
+    for expense, display_amount in zip(report_expenses, display_amounts):
 
         expense_block = [
             {
@@ -138,7 +140,6 @@ def get_report_expenses_section(user: User, report_expenses: List[Dict]) -> List
             expense_initial_text = 'An'
 
         expense_url = fyle_utils.get_fyle_resource_url(user.fyle_refresh_token, expense, 'EXPENSE')
-        display_amount = slack_utils.get_display_amount(expense['amount'], expense['currency'])
         expense_block_title = {
             'type': 'section',
             'text': {
@@ -1,4 +1,4 @@
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 from fyle_slack_app.libs import utils
 from fyle_slack_app.slack import utils as slack_utils
@@ -576,3 +576,53 @@ def get_expense_mandatory_receipt_missing_notification(expense: Dict, expense_ur
     card_expense_section_block.append(actions_block)
 
     return card_expense_section_block, title_text
+
+
+def get_notifications_digest(notifications: List[Tuple[List[Dict], str]], notifications_count: int) -> Tuple[List[Dict], str]:
+
+    title_text = ':bell: You have {} new notifications from Fyle'.format(notifications_count)
+
+    digest_section_block = [
+        {
+            'type': 'section',
+            'text': {
+                'type': 'mrkdwn',
+                'text': '*{}*'.format(title_text)
+            }
+        },
+        {
+            'type': 'divider'
+        }
+    ]
+
+    for notification_blocks, _ in notifications:
+        digest_section_block.extend(notification_blocks)
+        digest_section_block.append({
+            'type': 'divider'
+        })
+
+    return digest_section_block, title_text
+
+
+def get_notification_blocks_range(message_blocks: List[Dict], resource_id: str) -> Tuple[int, int]:
+    '''
+        Finds the blocks of a resource's notification in a message, which is either the notification itself
+        or a digest of notifications separated by dividers. The notification is found by its actions.
+    '''
+    actions_block_index = next(
+        (
+            index for index, block in enumerate(message_blocks)
+            if block['type'] == 'actions' and any(element.get('value') == resource_id for element in block['elements'])
+        ),
+        None
+    )
+
+    if actions_block_index is None:
+        return 0, len(message_blocks)
+
+    divider_indexes = [index for index, block in enumerate(message_blocks) if block['type'] == 'divider']
+
+    notification_start = max((index + 1 for index in divider_indexes if index < actions_block_index), default=0)
+    notification_end = min((index for index in divider_indexes if index > actions_block_index), default=len(message_blocks))
+
+    return notification_start, notification_end
@@ -1,6 +1,6 @@
 from typing import Dict, List
 
-from fyle_slack_app.models.notification_preferences import NotificationType
+from fyle_slack_app.models.notification_preferences import NotificationType, NON_DIGEST_NOTIFICATION_TYPES
 
 
 NOTIFICATION_TYPE_UI_DETAILS = {
@@ -119,8 +119,11 @@ NOTIFICATION_TYPE_UI_DETAILS = {
 }
 
 
-def get_notification_preference_option(is_enabled: bool) -> Dict:
-    option_text, option_value = ('Enable', 'enable') if is_enabled is True else ('Disable', 'disable')
+def get_notification_preference_option(is_enabled: bool, is_digest_enabled: bool = False) -> Dict:
+    if is_enabled is True and is_digest_enabled is True:
+        option_text, option_value = ('Enable as digest', 'digest')
+    else:
+        option_text, option_value = ('Enable', 'enable') if is_enabled is True else ('Disable', 'disable')
 
     option = {
         'text': {
@@ -176,9 +179,17 @@ def get_notification_preferences_blocks(notification_preferences: List[Dict], fy
                 disabled_notification_preference_option = get_notification_preference_option(False)
 
                 notification_type_ui['accessory']['options'].append(enabled_notification_preference_option)
+
+                if notification_preference['notification_type'] not in NON_DIGEST_NOTIFICATION_TYPES:
+                    digest_notification_preference_option = get_notification_preference_option(True, True)
+                    notification_type_ui['accessory']['options'].append(digest_notification_preference_option)
+
                 notification_type_ui['accessory']['options'].append(disabled_notification_preference_option)
 
-                notification_preference_initial_option = get_notification_preference_option(notification_preference['is_enabled'])
+                notification_preference_initial_option = get_notification_preference_option(
+                    notification_preference['is_enabled'],
+                    notification_preference.get('is_digest_enabled', False)
+                )
                 notification_type_ui['accessory']['initial_option'] = notification_preference_initial_option
 
                 notification_preferences_blocks.append(notification_type_ui)
@@ -1,17 +1,28 @@
 from typing import List, Dict, Union
 import enum
+import uuid
 # pylint: disable=import-error
 
 from slack_sdk.errors import SlackApiError
 from slack_sdk.web import WebClient
 
-from babel.numbers import get_currency_precision, get_currency_symbol
+from django.conf import settings
+from django.core.cache import cache
 
-from fyle_slack_app.libs import assertions, http, utils, logger
+from fyle_slack_app.libs import assertions, currencies, http, utils, logger
+from fyle_slack_app.libs.lru_cache import LRUCache
 from fyle_slack_app.models import Team, User
+from fyle_slack_app.slack import directory
+from fyle_slack_app.slack.web_client import FyleSlackWebClient
 
 logger = logger.get_logger(__name__)
 
+# Slack closes modals after an hour of inactivity, render versions aren't needed beyond that
+VIEW_RENDER_VERSION_TIMEOUT = 3600
+
+# Slack clients of this process keyed by team, dropped when the team is saved (reinstalled) or deleted (uninstalled)
+_slack_clients = LRUCache(max_size=settings.SLACK_CLIENT_CACHE_SIZE, idle_timeout=settings.SLACK_CLIENT_IDLE_TIMEOUT)
+
 
 class AsyncOperation(enum.Enum):
     UNLINKING_ACCOUNT = 'UNLINKING_ACCOUNT'
@@ -25,19 +36,66 @@ def get_slack_user_dm_channel_id(slack_client: WebClient, user_id: str) -> str:
 
 
 def get_slack_client(team_id: str) -> WebClient:
-    slack_team = utils.get_or_none(Team, id=team_id)
-    assertions.assert_found(slack_team, 'Slack team not registered')
-    return WebClient(token=slack_team.bot_access_token)
+    slack_client = _slack_clients.get(team_id)
+
+    if slack_client is None:
+        slack_team = utils.get_or_none(Team, id=team_id)
+        assertions.assert_found(slack_team, 'Slack team not registered')
+
+        slack_client = FyleSlackWebClient(token=slack_team.bot_access_token, team_id=slack_team.id)
+        _slack_clients.set(team_id, slack_client)
+
+    return slack_client
+
+
+def invalidate_slack_client(team_id: str) -> None:
+    _slack_clients.delete(team_id)
+
+
+def get_next_view_render_version(view_id: str, render_type: str) -> str:
+    '''
+        Returns a new render version for a re-render of a view of `render_type` (e.g. amount, category change).
+        Re-render tasks carry their version, so a task which isn't the latest of its type is dropped
+        instead of rendering a change which a newer task of the type will render anyway.
+
+        Renders of other types aren't superseded, the changes they make are merged in the form metadata of the view,
+        and each render shows all changes stored so far.
+        Versions are unique tokens which replace each other, incrementing a counter isn't atomic on the database cache.
+    '''
+    render_version = uuid.uuid4().hex
+
+    cache.set(get_view_render_version_key(view_id, render_type), render_version, VIEW_RENDER_VERSION_TIMEOUT)
+
+    return render_version
+
+
+def is_latest_view_render(view_id: str, render_type: str, render_version: str) -> bool:
+    if render_version is None:
+        return True
+
+    latest_render_version = cache.get(get_view_render_version_key(view_id, render_type))
+
+    return latest_render_version is None or latest_render_version == render_version
+
+
+def get_view_render_version_key(view_id: str, render_type: str) -> str:
+    return '{}.{}.render_version'.format(view_id, render_type)
 
 
 def get_user_display_name(slack_client: WebClient, user_details: Dict) -> str:
     try:
-        user_info = slack_client.users_lookupByEmail(email=user_details['email'])
-        user_display_name = '<@{}>'.format(user_info['user']['id'])
+        # Clients of a team resolve the member from the team's directory
+        if isinstance(slack_client, FyleSlackWebClient) and slack_client.team_id is not None:
+            slack_user_id = directory.get_slack_user_id(slack_client, user_details['email'])
+        else:
+            slack_user_id = slack_client.users_lookupByEmail(email=user_details['email'])['user']['id']
     except SlackApiError:
-        user_display_name = user_details['full_name']
+        slack_user_id = None
+
+    if slack_user_id is None:
+        return user_details['full_name']
 
-    return user_display_name
+    return '<@{}>'.format(slack_user_id)
 
 def get_file_content_from_slack(url: str, bot_access_token: str) -> str:
     headers = {
@@ -73,7 +131,7 @@ def round_amount(amount: float, currency: str) -> float:
         raise ValueError('Error while rounding amount: Currency is None!')
 
     # If given a currency that we could not find precision for, this function returns 2 as a default
-    precision = get_currency_precision(currency)
+    precision = currencies.get_currency_details(currency).precision
 
     # Round fails for cases like 2.665 and 2.675 both returns 2.67 so adding the 1e-9 helps in handling the precision issues
     # link https://docs.python.org/3/tutorial/floatingpoint.html#tut-fp-issues
@@ -97,14 +155,7 @@ def format_currency(currency: str) -> str:
     if currency is None:
         raise ValueError('Error while formatting currency: Currency is None!')
 
-    # If the currency doesn't have any symbol, the currency code is returned
-    currency_symbol = get_currency_symbol(currency)
-    is_currency_having_symbol = currency != currency_symbol
-
-    # Add a space to the currency, if the currency doesn't have any symbol
-    # Example, if currency is OMR, for amount 100 this will end up displaying OMR 100 instead of OMR100
-    formatted_currency = currency_symbol if is_currency_having_symbol else currency_symbol + ' '
-    return formatted_currency
+    return currencies.get_currency_details(currency).display_symbol
 
 
 def get_display_amount(amount: Union[str, int, float], currency: str) -> str:
@@ -126,35 +177,7 @@ def get_display_amount(amount: Union[str, int, float], currency: str) -> str:
     More info about iso4217 international standard for currencies - https://en.wikipedia.org/wiki/ISO_4217
     """
 
-    if amount is None:
-        raise ValueError('Error while formatting amount: Amount is None!')
-
-    # Convert and clean the amount, if it is a string
-    if isinstance(amount, str):
-        # An amount with '.' as the decimal separator and ',' as the thousand separator is expected for conversion to work properly
-        cleaned_amount = amount.replace(',', '')
-        amount = float(cleaned_amount)
-
-    # Sign to add at the beginning
-    sign = '-' if amount < 0 else ''
-    amount = abs(amount)
-
-    # Gets the currency precision and symbol for currency specified
-    formatted_currency = format_currency(currency)
-    currency_precision = get_currency_precision(currency)
-
-    # Create a format string and round the amount to currency precision
-    format_string = '{:,.' + str(currency_precision) + 'f}'
-
-    # Format fails for cases like 2.665 and 2.675 both returns 2.67 so adding the 1e-9 helps in handling the precision issues
-    # link https://docs.python.org/3/tutorial/floatingpoint.html#tut-fp-issues
-    formatted_amount = format_string.format(amount + 1e-9)
-    formatted_amount = f'{formatted_currency}{formatted_amount}'
-
-    # Finally, add the sign back to the formatted amount and return the result
-    formatted_amount = f'{sign}{formatted_amount}'
-
-    return formatted_amount
+    return currencies.format_amount(amount, currency)
 
 def get_slack_latest_parent_message(user: User, slack_client: WebClient, thread_ts: str) -> Dict:
     message_history = slack_client.conversations_history(channel=user.slack_dm_channel_id, latest=thread_ts, inclusive=True, limit=1)
@@ -0,0 +1,265 @@
+from typing import Any, Dict, Hashable, Iterator, Union
+
+import io
+import contextlib
+import threading
+import time
+
+from http.client import HTTPMessage
+from urllib.error import HTTPError, URLError
+from urllib.request import Request
+
+import requests
+
+from slack_sdk.errors import SlackApiError
+from slack_sdk.http_retry import HttpRequest, HttpResponse, RetryState
+from slack_sdk.http_retry.builtin_handlers import RateLimitErrorRetryHandler
+from slack_sdk.web import SlackResponse, WebClient
+
+from fyle_slack_app.libs import http, logger
+from fyle_slack_app.libs.lru_cache import LRUCache
+from fyle_slack_app.libs.rate_limit import TokenBucket
+from fyle_slack_app.models import Team
+
+
+logger = logger.get_logger(__name__)
+
+
+# Rate limit tier of the Slack methods we call, methods not listed here are treated as tier 3
+# https://api.slack.com/docs/rate-limits
+SLACK_METHOD_TIERS = {
+    'chat.postMessage': 'post_message',
+    'chat.postEphemeral': 'tier_4',
+    'chat.update': 'tier_3',
+    'conversations.history': 'tier_3',
+    'conversations.open': 'tier_3',
+    'files.info': 'tier_4',
+    'users.info': 'tier_4',
+    'users.list': 'tier_2',
+    'users.lookupByEmail': 'tier_3',
+    'views.open': 'tier_4',
+    'views.publish': 'tier_4',
+    'views.push': 'tier_4',
+    'views.update': 'tier_4'
+}
+
+# Calls per minute allowed for each tier, messages are limited per channel instead of per team
+SLACK_TIER_RATE_LIMITS = {
+    'tier_1': 1,
+    'tier_2': 20,
+    'tier_3': 50,
+    'tier_4': 100,
+    'post_message': 60
+}
+
+# Seconds worth of calls which can be made in a burst
+SLACK_RATE_LIMIT_BURST = 10
+
+# Retries of a call Slack rate limited, each made after the time Slack asked to wait
+SLACK_RATE_LIMIT_MAX_RETRIES = 2
+
+# Errors Slack responds with when the token of the call is no longer valid, e.g. after the app was reinstalled
+SLACK_TOKEN_ERRORS = ['invalid_auth', 'not_authed', 'token_revoked', 'account_inactive']
+
+# Token buckets of this process, keyed by team, tier and (for messages) channel
+_slack_rate_limit_buckets = LRUCache(max_size=10000, idle_timeout=600)
+_slack_rate_limit_buckets_lock = threading.Lock()
+
+# Longest the Slack calls of a thread wait for their rate limit, see `max_slack_rate_limit_wait`
+_max_rate_limit_waits = threading.local()
+
+
+class FyleSlackWebClient(WebClient):
+    '''
+        Slack client which keeps the calls of a team within Slack's per method tier rate limits.
+
+        Calls are delayed while the token bucket of their tier is empty,
+        calls Slack still rate limits are retried after the `Retry-After` Slack responds with,
+        which also holds back the other calls of the tier.
+        Within `max_slack_rate_limit_wait` (e.g. while serving a web request), calls which would have to wait longer
+        fail right away with the `ratelimited` error Slack responds with.
+
+        Requests go through the process' pooled HTTP session, so a client kept across calls reuses its connections.
+    '''
+
+    def __init__(self, token: str = None, team_id: str = None, **kwargs: Any) -> None:
+        super().__init__(token=token, **kwargs)
+        self.team_id = team_id
+
+        if team_id is not None:
+            self.retry_handlers.append(SlackRateLimitRetryHandler(team_id, max_retry_count=SLACK_RATE_LIMIT_MAX_RETRIES))
+
+
+    def api_call(self, api_method: str, **kwargs: Any) -> SlackResponse:
+        if self.team_id is not None and not wait_for_slack_rate_limit(self.team_id, api_method, get_call_channel(kwargs)):
+            raise SlackApiError(
+                'Slack call {} of team {} can\'t wait for its rate limit'.format(api_method, self.team_id),
+                self.get_rate_limited_response(api_method)
+            )
+
+        try:
+            return super().api_call(api_method, **kwargs)
+        except SlackApiError as error:
+            # Clients outlive calls, the team may have reinstalled the app with a new token in another process
+            if self.team_id is None or error.response.get('error') not in SLACK_TOKEN_ERRORS or not self.reload_token():
+                raise
+
+            return super().api_call(api_method, **kwargs)
+
+
+    def get_rate_limited_response(self, api_method: str) -> SlackResponse:
+        return SlackResponse(
+            client=self,
+            http_verb='POST',
+            api_url='{}{}'.format(self.base_url, api_method),
+            req_args={},
+            data={'ok': False, 'error': 'ratelimited'},
+            headers={},
+            status_code=429
+        )
+
+
+    def reload_token(self) -> bool:
+        bot_access_token = Team.objects.filter(id=self.team_id).values_list('bot_access_token', flat=True).first()
+
+        if bot_access_token is None or bot_access_token == self.token:
+            return False
+
+        self.token = bot_access_token
+        return True
+
+
+    # The SDK has no hook for its HTTP transport, this overrides the private method making its requests.
+    # slack-sdk is pinned in requirements.txt, `test_sdk_still_requests_through_overridden_method` fails if the method changes
+    def _perform_urllib_http_request_internal(self, url: str, req: Request) -> Dict[str, Any]:
+        # Proxied and custom SSL requests are left to urllib
+        if self.proxy is not None or self.ssl is not None or not url.lower().startswith('http'):
+            return super()._perform_urllib_http_request_internal(url, req)
+
+        try:
+            response = http.get_session().request(
+                method=req.get_method(),
+                url=req.full_url,
+                headers=dict(req.header_items()),
+                data=req.data,
+                timeout=self.timeout
+            )
+        except requests.ConnectionError as error:
+            # Connection errors are retried by the SDK's retry handlers, which expect urllib's error
+            raise URLError(error) from error
+
+        # Response is handed back the way urllib returns it, headers as a message and errors raised
+        headers = HTTPMessage()
+        for header_name, header_value in response.headers.items():
+            headers[header_name] = header_value
+
+        if response.status_code >= 400:
+            raise HTTPError(req.full_url, response.status_code, response.reason, headers, io.BytesIO(response.content))
+
+        if headers.get_content_type() == 'application/gzip':
+            return {'status': response.status_code, 'headers': headers, 'body': response.content}
+
+        charset = headers.get_content_charset() or 'utf-8'
+        return {'status': response.status_code, 'headers': headers, 'body': response.content.decode(charset)}
+
+
+class SlackRateLimitRetryHandler(RateLimitErrorRetryHandler):
+
+    def __init__(self, team_id: str, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.team_id = team_id
+
+
+    def _can_retry(self, *, state: RetryState, request: HttpRequest, response: HttpResponse = None, error: Exception = None) -> bool:
+        if not super()._can_retry(state=state, request=request, response=response, error=error):
+            return False
+
+        max_wait = get_max_slack_rate_limit_wait()
+
+        return max_wait is None or get_retry_after(response.headers) <= max_wait
+
+
+    def prepare_for_next_attempt(self, *, state: RetryState, request: HttpRequest, response: HttpResponse = None, error: Exception = None) -> None:
+        if response is not None:
+            api_method = request.url.rsplit('/', 1)[-1]
+            retry_after = get_retry_after(response.headers)
+
+            logger.warning('Slack rate limited %s for team %s, retrying after %s seconds', api_method, self.team_id, retry_after)
+
+            channel = (request.body_params or {}).get('channel')
+            get_slack_rate_limit_bucket(self.team_id, api_method, channel).block(retry_after)
+
+        super().prepare_for_next_attempt(state=state, request=request, response=response, error=error)
+
+
+@contextlib.contextmanager
+def max_slack_rate_limit_wait(seconds: float) -> Iterator[None]:
+    '''
+        Bounds how long each Slack call this thread makes within the block waits for its rate limit,
+        both the delay to stay within the tier's limit and the retry Slack asks for.
+        Calls which would wait longer fail right away, the thread isn't held up by calls it can't make in time.
+    '''
+    previous_max_wait = getattr(_max_rate_limit_waits, 'seconds', None)
+
+    _max_rate_limit_waits.seconds = seconds if previous_max_wait is None else min(seconds, previous_max_wait)
+    try:
+        yield
+    finally:
+        _max_rate_limit_waits.seconds = previous_max_wait
+
+
+def get_max_slack_rate_limit_wait() -> Union[float, None]:
+    max_wait = getattr(_max_rate_limit_waits, 'seconds', None)
+
+    # Calls within an `http.deadline` don't wait past it either
+    deadline_at = http.get_deadline()
+    if deadline_at is not None:
+        remaining_time = max(deadline_at - time.time(), 0)
+        max_wait = remaining_time if max_wait is None else min(max_wait, remaining_time)
+
+    return max_wait
+
+
+def wait_for_slack_rate_limit(team_id: str, api_method: str, channel: str = None) -> bool:
+    # Returns False without waiting if the call would have to wait longer than the thread allows
+    delay = get_slack_rate_limit_bucket(team_id, api_method, channel).reserve(get_max_slack_rate_limit_wait())
+
+    if delay is None:
+        return False
+
+    if delay > 0:
+        time.sleep(delay)
+
+    return True
+
+
+def get_slack_rate_limit_bucket(team_id: str, api_method: str, channel: str = None) -> TokenBucket:
+    tier = SLACK_METHOD_TIERS.get(api_method, 'tier_3')
+
+    bucket_key: Hashable = (team_id, tier, channel) if tier == 'post_message' else (team_id, tier)
+
+    with _slack_rate_limit_buckets_lock:
+        bucket = _slack_rate_limit_buckets.get(bucket_key)
+
+        if bucket is None:
+            rate = SLACK_TIER_RATE_LIMITS[tier] / 60
+            bucket = TokenBucket(rate=rate, capacity=max(1, rate * SLACK_RATE_LIMIT_BURST))
+            _slack_rate_limit_buckets.set(bucket_key, bucket)
+
+    return bucket
+
+
+def get_call_channel(api_call_kwargs: Dict) -> str:
+    for body_kwarg in ['json', 'data', 'params']:
+        body = api_call_kwargs.get(body_kwarg)
+        if isinstance(body, dict) and body.get('channel') is not None:
+            return body['channel']
+    return None
+
+
+def get_retry_after(headers: Dict) -> int:
+    for header_name, header_value in headers.items():
+        if header_name.lower() == 'retry-after':
+            header_value = header_value[0] if isinstance(header_value, list) else header_value
+            return int(header_value)
+    return 1
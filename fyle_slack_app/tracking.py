@@ -1,13 +1,72 @@
-from mixpanel import Mixpanel
+from typing import Any, Dict
+
+import os
+import queue
+import threading
+
+from multiprocessing import util as multiprocessing_util
+
+from mixpanel import Consumer, Mixpanel, MixpanelException
 
 from django.conf import settings
 
+from fyle_slack_app.libs import logger
+from fyle_slack_app.libs.lru_cache import LRUCache
+
+
+logger = logger.get_logger(__name__)
+
 FYLE_SLACK_APP_MIXPANEL_TOKEN = settings.FYLE_SLACK_APP_MIXPANEL_TOKEN
 
-mixpanel_client = Mixpanel(FYLE_SLACK_APP_MIXPANEL_TOKEN)
+# Messages Mixpanel accepts in a single request
+MIXPANEL_BATCH_SIZE = 50
+
+
+class QueuedConsumer:
+    '''
+        Mixpanel consumer which queues messages in a bounded buffer of this process instead of sending them,
+        so tracking never waits on Mixpanel. A background thread sends the buffered messages in batches
+        every `TRACKING_FLUSH_INTERVAL` seconds, or as soon as a batch is full.
+
+        Messages which don't fit in the buffer (Mixpanel down or slow for a while) are dropped.
+    '''
+
+    def send(self, endpoint: str, json_message: str, *args: Any, **kwargs: Any) -> None:
+        tracking_buffer = get_tracking_buffer()
+
+        try:
+            tracking_buffer.put_nowait((endpoint, json_message))
+        except queue.Full:
+            logger.warning('Tracking buffer is full, dropped %s message', endpoint)
+            return
+
+        if tracking_buffer.qsize() >= MIXPANEL_BATCH_SIZE:
+            _tracking_flush_requested.set()
+
+
+mixpanel_client = Mixpanel(FYLE_SLACK_APP_MIXPANEL_TOKEN, consumer=QueuedConsumer())
+
+# Sends the batches, only used by the flusher thread and on shutdown
+mixpanel_consumer = Consumer(request_timeout=settings.HTTP_READ_TIMEOUT)
+
+# Buffer of this process, a forked process (gunicorn / django-q worker) starts its own along with its flusher
+_tracking_buffer: queue.Queue = None
+_tracking_buffer_pid: int = None
+_tracking_buffer_lock = threading.Lock()
+
+_tracking_flush_lock = threading.Lock()
+_tracking_flush_requested = threading.Event()
+
+# Users identified by this process within the dedupe window
+_identified_users = LRUCache(max_size=10000, timeout=settings.TRACKING_IDENTIFY_DEDUPE_WINDOW)
 
 
 def identify_user(user_email) -> bool:
+    # Profiles carry nothing but the email, setting one again within the window changes nothing
+    if _identified_users.get(user_email) is not None:
+        return True
+
+    _identified_users.set(user_email, True)
     mixpanel_client.people_set(user_email, {})
     return True
 
@@ -15,3 +74,69 @@ def identify_user(user_email) -> bool:
 def track_event(user_email, event_name, event_data) -> bool:
     mixpanel_client.track(user_email, event_name, event_data)
     return True
+
+
+def get_tracking_buffer() -> queue.Queue:
+    # pylint: disable=global-statement
+    global _tracking_buffer, _tracking_buffer_pid
+
+    current_pid = os.getpid()
+
+    if _tracking_buffer is None or _tracking_buffer_pid != current_pid:
+        with _tracking_buffer_lock:
+            if _tracking_buffer is None or _tracking_buffer_pid != current_pid:
+                _tracking_buffer = queue.Queue(maxsize=settings.TRACKING_BUFFER_SIZE)
+                _tracking_buffer_pid = current_pid
+
+                if settings.TRACKING_FLUSHER_ENABLED is True:
+                    start_tracking_flusher()
+
+    return _tracking_buffer
+
+
+def start_tracking_flusher() -> None:
+    threading.Thread(target=run_tracking_flusher, name='tracking-flusher', daemon=True).start()
+
+    # Finalizers run on interpreter exit and, unlike atexit handlers, when django-q workers exit
+    multiprocessing_util.Finalize(None, flush_tracking, exitpriority=10)
+
+
+def run_tracking_flusher() -> None:
+    while True:
+        _tracking_flush_requested.wait(settings.TRACKING_FLUSH_INTERVAL)
+        _tracking_flush_requested.clear()
+
+        # Flusher has to outlive errors, or tracking stops for the rest of the process
+        try:
+            flush_tracking()
+        # pylint: disable=broad-except
+        except Exception as error:
+            logger.error('Error while flushing tracking buffer: %s', error)
+
+
+def flush_tracking() -> None:
+    '''
+        Sends the buffered messages to Mixpanel in batches, a batch Mixpanel fails to take is dropped.
+    '''
+    if _tracking_buffer is None or _tracking_buffer_pid != os.getpid():
+        return
+
+    with _tracking_flush_lock:
+        endpoint_messages: Dict[str, list] = {}
+
+        while True:
+            try:
+                endpoint, json_message = _tracking_buffer.get_nowait()
+            except queue.Empty:
+                break
+
+            endpoint_messages.setdefault(endpoint, []).append(json_message)
+
+        for endpoint, messages in endpoint_messages.items():
+            for batch_start in range(0, len(messages), MIXPANEL_BATCH_SIZE):
+                batch = messages[batch_start:batch_start + MIXPANEL_BATCH_SIZE]
+
+                try:
+                    mixpanel_consumer.send(endpoint, '[{}]'.format(','.join(batch)))
+                except MixpanelException as error:
+                    logger.error('Error while sending %s %s messages to mixpanel: %s', len(batch), endpoint, error)
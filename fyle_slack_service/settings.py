@@ -49,6 +49,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'fyle_slack_service.exception_middleware.CustomExceptionMiddleware',
+    'fyle_slack_service.slack_rate_limit_middleware.SlackRateLimitMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -97,12 +98,16 @@ DATABASES = {
     }
 }
 
+# Once the cache has more than MAX_ENTRIES entries, expired ones are dropped and then entries are culled at random.
+# Org metadata versions, suggestion index snapshots and their refresh locks, view render versions, digest buffers,
+# webhook routes and Slack directories all live here, and culling one of them makes processes disagree or redo work,
+# so the cap is kept well above the number of entries live at a time
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
         'LOCATION': 'slack_cache',
         'OPTIONS': {
-            'MAX_ENTRIES': 1000
+            'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 200000))
         }
     }
 }
@@ -148,12 +153,40 @@ USE_TZ = True
 STATIC_URL = '/static/'
 
 
+# Tasks are queued in lanes (see `libs.task_lanes`), each processed by a cluster of its own started with
+# Q_CLUSTER_LANE (run_qcluster.sh, run_notifications_qcluster.sh, run_bulk_qcluster.sh)
+# Notifications and bulk lanes are opt-in, until their cluster is deployed their tasks are queued to the interactive one
+Q_CLUSTER_NOTIFICATIONS_LANE_ENABLED = True if os.environ.get('Q_CLUSTER_NOTIFICATIONS_LANE_ENABLED') == 'True' else False
+Q_CLUSTER_BULK_LANE_ENABLED = True if os.environ.get('Q_CLUSTER_BULK_LANE_ENABLED') == 'True' else False
+
+Q_CLUSTER_LANES = {
+    'interactive': {
+        'name': 'fyle_slack_service',
+        'workers': int(os.environ.get('Q_CLUSTER_INTERACTIVE_WORKERS', 4)),
+        'queue_limit': int(os.environ.get('Q_CLUSTER_INTERACTIVE_QUEUE_LIMIT', 50))
+    },
+    'notifications': {
+        'name': os.environ.get('FYLE_NOTIFICATIONS_QUEUE', 'fyle_slack_notifications') if Q_CLUSTER_NOTIFICATIONS_LANE_ENABLED else 'fyle_slack_service',
+        'workers': int(os.environ.get('Q_CLUSTER_NOTIFICATIONS_WORKERS', 4)),
+        'queue_limit': int(os.environ.get('Q_CLUSTER_NOTIFICATIONS_QUEUE_LIMIT', 50))
+    },
+    'bulk': {
+        'name': 'fyle_slack_bulk' if Q_CLUSTER_BULK_LANE_ENABLED else 'fyle_slack_service',
+        'workers': int(os.environ.get('Q_CLUSTER_BULK_WORKERS', 2)),
+        'queue_limit': int(os.environ.get('Q_CLUSTER_BULK_QUEUE_LIMIT', 10))
+    }
+}
+
+Q_CLUSTER_LANE = os.environ.get('Q_CLUSTER_LANE', 'interactive')
+
 Q_CLUSTER = {
-    'name': 'fyle_slack_service',
+    'name': Q_CLUSTER_LANES[Q_CLUSTER_LANE]['name'],
+    # Schedules are run by the interactive cluster and only queue their task in its lane (`task_lanes.schedule`)
+    'scheduler': Q_CLUSTER_LANE == 'interactive',
     'compress': True,
     'save_limit': 0,
-    'workers': 4,
-    'queue_limit': 50,
+    'workers': Q_CLUSTER_LANES[Q_CLUSTER_LANE]['workers'],
+    'queue_limit': Q_CLUSTER_LANES[Q_CLUSTER_LANE]['queue_limit'],
     'orm': 'default',
     'ack_failures': True,
     'max_attempts': 1,
@@ -224,7 +257,25 @@ FYLE_ACCOUNTS_URL = os.environ['FYLE_ACCOUNTS_URL']
 FYLE_CLIENT_ID = os.environ['FYLE_CLIENT_ID']
 FYLE_CLIENT_SECRET = os.environ['FYLE_CLIENT_SECRET']
 FYLE_SLACK_APP_MIXPANEL_TOKEN = os.environ['FYLE_SLACK_APP_MIXPANEL_TOKEN']
+TRACKING_BUFFER_SIZE = int(os.environ.get('TRACKING_BUFFER_SIZE', 10000))
+TRACKING_FLUSH_INTERVAL = int(os.environ.get('TRACKING_FLUSH_INTERVAL', 5))
+TRACKING_IDENTIFY_DEDUPE_WINDOW = int(os.environ.get('TRACKING_IDENTIFY_DEDUPE_WINDOW', 3600))
+TRACKING_FLUSHER_ENABLED = False if os.environ.get('TRACKING_FLUSHER_ENABLED') == 'False' else True
 FYLE_BRANCHIO_BASE_URI = os.environ['FYLE_BRANCHIO_BASE_URI']
+FYLE_SDK_CONNECTION_CACHE_SIZE = int(os.environ.get('FYLE_SDK_CONNECTION_CACHE_SIZE', 500))
+FYLE_SDK_CONNECTION_IDLE_TIMEOUT = int(os.environ.get('FYLE_SDK_CONNECTION_IDLE_TIMEOUT', 1800))
+FYLE_ORG_METADATA_CACHE_TIMEOUT = int(os.environ.get('FYLE_ORG_METADATA_CACHE_TIMEOUT', 900))
+FYLE_SUGGESTION_INDEX_TIMEOUT = int(os.environ.get('FYLE_SUGGESTION_INDEX_TIMEOUT', 86400))
+FYLE_SUGGESTION_INDEX_REFRESH_INTERVAL = int(os.environ.get('FYLE_SUGGESTION_INDEX_REFRESH_INTERVAL', 300))
+FYLE_EXCHANGE_RATE_PREFETCH_LIMIT = int(os.environ.get('FYLE_EXCHANGE_RATE_PREFETCH_LIMIT', 5))
+FYLE_LOOKUP_CACHE_SIZE = int(os.environ.get('FYLE_LOOKUP_CACHE_SIZE', 5000))
+FYLE_EMPLOYEE_LOOKUP_CACHE_TIMEOUT = int(os.environ.get('FYLE_EMPLOYEE_LOOKUP_CACHE_TIMEOUT', 900))
+FYLE_PLACE_LOOKUP_CACHE_TIMEOUT = int(os.environ.get('FYLE_PLACE_LOOKUP_CACHE_TIMEOUT', 86400))
+
+# Fyle webhooks are acknowledged right away and processed in the notifications lane when enabled,
+# instead of being processed within the webhook request
+FYLE_NOTIFICATIONS_QUEUE_ENABLED = True if os.environ.get('FYLE_NOTIFICATIONS_QUEUE_ENABLED') == 'True' else False
+FYLE_NOTIFICATION_DIGEST_WINDOW = int(os.environ.get('FYLE_NOTIFICATION_DIGEST_WINDOW', 900))
 
 # Slack Settings
 SLACK_CLIENT_ID = os.environ['SLACK_CLIENT_ID']
@@ -234,6 +285,37 @@ SLACK_APP_TOKEN = os.environ['SLACK_APP_TOKEN']
 SLACK_SIGNING_SECRET = os.environ['SLACK_SIGNING_SECRET']
 SLACK_SERVICE_BASE_URL = os.environ['SLACK_SERVICE_BASE_URL']
 
+# Seconds block suggestion handlers have to answer in, Slack drops responses taking more than 3 seconds
+SLACK_BLOCK_SUGGESTION_TIME_BUDGET = float(os.environ.get('SLACK_BLOCK_SUGGESTION_TIME_BUDGET', 2.5))
+
+# Seconds a Slack call made while serving a web request may wait for its rate limit, background tasks wait as long as needed
+SLACK_REQUEST_RATE_LIMIT_WAIT = float(os.environ.get('SLACK_REQUEST_RATE_LIMIT_WAIT', 1))
+
+# Slack clients kept per team by each process, a client unused for the idle timeout (seconds) is dropped
+SLACK_CLIENT_CACHE_SIZE = int(os.environ.get('SLACK_CLIENT_CACHE_SIZE', 1000))
+SLACK_CLIENT_IDLE_TIMEOUT = int(os.environ.get('SLACK_CLIENT_IDLE_TIMEOUT', 1800))
+
+# Workspace directories (email to Slack user id) are kept fresh by events and reloaded in the background once a day
+SLACK_DIRECTORY_REFRESH_INTERVAL = int(os.environ.get('SLACK_DIRECTORY_REFRESH_INTERVAL', 86400))
+SLACK_DIRECTORY_CACHE_TIMEOUT = int(os.environ.get('SLACK_DIRECTORY_CACHE_TIMEOUT', 604800))
+
+# Installation messages sent at a time, a broadcast which saved no progress for the stale timeout (seconds) is resumed
+SLACK_BROADCAST_CONCURRENCY = int(os.environ.get('SLACK_BROADCAST_CONCURRENCY', 4))
+SLACK_BROADCAST_STALE_TIMEOUT = int(os.environ.get('SLACK_BROADCAST_STALE_TIMEOUT', 900))
+
+# Users torn down per uninstall task and at a time, an uninstall which made no progress for the stale timeout (seconds) is resumed
+SLACK_UNINSTALL_BATCH_SIZE = int(os.environ.get('SLACK_UNINSTALL_BATCH_SIZE', 500))
+SLACK_UNINSTALL_CONCURRENCY = int(os.environ.get('SLACK_UNINSTALL_CONCURRENCY', 8))
+SLACK_UNINSTALL_STALE_TIMEOUT = int(os.environ.get('SLACK_UNINSTALL_STALE_TIMEOUT', 900))
+# Passes over a team's users whose subscriptions couldn't be disabled, they are deleted after the last one
+SLACK_UNINSTALL_ATTEMPTS = int(os.environ.get('SLACK_UNINSTALL_ATTEMPTS', 3))
+
+# Outbound HTTP Settings
+HTTP_POOL_CONNECTIONS = int(os.environ.get('HTTP_POOL_CONNECTIONS', 10))
+HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', 10))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', 5))
+HTTP_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', 60))
+
 # Sentry Integration
 SENTRY_DSN = os.environ.get('SENTRY_DSN')
 ENVIRONMENT = os.environ.get('ENVIRONMENT')
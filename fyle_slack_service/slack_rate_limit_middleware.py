@@ -0,0 +1,19 @@
+from django.conf import settings
+
+from fyle_slack_app.slack.web_client import max_slack_rate_limit_wait
+
+
+class SlackRateLimitMiddleware:
+    '''
+        Slack calls made while serving a web request don't wait out Slack's rate limits,
+        Slack expects its requests to be answered within 3 seconds and the worker thread is held up meanwhile.
+        Calls which would wait longer than `SLACK_REQUEST_RATE_LIMIT_WAIT` seconds fail right away.
+    '''
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+
+    def __call__(self, request):
+        with max_slack_rate_limit_wait(settings.SLACK_REQUEST_RATE_LIMIT_WAIT):
+            return self.get_response(request)
@@ -69,5 +69,13 @@ def worker_int(worker):
     worker.log.debug("\n".join(code))
 
 
+def worker_exit(server, worker):
+    # Sending tracking events still buffered by the worker
+    # Imported here as the config is loaded by the gunicorn master before Django is set up
+    # pylint: disable=import-outside-toplevel
+    from fyle_slack_app import tracking
+    tracking.flush_tracking()
+
+
 def worker_abort(worker):
     worker.log.info("worker received SIGABRT signal")
@@ -0,0 +1,2 @@
+export Q_CLUSTER_LANE=bulk
+python manage.py qcluster
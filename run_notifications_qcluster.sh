@@ -0,0 +1,2 @@
+export Q_CLUSTER_LANE=notifications
+python manage.py qcluster
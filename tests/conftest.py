@@ -21,6 +21,12 @@ def use_dummy_cache_backend(settings):
     }
 
 
+# Tracked events stay in the tracking buffer, tests flush it themselves instead of a flusher sending it to Mixpanel
+@pytest.fixture(autouse=True)
+def disable_tracking_flusher(settings):
+    settings.TRACKING_FLUSHER_ENABLED = False
+
+
 def http_request(method: str, url: str) -> Dict:
     headers = {
         'Content-Type': 'application/json'
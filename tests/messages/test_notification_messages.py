@@ -55,3 +55,13 @@ class TestNotifications:
         assert card_expense_section_block[2]['fields'][0]['text'] == "Card No.:\n *Ending 4567 (VISA)*"
         assert card_expense_section_block[3]['elements'][1]['value'] == "fake-id-123"
         assert card_expense_section_block[2]['fields'][1]['text'] == "Merchant:\n *Uber*"
+
+    def test_get_notifications_digest(self):
+        FAKE_NOTIFICATIONS = [
+            ([{'type': 'section', 'text': {'type': 'mrkdwn', 'text': 'first'}}], 'first'),
+            ([{'type': 'section', 'text': {'type': 'mrkdwn', 'text': 'second'}}], 'second')
+        ]
+        digest_section_block, title_text = messages.get_notifications_digest(FAKE_NOTIFICATIONS, 2)
+        assert title_text == ':bell: You have 2 new notifications from Fyle'
+        assert [block['type'] for block in digest_section_block] == ['section', 'divider', 'section', 'divider', 'section', 'divider']
+        assert digest_section_block[4]['text']['text'] == 'second'
@@ -4,6 +4,7 @@ from django.http import HttpResponseRedirect
 from django.test import RequestFactory
 from django.conf import settings
 
+from fyle_slack_app.libs.task_lanes import TaskLane
 from fyle_slack_app.models import Team, User
 from fyle_slack_app.libs.utils import encode_state, decode_state
 from fyle_slack_app.slack.authorization.views import SlackAuthorization
@@ -13,7 +14,7 @@ from slack_sdk.web.client import WebClient
 @mock.patch('fyle_slack_app.slack.authorization.views.utils')
 @mock.patch('fyle_slack_app.slack.authorization.views.Team')
 @mock.patch('fyle_slack_app.slack.authorization.views.async_task')
-@mock.patch('fyle_slack_app.slack.authorization.views.WebClient')
+@mock.patch('fyle_slack_app.slack.authorization.views.FyleSlackWebClient')
 @mock.patch.object(SlackAuthorization, 'track_installation')
 def test_slack_authorization(track_installation, slack_client, async_task, team, utils):
 
@@ -75,6 +76,7 @@ def test_slack_authorization(track_installation, slack_client, async_task, team,
 
     async_task.assert_called_once()
     async_task.assert_called_with(
+        TaskLane.BULK,
         'fyle_slack_app.slack.authorization.tasks.broadcast_installation_message',
         mock_oauth_v2_access_response['team']['id']
     )
@@ -86,7 +88,7 @@ def test_slack_authorization(track_installation, slack_client, async_task, team,
 @mock.patch('fyle_slack_app.fyle.authorization.views.utils')
 @mock.patch('fyle_slack_app.fyle.authorization.views.fyle_utils')
 @mock.patch('fyle_slack_app.slack.utils.get_slack_user_dm_channel_id')
-@mock.patch('fyle_slack_app.fyle.authorization.views.WebClient')
+@mock.patch('fyle_slack_app.fyle.authorization.views.FyleSlackWebClient')
 @mock.patch('fyle_slack_app.fyle.authorization.views.transaction')
 @mock.patch.object(FyleAuthorization, 'create_user')
 @mock.patch.object(FyleAuthorization, 'send_post_authorization_message')
@@ -173,7 +175,7 @@ def test_fyle_authorization(create_notification_subscription, track_fyle_authori
 @mock.patch('fyle_slack_app.fyle.authorization.views.utils')
 @mock.patch('fyle_slack_app.fyle.authorization.views.fyle_utils')
 @mock.patch('fyle_slack_app.slack.utils.get_slack_user_dm_channel_id')
-@mock.patch('fyle_slack_app.fyle.authorization.views.WebClient')
+@mock.patch('fyle_slack_app.fyle.authorization.views.FyleSlackWebClient')
 @mock.patch('fyle_slack_app.fyle.authorization.views.transaction')
 @mock.patch.object(FyleAuthorization, 'create_user')
 def test_fyle_authorization2(create_user, transaction, slack_client, slack_user_dm_channel_id, fyle_utils, utils, mock_fyle):
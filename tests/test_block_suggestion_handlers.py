@@ -0,0 +1,68 @@
+import json
+
+import mock
+import pytest
+import requests
+
+from fyle.platform import exceptions
+
+from fyle_slack_app.fyle.expenses.views import FyleExpense
+from fyle_slack_app.libs import http
+from fyle_slack_app.slack.interactives.block_suggestion_handlers import BlockSuggestionHandler
+
+
+def get_option(text):
+    return {'text': {'type': 'plain_text', 'text': text}, 'value': text}
+
+
+class TestBlockSuggestionTimeBudget:
+
+    def test_recent_options_are_served_when_time_budget_runs_out(self, mocker):
+        mock_handler = mocker.patch.object(BlockSuggestionHandler, 'handle_project_suggestion')
+        mock_handler.return_value = [get_option('Apollo'), get_option('Apex'), get_option('Zeus')]
+
+        slack_payload = {'action_id': 'project_id', 'value': 'ap', 'view': {'id': 'V1'}}
+
+        response = BlockSuggestionHandler().handle_block_suggestions(slack_payload, 'U1', 'T1')
+        assert len(json.loads(response.content)['options']) == 3
+
+        mock_handler.side_effect = requests.Timeout()
+        slack_payload['value'] = 'apo'
+
+        response = BlockSuggestionHandler().handle_block_suggestions(slack_payload, 'U1', 'T1')
+        assert json.loads(response.content)['options'] == [get_option('Apollo')]
+
+
+    def test_entered_merchant_is_offered_when_time_budget_runs_out(self, mocker):
+        mocker.patch.object(BlockSuggestionHandler, 'handle_merchant_suggestion', side_effect=requests.Timeout())
+
+        slack_payload = {'action_id': 'merchant', 'value': 'Uber', 'view': {'id': 'V2'}}
+
+        response = BlockSuggestionHandler().handle_block_suggestions(slack_payload, 'U1', 'T1')
+        assert json.loads(response.content)['options'] == [get_option('Uber')]
+
+
+    def test_fyle_calls_within_deadline_skip_sdk(self, mocker):
+        mock_response = mocker.patch('fyle_slack_app.fyle.utils.get_from_fyle_platform').return_value
+        mock_response.status_code = 200
+        mock_sdk_list = mock.Mock()
+
+        fyle_expense = mock.Mock(refresh_token='token', cluster_domain='https://fyle.test')
+
+        with http.deadline(2.5):
+            projects = FyleExpense.list_resources(fyle_expense, 'spender/projects', {'offset': 0}, mock_sdk_list)
+
+        assert projects == mock_response.json.return_value
+        mock_sdk_list.assert_not_called()
+
+        FyleExpense.list_resources(fyle_expense, 'spender/projects', {'offset': 0}, mock_sdk_list)
+        mock_sdk_list.assert_called_once_with({'offset': 0})
+
+
+    def test_fyle_errors_within_deadline_are_raised_as_platform_errors(self, mocker):
+        mocker.patch('fyle_slack_app.fyle.utils.get_from_fyle_platform').return_value.status_code = 403
+
+        fyle_expense = mock.Mock(refresh_token='token', cluster_domain='https://fyle.test')
+
+        with http.deadline(2.5), pytest.raises(exceptions.NoPrivilegeError):
+            FyleExpense.list_resources(fyle_expense, 'spender/projects', {'offset': 0}, mock.Mock())
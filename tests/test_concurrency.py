@@ -0,0 +1,39 @@
+import threading
+
+import pytest
+
+from fyle_slack_app.libs.concurrency import run_concurrently
+
+
+class TestRunConcurrently:
+
+    def test_calls_run_in_parallel(self):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def call(value):
+            # Both calls have to be running at the same time to get past the barrier
+            barrier.wait()
+            return value
+
+        results = run_concurrently({
+            'first': lambda: call(1),
+            'second': lambda: call(2)
+        }, timeout=5)
+
+        assert results == {'first': 1, 'second': 2}
+
+
+    def test_deadline_and_errors_are_raised(self):
+        release = threading.Event()
+
+        with pytest.raises(TimeoutError):
+            run_concurrently({'slow': lambda: release.wait(5)}, timeout=0.05)
+
+        release.set()
+
+        def fail():
+            raise ValueError('failed')
+
+        with pytest.raises(ValueError):
+            run_concurrently({'ok': lambda: 1, 'failed': fail}, timeout=5)
+
@@ -0,0 +1,27 @@
+from babel.numbers import get_currency_precision, get_currency_symbol
+
+from fyle_slack_app.libs import currencies
+
+
+def get_babel_display_amount(amount, currency):
+    currency_symbol = get_currency_symbol(currency)
+    currency_symbol = currency_symbol if currency != currency_symbol else currency_symbol + ' '
+    sign = '-' if amount < 0 else ''
+    format_string = '{:,.' + str(get_currency_precision(currency)) + 'f}'
+    return '{}{}{}'.format(sign, currency_symbol, format_string.format(abs(amount) + 1e-9))
+
+
+class TestCurrencies:
+
+    def test_formatting_matches_babel(self):
+        for currency in currencies.CURRENCIES + ('XYZ',):
+            for amount in [0, 10.5678, -1234567.005, 2.675]:
+                assert currencies.format_amount(amount, currency) == get_babel_display_amount(amount, currency)
+
+        assert currencies.format_amounts([('100,000', 'INR'), (10.56, 'OMR'), (-10.56, 'JPY')]) == ['₹100,000.00', 'OMR 10.560', '-¥11']
+
+
+    def test_get_currencies_by_prefix(self):
+        assert currencies.get_currencies_by_prefix('us') == ['USD', 'USN', 'USS']
+        assert currencies.get_currencies_by_prefix('') == list(currencies.CURRENCIES)
+        assert currencies.get_currencies_by_prefix('QQ') == []
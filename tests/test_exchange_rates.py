@@ -0,0 +1,82 @@
+import mock
+import pytest
+
+from django.core.cache import cache
+
+from fyle_slack_app.fyle.expenses import exchange_rates, tasks
+from fyle_slack_app.libs.task_lanes import TaskLane
+
+
+@pytest.fixture
+def use_locmem_cache_backend(settings):
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+    cache.clear()
+
+
+@pytest.mark.usefixtures('use_locmem_cache_backend')
+class TestExchangeRates:
+
+    def test_exchange_rate_is_cached_per_day(self):
+        fetch = mock.Mock(return_value=82.5)
+
+        assert exchange_rates.get_exchange_rate('USD', 'INR', '2022-03-01', fetch) == 82.5
+        assert exchange_rates.get_exchange_rate('USD', 'INR', '2022-03-01', fetch) == 82.5
+        fetch.assert_called_once_with('USD', 'INR', '2022-03-01')
+
+        exchange_rates.get_exchange_rate('USD', 'INR', '2022-03-02', fetch)
+        assert fetch.call_count == 2
+
+
+    def test_most_used_currencies(self):
+        for foreign_currency in ['USD', 'EUR', 'USD', 'GBP', 'USD', 'EUR']:
+            exchange_rates.track_currency_usage('orfake1', 'INR', foreign_currency)
+
+        assert exchange_rates.get_most_used_currencies('orfake1', 2) == ['USD', 'EUR']
+        assert exchange_rates.get_org_home_currency('orfake1') == 'INR'
+        assert exchange_rates.get_most_used_currencies('orfake2', 2) == []
+
+
+class TestPrefetchExchangeRates:
+
+    def test_rates_are_prefetched_per_org_in_bulk_lane(self, mocker):
+        mock_users = mocker.patch('fyle_slack_app.fyle.expenses.tasks.User')
+        mock_users.objects.exclude.return_value.order_by.return_value.values_list.return_value.distinct.return_value = ['orfake1', 'orfake2']
+        mock_async_task = mocker.patch('fyle_slack_app.fyle.expenses.tasks.async_task')
+
+        tasks.prefetch_exchange_rates()
+
+        assert [call.args[:3] for call in mock_async_task.call_args_list] == [
+            (TaskLane.BULK, 'fyle_slack_app.fyle.expenses.tasks.prefetch_org_exchange_rates', 'orfake1'),
+            (TaskLane.BULK, 'fyle_slack_app.fyle.expenses.tasks.prefetch_org_exchange_rates', 'orfake2')
+        ]
+
+
+    def test_failing_rate_does_not_stop_others_of_org(self, mocker):
+        mocker.patch('fyle_slack_app.fyle.expenses.tasks.exchange_rates.get_most_used_currencies', return_value=['USD', 'EUR'])
+        mocker.patch('fyle_slack_app.fyle.expenses.tasks.exchange_rates.get_org_home_currency', return_value='INR')
+        mocker.patch('fyle_slack_app.fyle.expenses.tasks.User')
+        mocker.patch('fyle_slack_app.fyle.expenses.tasks.FyleExpense')
+        mock_get_exchange_rate = mocker.patch(
+            'fyle_slack_app.fyle.expenses.tasks.exchange_rates.get_exchange_rate',
+            side_effect=[ValueError('Unexpected response'), 0.9]
+        )
+
+        tasks.prefetch_org_exchange_rates('orfake1', '2022-03-01')
+
+        assert [call.args[0] for call in mock_get_exchange_rate.call_args_list] == ['USD', 'EUR']
+
+
+    def test_org_failing_to_connect_is_skipped(self, mocker):
+        mocker.patch('fyle_slack_app.fyle.expenses.tasks.exchange_rates.get_most_used_currencies', return_value=['USD'])
+        mocker.patch('fyle_slack_app.fyle.expenses.tasks.exchange_rates.get_org_home_currency', return_value='INR')
+        mocker.patch('fyle_slack_app.fyle.expenses.tasks.User')
+        mocker.patch('fyle_slack_app.fyle.expenses.tasks.FyleExpense', side_effect=AssertionError('Error fetching cluster domain'))
+        mock_get_exchange_rate = mocker.patch('fyle_slack_app.fyle.expenses.tasks.exchange_rates.get_exchange_rate')
+
+        tasks.prefetch_org_exchange_rates('orfake1', '2022-03-01')
+
+        mock_get_exchange_rate.assert_not_called()
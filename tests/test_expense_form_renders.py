@@ -0,0 +1,131 @@
+from unittest import mock
+
+import pytest
+
+from fyle_slack_app.fyle.expenses.views import FyleExpense
+from fyle_slack_app.models import User
+from fyle_slack_app.slack.interactives import tasks
+from fyle_slack_app.slack.interactives.block_action_handlers import BlockActionHandler
+
+
+FIELDS_RENDER_PROPERTY = {
+    'project': {'is_project_available': True, 'is_mandatory': False},
+    'cost_center': {'is_cost_center_available': False, 'is_mandatory': False}
+}
+
+CUSTOM_FIELDS = {'count': 1, 'data': [{'id': 1, 'is_custom': True}]}
+
+
+def get_slack_payload(action: dict) -> dict:
+    return {
+        'actions': [action],
+        'container': {'view_id': 'V1'},
+        'view': {
+            'id': 'V1',
+            'blocks': [{'type': 'input', 'block_id': 'project_block'}, {'type': 'input', 'block_id': 'category_block'}],
+            'state': {
+                'values': {
+                    'SELECT_default_field_currency_block': {'currency': {'selected_option': {'value': 'EUR'}}},
+                    'NUMBER_default_field_amount_block': {'claim_amount': {'value': '10'}}
+                }
+            }
+        }
+    }
+
+
+class TestExpenseFormRenders:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, settings, mocker):
+        settings.CACHES = {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            }
+        }
+
+        # pylint: disable=attribute-defined-outside-init
+        self.user = mock.Mock(spec=User, slack_user_id='U1', fyle_org_id='or1', fyle_refresh_token='token')
+        mocker.patch('fyle_slack_app.slack.interactives.block_action_handlers.utils.get_or_none', return_value=self.user)
+        mocker.patch('fyle_slack_app.fyle.expenses.views.fyle_utils.get_user_cluster_domain')
+        mocker.patch('fyle_slack_app.fyle.expenses.views.get_fyle_sdk_connection')
+        mocker.patch('fyle_slack_app.slack.interactives.block_action_handlers.get_slack_client')
+        mocker.patch.object(FyleExpense, 'get_exchange_rate', return_value=2)
+        mocker.patch.object(FyleExpense, 'get_custom_fields_by_category_id', return_value=CUSTOM_FIELDS)
+        mocker.patch.object(FyleExpense, 'get_projects', return_value={
+            'data': [{'id': 7, 'name': 'Apollo', 'display_name': 'Apollo', 'sub_project': None}]
+        })
+
+        self.async_task = mocker.patch('fyle_slack_app.slack.interactives.block_action_handlers.async_task')
+        self.slack_client = mocker.patch('fyle_slack_app.slack.interactives.tasks.get_slack_client').return_value
+        self.expense_dialog_form = mocker.patch('fyle_slack_app.slack.interactives.tasks.expense_messages.expense_dialog_form')
+
+        FyleExpense.update_form_metadata('V1', {
+            'fields_render_property': FIELDS_RENDER_PROPERTY,
+            'additional_currency_details': {'home_currency': 'USD'},
+            'add_to_report': 'existing_report'
+        })
+
+
+    def queue_action(self, handler: str, action: dict) -> tuple:
+        slack_payload = get_slack_payload(action)
+        getattr(BlockActionHandler(), handler)(slack_payload, 'U1', 'T1')
+
+        args, kwargs = self.async_task.call_args
+        return getattr(tasks, args[1].split('.')[-1]), args[2:], kwargs
+
+
+    def test_category_then_amount_renders_custom_fields_and_amount(self):
+        category_task = self.queue_action('handle_category_selection', {'selected_option': {'value': '12'}})
+        amount_task = self.queue_action('handle_amount_entered', {'value': '10'})
+
+        # The amount is rendered before the custom fields of the category are loaded
+        amount_task[0](*amount_task[1], **amount_task[2])
+        category_task[0](*category_task[1], **category_task[2])
+
+        assert self.expense_dialog_form.call_count == 2
+
+        latest_form_details = self.expense_dialog_form.call_args[1]
+        assert latest_form_details['custom_fields'] == CUSTOM_FIELDS
+        assert latest_form_details['additional_currency_details'] == {
+            'foreign_currency': 'EUR', 'home_currency': 'USD', 'claim_amount': 10.0, 'total_amount': 20.0
+        }
+
+
+    def test_project_then_other_change_renders_project(self):
+        project_task = self.queue_action('handle_project_selection', {'selected_option': {'value': '7'}})
+        category_task = self.queue_action('handle_category_selection', {'selected_option': {'value': '12'}})
+        currency_task = self.queue_action('handle_currency_selection', {'selected_option': {'value': 'EUR'}})
+
+        for task, args, kwargs in [currency_task, category_task, project_task]:
+            task(*args, **kwargs)
+
+        assert self.expense_dialog_form.call_count == 3
+        for _, form_details in self.expense_dialog_form.call_args_list:
+            assert form_details['selected_project']['id'] == 7
+
+        latest_form_details = self.expense_dialog_form.call_args[1]
+        assert latest_form_details['custom_fields'] == CUSTOM_FIELDS
+        assert latest_form_details['additional_currency_details']['total_amount'] == 20.0
+
+
+    def test_only_latest_render_of_a_type_is_rendered(self):
+        older_category_task = self.queue_action('handle_category_selection', {'selected_option': {'value': '12'}})
+        category_task = self.queue_action('handle_category_selection', {'selected_option': {'value': '13'}})
+
+        older_category_task[0](*older_category_task[1], **older_category_task[2])
+        assert self.expense_dialog_form.call_count == 0
+
+        category_task[0](*category_task[1], **category_task[2])
+        assert self.expense_dialog_form.call_count == 1
+        FyleExpense.get_custom_fields_by_category_id.assert_called_once_with('13')
+
+
+    def test_category_loaded_after_project_change_is_not_shown(self):
+        category_task = self.queue_action('handle_category_selection', {'selected_option': {'value': '12'}})
+        project_task = self.queue_action('handle_project_selection', {'selected_option': {'value': '7'}})
+
+        category_task[0](*category_task[1], **category_task[2])
+        project_task[0](*project_task[1], **project_task[2])
+
+        assert self.expense_dialog_form.call_count == 1
+        assert self.expense_dialog_form.call_args[1]['custom_fields'] is None
@@ -1,4 +1,7 @@
 import os
+import threading
+import pytest
+from fyle.platform import exceptions
 from fyle_slack_app.fyle import utils as fyle_utils
 from django.conf import settings
 from requests import Response
@@ -148,6 +151,154 @@ class TestUtils:
         response = fyle_utils.upload_file_to_s3(FAKE_UPLOAD_URL, FAKE_FILE_CONTENT , CONTENT_TYPE)
         assert response.status_code == 200
 
+    def test_get_fyle_access_token(self, mocker):
+        REFRESH_TOKEN = 'fake-refresh-token-for-access-token'
+        mock_response = mock.Mock(spec = Response)
+        mock_response.status_code = 200
+        mock_response.json.return_value = {
+            'access_token': 'fake-access-token',
+            'expires_in': 3600
+        }
+        mock_post = mocker.patch('fyle_slack_app.libs.http.post', return_value=mock_response)
+
+        # Access token should be exchanged only once during its lifetime
+        assert fyle_utils.get_fyle_access_token(REFRESH_TOKEN) == 'fake-access-token'
+        assert fyle_utils.get_fyle_access_token(REFRESH_TOKEN) == 'fake-access-token'
+        assert mock_post.call_count == 1
+
+        fyle_utils.invalidate_fyle_access_token(REFRESH_TOKEN)
+        fyle_utils.get_fyle_access_token(REFRESH_TOKEN)
+        assert mock_post.call_count == 2
+
+        fyle_utils.invalidate_fyle_access_token(REFRESH_TOKEN)
+
+
+    def test_get_fyle_sdk_connection_is_reused(self, mocker):
+        REFRESH_TOKEN = 'fake-refresh-token-for-connection'
+        mocker.patch('fyle_slack_app.fyle.utils.get_cluster_domain', return_value='https://fake-cluster.fyle.tech')
+        mocker.patch('fyle_slack_app.fyle.utils.get_fyle_access_token', return_value='fake-access-token')
+
+        connection = fyle_utils.get_fyle_sdk_connection(REFRESH_TOKEN)
+        assert fyle_utils.get_fyle_sdk_connection(REFRESH_TOKEN) is connection
+
+        fyle_utils.invalidate_fyle_sdk_connection(REFRESH_TOKEN)
+        assert fyle_utils.get_fyle_sdk_connection(REFRESH_TOKEN) is not connection
+
+        fyle_utils.invalidate_fyle_sdk_connection(REFRESH_TOKEN)
+
+
+    def test_post_to_fyle_platform_refreshes_rejected_cluster_domain(self, mocker):
+        REFRESH_TOKEN = 'fake-refresh-token-for-cluster'
+        mocker.patch('fyle_slack_app.fyle.utils.get_fyle_access_token', return_value='fake-access-token')
+        mock_refresh_cluster_domain = mocker.patch(
+            'fyle_slack_app.fyle.utils.refresh_cluster_domain',
+            return_value='https://new-cluster.fyle.tech'
+        )
+
+        redirect_response = mock.Mock(status_code=302, is_redirect=True)
+        ok_response = mock.Mock(status_code=200, is_redirect=False)
+        mock_post = mocker.patch('fyle_slack_app.libs.http.post', side_effect=[redirect_response, ok_response])
+
+        response = fyle_utils.post_to_fyle_platform('spender/files', {'data': {}}, REFRESH_TOKEN, 'https://old-cluster.fyle.tech')
+
+        assert response is ok_response
+        mock_refresh_cluster_domain.assert_called_once_with(REFRESH_TOKEN)
+        assert mock_post.call_args_list[0][0][0] == 'https://old-cluster.fyle.tech/platform/v1/spender/files'
+        assert mock_post.call_args_list[1][0][0] == 'https://new-cluster.fyle.tech/platform/v1/spender/files'
+
+        mock_post.side_effect = [ok_response]
+        fyle_utils.post_to_fyle_platform('spender/files', {'data': {}}, REFRESH_TOKEN, 'https://new-cluster.fyle.tech')
+        mock_refresh_cluster_domain.assert_called_once()
+
+
+    def test_sdk_call_refreshes_rejected_cluster_domain(self, mocker):
+        REFRESH_TOKEN = 'fake-refresh-token-for-sdk-cluster'
+        mocker.patch('fyle_slack_app.fyle.utils.get_fyle_access_token', return_value='fake-access-token')
+        mock_refresh_cluster_domain = mocker.patch(
+            'fyle_slack_app.fyle.utils.refresh_cluster_domain',
+            return_value='https://new-cluster.fyle.tech'
+        )
+
+        rejected_response = mock.Mock(status_code=401, is_redirect=False)
+        ok_response = mock.Mock(status_code=200, is_redirect=False)
+        ok_response.json.return_value = {'data': 'profile'}
+        mock_request = mocker.patch('fyle_slack_app.libs.http.http_request', side_effect=[rejected_response, ok_response])
+
+        connection = fyle_utils.get_fyle_sdk_connection(REFRESH_TOKEN, 'https://old-cluster.fyle.tech')
+
+        assert connection.v1.spender.my_profile.get() == {'data': 'profile'}
+        mock_refresh_cluster_domain.assert_called_once_with(REFRESH_TOKEN)
+        assert [call.args[1] for call in mock_request.call_args_list] == [
+            'https://old-cluster.fyle.tech/platform/v1/spender/my_profile',
+            'https://new-cluster.fyle.tech/platform/v1/spender/my_profile'
+        ]
+
+        # Connection with the refreshed cluster domain is the one reused
+        assert fyle_utils.get_fyle_sdk_connection(REFRESH_TOKEN, 'https://old-cluster.fyle.tech') is connection
+
+        fyle_utils.invalidate_fyle_sdk_connection(REFRESH_TOKEN)
+
+
+    def test_sdk_call_errors_are_raised_like_the_sdk(self, mocker):
+        REFRESH_TOKEN = 'fake-refresh-token-for-sdk-error'
+        mocker.patch('fyle_slack_app.fyle.utils.get_fyle_access_token', return_value='fake-access-token')
+        mock_refresh_cluster_domain = mocker.patch('fyle_slack_app.fyle.utils.refresh_cluster_domain')
+        mock_request = mocker.patch(
+            'fyle_slack_app.libs.http.http_request',
+            return_value=mock.Mock(status_code=500, is_redirect=False, text='error')
+        )
+
+        connection = fyle_utils.get_fyle_sdk_connection(REFRESH_TOKEN, 'https://fake-cluster.fyle.tech')
+
+        with pytest.raises(exceptions.InternalServerError):
+            connection.v1.spender.my_profile.get()
+        assert mock_request.call_count == 1
+        mock_refresh_cluster_domain.assert_not_called()
+
+        fyle_utils.invalidate_fyle_sdk_connection(REFRESH_TOKEN)
+
+
+    def test_sdk_calls_of_other_users_run_with_their_own_credentials(self, mocker):
+        mocker.patch('fyle_slack_app.fyle.utils.get_fyle_access_token', side_effect=lambda refresh_token: 'access-token-of-{}'.format(refresh_token))
+
+        first_call_started = threading.Event()
+        release_first_call = threading.Event()
+
+        def request(method, url, headers, **kwargs):
+            if headers['Authorization'] == 'Bearer access-token-of-first-user':
+                first_call_started.set()
+                release_first_call.wait(5)
+
+            response = mock.Mock(status_code=200, is_redirect=False)
+            response.json.return_value = {'data': headers['Authorization']}
+            return response
+
+        mocker.patch('fyle_slack_app.libs.http.http_request', side_effect=request)
+
+        first_connection = fyle_utils.get_fyle_sdk_connection('first-user', 'https://fake-cluster.fyle.tech')
+        second_connection = fyle_utils.get_fyle_sdk_connection('second-user', 'https://fake-cluster.fyle.tech')
+
+        results = {}
+        first_call = threading.Thread(target=lambda: results.update(first=first_connection.v1.spender.my_profile.get()))
+        first_call.start()
+        first_call_started.wait(5)
+
+        # Calls of other users don't wait for the first one to finish
+        results['second'] = second_connection.v1.spender.my_profile.get()
+        assert 'first' not in results
+
+        release_first_call.set()
+        first_call.join(5)
+
+        assert results == {
+            'first': {'data': 'Bearer access-token-of-first-user'},
+            'second': {'data': 'Bearer access-token-of-second-user'}
+        }
+
+        fyle_utils.invalidate_fyle_sdk_connection('first-user')
+        fyle_utils.invalidate_fyle_sdk_connection('second-user')
+
+
 class TestFyleCorporateCard:
     
     def test_get_corporate_card_by_id(self, test_connection, mocker):
@@ -1,4 +1,8 @@
 import json
+import pytest
+import requests
+from django.conf import settings
+from fyle_slack_app.libs import http
 from fyle_slack_app.libs.http import get, post, put, delete
 
 BASE_URL = "https://httpbin.org"
@@ -34,3 +38,30 @@ class TestHTTPMethods:
         resp = delete(URL)
         assert resp.status_code == 200
         assert resp.json()['data'] == ""
+
+    def test_session_is_reused_with_default_timeout(self, mocker):
+        session = http.get_session()
+        assert http.get_session() is session
+
+        mock_request = mocker.patch.object(session, 'request')
+        get(f"{BASE_URL}/get")
+        _, kwargs = mock_request.call_args
+        assert kwargs['timeout'] == (settings.HTTP_CONNECT_TIMEOUT, settings.HTTP_READ_TIMEOUT)
+
+
+    def test_calls_within_deadline_share_its_time(self, mocker, settings):
+        settings.HTTP_CONNECT_TIMEOUT = 3
+        mock_request = mocker.patch.object(http.get_session(), 'request')
+        mock_time = mocker.patch('fyle_slack_app.libs.http.time.time', return_value=1000)
+
+        with http.deadline(2.5):
+            mock_time.return_value = 1001
+            post(f"{BASE_URL}/post", data={})
+            _, kwargs = mock_request.call_args
+            assert kwargs['timeout'] == (1.5, 1.5)
+
+            mock_time.return_value = 1002.5
+            with pytest.raises(requests.Timeout):
+                get(f"{BASE_URL}/get")
+
+        assert http.get_deadline() is None
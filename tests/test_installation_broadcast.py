@@ -0,0 +1,74 @@
+import mock
+
+from slack_sdk.errors import SlackApiError
+
+from fyle_slack_app.libs.task_lanes import TaskLane
+from fyle_slack_app.models import InstallationBroadcast
+from fyle_slack_app.slack.authorization import tasks
+
+
+def get_workspace_user(slack_user_id, **kwargs):
+    return {'id': slack_user_id, 'team_id': 'T1', 'real_name': slack_user_id, 'deleted': False, 'is_bot': False, **kwargs}
+
+
+class TestInstallationBroadcast:
+
+    def mock_broadcast(self, mocker, **kwargs):
+        broadcast = mock.Mock(spec=InstallationBroadcast, cursor=None, messaged_user_ids=[], messaged_count=0, is_completed=False)
+        broadcast.configure_mock(**kwargs)
+
+        mock_broadcasts = mocker.patch('fyle_slack_app.slack.authorization.tasks.InstallationBroadcast')
+        mock_broadcasts.objects.get_or_create.return_value = (broadcast, True)
+
+        return broadcast
+
+
+    def test_page_is_broadcast_and_next_page_queued(self, mocker):
+        broadcast = self.mock_broadcast(mocker)
+        mock_async_task = mocker.patch('fyle_slack_app.slack.authorization.tasks.async_task')
+        mocker.patch('fyle_slack_app.slack.authorization.tasks.messages')
+
+        slack_client = mocker.patch('fyle_slack_app.slack.authorization.tasks.slack_utils.get_slack_client').return_value
+        slack_client.users_list.return_value = {
+            'ok': True,
+            'members': [get_workspace_user('U1'), get_workspace_user('B1', is_bot=True), get_workspace_user('U2')],
+            'response_metadata': {'next_cursor': 'page-2'}
+        }
+        slack_client.conversations_open.return_value = {'ok': True, 'channel': {'id': 'D1'}}
+
+        tasks.broadcast_installation_message('T1')
+
+        slack_client.users_list.assert_called_once_with(limit=tasks.INSTALLATION_BROADCAST_PAGE_SIZE, cursor=None)
+        assert slack_client.chat_postMessage.call_count == 2
+
+        assert broadcast.cursor == 'page-2' and broadcast.messaged_user_ids == [] and broadcast.messaged_count == 2
+        assert broadcast.is_completed is False
+        mock_async_task.assert_called_once_with(TaskLane.BULK, 'fyle_slack_app.slack.authorization.tasks.broadcast_installation_message', 'T1')
+
+
+    def test_resumed_page_skips_messaged_members(self, mocker):
+        broadcast = self.mock_broadcast(mocker, cursor='page-2', messaged_user_ids=['U1'], messaged_count=201)
+        mock_async_task = mocker.patch('fyle_slack_app.slack.authorization.tasks.async_task')
+        mocker.patch('fyle_slack_app.slack.authorization.tasks.messages')
+
+        slack_client = mocker.patch('fyle_slack_app.slack.authorization.tasks.slack_utils.get_slack_client').return_value
+        slack_client.users_list.return_value = {'ok': True, 'members': [get_workspace_user('U1'), get_workspace_user('U2')]}
+        slack_client.conversations_open.return_value = {'ok': True, 'channel': {'id': 'D2'}}
+
+        tasks.broadcast_installation_message('T1')
+
+        slack_client.users_list.assert_called_once_with(limit=tasks.INSTALLATION_BROADCAST_PAGE_SIZE, cursor='page-2')
+        slack_client.conversations_open.assert_called_once_with(users=['U2'])
+
+        assert broadcast.is_completed is True and broadcast.messaged_count == 202
+        mock_async_task.assert_not_called()
+
+
+    def test_member_who_cannot_be_messaged_is_skipped(self, mocker):
+        mocker.patch('fyle_slack_app.slack.authorization.tasks.messages')
+
+        slack_client = mock.Mock()
+        slack_client.conversations_open.side_effect = SlackApiError('user_not_found', {'ok': False})
+
+        assert tasks.send_installation_message(slack_client, get_workspace_user('U1')) == 'U1'
+        slack_client.chat_postMessage.assert_not_called()
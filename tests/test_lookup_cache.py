@@ -0,0 +1,46 @@
+import mock
+
+from fyle_slack_app.fyle.expenses import lookup_cache
+
+
+def get_employees_response(emails, count=None):
+    return {
+        'count': len(emails) if count is None else count,
+        'data': [{'email': email, 'full_name': email.split('@')[0]} for email in emails]
+    }
+
+
+class TestLookupCache:
+
+    def test_longer_prefix_is_answered_from_complete_shorter_prefix(self):
+        fetch = mock.Mock(return_value=get_employees_response(['jane@fyle.in', 'john@fyle.in', 'jordan@fyle.in']))
+
+        lookup_cache.get_employees_by_email_prefix('orfake1', 'j', fetch)
+        employees = lookup_cache.get_employees_by_email_prefix('orfake1', 'JO', fetch)
+
+        fetch.assert_called_once_with('j')
+        assert [employee['email'] for employee in employees['data']] == ['john@fyle.in', 'jordan@fyle.in']
+        assert employees['count'] == 2
+
+        # Other orgs don't share results
+        lookup_cache.get_employees_by_email_prefix('orfake2', 'jo', fetch)
+        assert fetch.call_count == 2
+
+
+    def test_incomplete_shorter_prefix_is_not_filtered(self):
+        fetch = mock.Mock(return_value=get_employees_response(['anna@fyle.in'], count=25))
+
+        lookup_cache.get_employees_by_email_prefix('orfake3', 'a', fetch)
+        lookup_cache.get_employees_by_email_prefix('orfake3', 'an', fetch)
+
+        assert fetch.call_args_list == [mock.call('a'), mock.call('an')]
+
+
+    def test_place_details_are_reused(self):
+        fetch = mock.Mock(return_value={'id': 'place-id', 'formatted_address': 'Bengaluru'})
+
+        place = lookup_cache.get_place_by_place_id('place-id', fetch)
+        place['display'] = place['formatted_address']
+
+        assert lookup_cache.get_place_by_place_id('place-id', fetch) == {'id': 'place-id', 'formatted_address': 'Bengaluru'}
+        fetch.assert_called_once_with('place-id')
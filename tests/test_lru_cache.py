@@ -0,0 +1,43 @@
+import mock
+
+from fyle_slack_app.libs.lru_cache import LRUCache
+
+
+class TestLRUCache:
+
+    def test_least_recently_used_is_evicted(self):
+        lru_cache = LRUCache(max_size=2)
+        lru_cache.set('a', 1)
+        lru_cache.set('b', 2)
+        assert lru_cache.get('a') == 1
+
+        lru_cache.set('c', 3)
+        assert lru_cache.get('b') is None
+        assert lru_cache.get('a') == 1 and lru_cache.get('c') == 3
+        assert len(lru_cache) == 2
+
+    def test_idle_and_absolute_timeouts(self, mocker):
+        mock_time = mocker.patch('fyle_slack_app.libs.lru_cache.time')
+        mock_time.monotonic.return_value = 100
+
+        lru_cache = LRUCache(max_size=10, timeout=60, idle_timeout=10)
+        lru_cache.set('a', 1)
+        lru_cache.set('b', 2, timeout=5)
+
+        mock_time.monotonic.return_value = 106
+        assert lru_cache.get('a') == 1
+        assert lru_cache.get('b') is None
+
+        mock_time.monotonic.return_value = 120
+        assert lru_cache.get('a') is None
+        assert len(lru_cache) == 0
+
+    def test_delete_and_clear(self):
+        lru_cache = LRUCache(max_size=10)
+        lru_cache.set('a', mock.sentinel.value)
+        assert lru_cache.delete('a') is mock.sentinel.value
+        assert lru_cache.delete('a') is None
+
+        lru_cache.set('b', 2)
+        lru_cache.clear()
+        assert len(lru_cache) == 0
@@ -0,0 +1,84 @@
+import mock
+import pytest
+
+from slack_sdk.errors import SlackApiError
+
+from fyle_slack_app.fyle.notifications import digest
+from fyle_slack_app.fyle.notifications import tasks as notification_tasks
+from fyle_slack_app.fyle.notifications.views import FyleFylerNotification
+from fyle_slack_app.libs.task_lanes import TaskLane
+
+
+def get_message(blocks_count, title_text):
+    return ([{'type': 'section'}] * blocks_count, title_text)
+
+
+class TestNotificationDigest:
+
+    def test_digest_messages_are_grouped_within_block_limit(self):
+        digest_messages = [get_message(4, 'first'), get_message(4, 'second'), get_message(4, 'third')]
+
+        groups = digest.group_digest_messages(digest_messages, 10)
+
+        assert [[title_text for _, title_text in group] for group in groups] == [['first', 'second'], ['third']]
+
+
+    def test_notification_is_buffered_and_digest_scheduled_once_per_window(self, mocker):
+        mock_create = mocker.patch('fyle_slack_app.fyle.notifications.digest.NotificationDigestEvent.objects.create')
+        mocker.patch('fyle_slack_app.fyle.notifications.digest.cache.add', side_effect=[True, False])
+        mock_schedule = mocker.patch('fyle_slack_app.fyle.notifications.digest.task_lanes.schedule')
+
+        digest.buffer_notification('U1', 'fyler', 'REPORT_PAID', {'data': {'id': 'rp1'}})
+        digest.buffer_notification('U1', 'fyler', 'REPORT_PAID', {'data': {'id': 'rp2'}})
+
+        assert mock_create.call_count == 2
+        mock_schedule.assert_called_once()
+        assert mock_schedule.call_args[0] == (TaskLane.NOTIFICATIONS, 'fyle_slack_app.fyle.notifications.tasks.send_notification_digest', 'U1')
+
+
+    def test_buffered_notifications_are_sent_as_one_message(self, mocker):
+        digest_events = [
+            mock.Mock(notification_role='fyler', notification_type='REPORT_PAID', webhook_data={'data': {'id': 'rp1'}}),
+            mock.Mock(notification_role='fyler', notification_type='REPORT_SUBMITTED', webhook_data={'data': {'id': 'rp2'}})
+        ]
+        mocker.patch('fyle_slack_app.fyle.notifications.tasks.digest.get_buffered_notifications', return_value=digest_events)
+        mock_delete = mocker.patch('fyle_slack_app.fyle.notifications.tasks.digest.delete_buffered_notifications')
+        mock_user = mocker.patch('fyle_slack_app.fyle.notifications.tasks.User').objects.select_related.return_value.filter.return_value.first.return_value
+        mock_slack_client = mocker.patch('fyle_slack_app.fyle.notifications.tasks.FyleSlackWebClient').return_value
+
+        def render_notification(self, webhook_data, user, slack_client):
+            self.send_notification(slack_client, user, webhook_data['data']['id'], [{'type': 'section'}])
+
+        mocker.patch.object(FyleFylerNotification, 'handle_report_paid', render_notification)
+        mocker.patch.object(FyleFylerNotification, 'handle_report_submitted', render_notification)
+
+        notification_tasks.send_notification_digest('U1')
+
+        mock_slack_client.chat_postMessage.assert_called_once()
+        _, kwargs = mock_slack_client.chat_postMessage.call_args
+        assert kwargs['channel'] == mock_user.slack_dm_channel_id
+        assert kwargs['text'] == ':bell: You have 2 new notifications from Fyle'
+        assert len(kwargs['blocks']) == 6
+        mock_delete.assert_called_once_with(digest_events)
+
+
+    def test_notifications_are_kept_when_digest_is_not_sent(self, mocker):
+        digest_events = [
+            mock.Mock(notification_role='fyler', notification_type='REPORT_PAID', webhook_data={'data': {'id': 'rp1'}}),
+            mock.Mock(notification_role='fyler', notification_type='REPORT_PAID', webhook_data={'data': {'id': 'rp2'}})
+        ]
+        mocker.patch('fyle_slack_app.fyle.notifications.tasks.digest.get_buffered_notifications', return_value=digest_events)
+        mock_delete = mocker.patch('fyle_slack_app.fyle.notifications.tasks.digest.delete_buffered_notifications')
+        mocker.patch('fyle_slack_app.fyle.notifications.tasks.User')
+        mock_slack_client = mocker.patch('fyle_slack_app.fyle.notifications.tasks.FyleSlackWebClient').return_value
+        mock_slack_client.chat_postMessage.side_effect = SlackApiError('ratelimited', {'ok': False, 'error': 'ratelimited'})
+
+        def render_notification(self, webhook_data, user, slack_client):
+            self.send_notification(slack_client, user, webhook_data['data']['id'], [{'type': 'section'}])
+
+        mocker.patch.object(FyleFylerNotification, 'handle_report_paid', render_notification)
+
+        with pytest.raises(SlackApiError):
+            notification_tasks.send_notification_digest('U1')
+
+        mock_delete.assert_not_called()
@@ -7,10 +7,13 @@ from django.http import JsonResponse
 
 from slack_sdk.web import WebClient
 
-from fyle_slack_app.models import NotificationPreference, User, UserSubscriptionDetail
+from fyle_slack_app.libs.task_lanes import TaskLane
+from fyle_slack_app.models import User
 from fyle_slack_app.models.notification_preferences import NotificationType
 from fyle_slack_app.fyle.notifications.views import FyleFylerNotification, FyleApproverNotification, FyleNotificationView
 from fyle_slack_app.fyle.notifications.views import FyleNotificationView
+from fyle_slack_app.fyle.notifications import routing as routing_module
+from fyle_slack_app.fyle.notifications import tasks as notification_tasks
 
 # This is needed to parameterize the tests
 FYLER_NOTIFICATION_TYPES = [
@@ -26,14 +29,14 @@ APPROVER_NOTIFICATION_TYPES = [
 ]
 
 
-@mock.patch('fyle_slack_app.fyle.notifications.views.utils')
-@mock.patch('fyle_slack_app.fyle.notifications.views.NotificationPreference')
+@mock.patch('fyle_slack_app.fyle.notifications.views.routing')
+@mock.patch('fyle_slack_app.fyle.notifications.views.FyleSlackWebClient')
 @mock.patch('fyle_slack_app.fyle.notifications.views.User')
 @mock.patch('fyle_slack_app.fyle.notifications.views.slack_utils')
 @mock.patch('fyle_slack_app.fyle.notifications.views.fyle_utils')
 @mock.patch.object(FyleNotificationView, 'track_notification')
 @pytest.mark.parametrize('notification_type', [notification_type for (notification_type) in FYLER_NOTIFICATION_TYPES])
-def test_fyler_notifications(track_notification, fyle_utils, slack_utils, user, notification_preference, utils, notification_type, mock_fyle):
+def test_fyler_notifications(track_notification, fyle_utils, slack_utils, user, web_client, routing, notification_type, mock_fyle):
 
     mock_webhook_id = str(uuid.uuid4())
 
@@ -59,25 +62,23 @@ def test_fyler_notifications(track_notification, fyle_utils, slack_utils, user,
 
     mock_request.body = json.dumps(mock_webhook_data)
 
-    mock_user_subscription_detail = mock.Mock(spec=UserSubscriptionDetail)
+    mock_webhook_route = mock.Mock(spec=routing_module.WebhookRoute)
+    mock_webhook_route.slack_user_id = mock_slack_user_id
+    mock_webhook_route.bot_access_token = 'mock-bot-access-token'
+    mock_webhook_route.slack_team_id = mock_slack_team_id
+    mock_webhook_route.is_enabled.return_value = True
+    mock_webhook_route.is_digest_enabled.return_value = False
 
-
-    mock_user_subscription_detail.slack_user_id = mock_slack_user_id
-
-    utils.get_or_none.return_value = mock_user_subscription_detail
-
-    mock_notification_preference = mock.Mock(spec=NotificationPreference)
-    notification_preference.objects.get.return_value = mock_notification_preference
-    mock_notification_preference.is_enabled = True
+    routing.get_webhook_route.return_value = mock_webhook_route
 
     mock_user = mock.Mock(spec=User)
 
-    user.objects.get.return_value = mock_user
+    user.objects.select_related.return_value.get.return_value = mock_user
     mock_user.slack_team_id = mock_slack_team_id
     mock_user.fyle_refresh_token = mock_fyle_refresh_token
 
     mock_slack_client = mock.Mock(spec=WebClient)
-    slack_utils.get_slack_client.return_value = mock_slack_client
+    web_client.return_value = mock_slack_client
 
     mock_slack_client.chat_postMessage.return_value = None
 
@@ -93,14 +94,13 @@ def test_fyler_notifications(track_notification, fyle_utils, slack_utils, user,
     assert isinstance(response, JsonResponse)
 
     # Checking the required methods have been called
-    utils.get_or_none.assert_called()
-    utils.get_or_none.assert_called_with(UserSubscriptionDetail, webhook_id=mock_webhook_id)
+    routing.get_webhook_route.assert_called_with(mock_webhook_id)
 
-    notification_preference.objects.get.assert_called()
-    notification_preference.objects.get.assert_called_with(slack_user_id=mock_slack_user_id, notification_type=notification_type.value)
+    mock_webhook_route.is_enabled.assert_called_with(notification_type.value)
 
-    user.objects.get.assert_called()
-    user.objects.get.assert_called_with(slack_user_id=mock_slack_user_id)
+    user.objects.select_related.return_value.get.assert_called_with(slack_user_id=mock_slack_user_id)
+
+    web_client.assert_called_with(token='mock-bot-access-token', team_id=mock_slack_team_id)
 
     mock_slack_client.chat_postMessage.assert_called()
 
@@ -108,14 +108,14 @@ def test_fyler_notifications(track_notification, fyle_utils, slack_utils, user,
 
 
 
-@mock.patch('fyle_slack_app.fyle.notifications.views.utils')
-@mock.patch('fyle_slack_app.fyle.notifications.views.NotificationPreference')
+@mock.patch('fyle_slack_app.fyle.notifications.views.routing')
+@mock.patch('fyle_slack_app.fyle.notifications.views.FyleSlackWebClient')
 @mock.patch('fyle_slack_app.fyle.notifications.views.User')
 @mock.patch('fyle_slack_app.fyle.notifications.views.slack_utils')
 @mock.patch('fyle_slack_app.fyle.notifications.views.fyle_utils')
 @mock.patch.object(FyleNotificationView, 'track_notification')
 @pytest.mark.parametrize('notification_type', [notification_type for (notification_type) in APPROVER_NOTIFICATION_TYPES])
-def test_approver_notifications(track_notification, fyle_utils, slack_utils, user, notification_preference, utils, notification_type, mock_fyle):
+def test_approver_notifications(track_notification, fyle_utils, slack_utils, user, web_client, routing, notification_type, mock_fyle):
 
     mock_webhook_id = str(uuid.uuid4())
 
@@ -142,25 +142,23 @@ def test_approver_notifications(track_notification, fyle_utils, slack_utils, use
 
     mock_request.body = json.dumps(mock_webhook_data)
 
-    mock_user_subscription_detail = mock.Mock(spec=UserSubscriptionDetail)
-
+    mock_webhook_route = mock.Mock(spec=routing_module.WebhookRoute)
+    mock_webhook_route.slack_user_id = mock_slack_user_id
+    mock_webhook_route.bot_access_token = 'mock-bot-access-token'
+    mock_webhook_route.slack_team_id = mock_slack_team_id
+    mock_webhook_route.is_enabled.return_value = True
+    mock_webhook_route.is_digest_enabled.return_value = False
 
-    mock_user_subscription_detail.slack_user_id = mock_slack_user_id
-
-    utils.get_or_none.return_value = mock_user_subscription_detail
-
-    mock_notification_preference = mock.Mock(spec=NotificationPreference)
-    notification_preference.objects.get.return_value = mock_notification_preference
-    mock_notification_preference.is_enabled = True
+    routing.get_webhook_route.return_value = mock_webhook_route
 
     mock_user = mock.Mock(spec=User)
 
-    user.objects.get.return_value = mock_user
+    user.objects.select_related.return_value.get.return_value = mock_user
     mock_user.slack_team_id = mock_slack_team_id
     mock_user.fyle_refresh_token = mock_fyle_refresh_token
 
     mock_slack_client = mock.Mock(spec=WebClient)
-    slack_utils.get_slack_client.return_value = mock_slack_client
+    web_client.return_value = mock_slack_client
 
     mock_slack_client.chat_postMessage.return_value = None
 
@@ -176,14 +174,13 @@ def test_approver_notifications(track_notification, fyle_utils, slack_utils, use
     assert isinstance(response, JsonResponse)
 
     # Checking the required methods have been called
-    utils.get_or_none.assert_called()
-    utils.get_or_none.assert_called_with(UserSubscriptionDetail, webhook_id=mock_webhook_id)
+    routing.get_webhook_route.assert_called_with(mock_webhook_id)
 
-    notification_preference.objects.get.assert_called()
-    notification_preference.objects.get.assert_called_with(slack_user_id=mock_slack_user_id, notification_type=notification_type.value)
+    mock_webhook_route.is_enabled.assert_called_with(notification_type.value)
 
-    user.objects.get.assert_called()
-    user.objects.get.assert_called_with(slack_user_id=mock_slack_user_id)
+    user.objects.select_related.return_value.get.assert_called_with(slack_user_id=mock_slack_user_id)
+
+    web_client.assert_called_with(token='mock-bot-access-token', team_id=mock_slack_team_id)
 
     mock_slack_client.chat_postMessage.assert_called()
 
@@ -241,3 +238,35 @@ class TestNotifications:
         }
         event_data = FyleNotificationView.track_notification('event_name', mock_user, resource_type, resource)
         assert all((rhs.get(key) == value for key, value in event_data.items()))
+
+
+    def test_queued_notification_is_acknowledged_without_processing(self, mocker, settings):
+        settings.FYLE_NOTIFICATIONS_QUEUE_ENABLED = True
+
+        mock_webhook_route = mocker.patch('fyle_slack_app.fyle.notifications.views.routing.get_webhook_route').return_value
+        mock_webhook_route.is_enabled.return_value = True
+        mock_async_task = mocker.patch('fyle_slack_app.fyle.notifications.views.async_task')
+        mock_handle_notification = mocker.patch.object(FyleNotificationView, 'handle_notification')
+
+        webhook_data = {'resource': 'REPORT', 'action': 'PAID', 'data': {'id': 'rp1'}}
+        mock_request = mock.Mock(body=json.dumps(webhook_data))
+
+        response = FyleFylerNotification().post(mock_request, 'webhook-id')
+
+        assert response.status_code == 200
+        mock_handle_notification.assert_not_called()
+        mock_async_task.assert_called_once_with(
+            TaskLane.NOTIFICATIONS,
+            'fyle_slack_app.fyle.notifications.tasks.process_notification',
+            'fyler',
+            'webhook-id',
+            webhook_data
+        )
+
+
+    def test_queued_notification_is_processed_by_view_of_its_role(self, mocker):
+        mock_handle_notification = mocker.patch.object(FyleApproverNotification, 'handle_notification')
+
+        notification_tasks.process_notification('approver', 'webhook-id', {'resource': 'REPORT', 'action': 'SUBMITTED'})
+
+        mock_handle_notification.assert_called_once_with('webhook-id', {'resource': 'REPORT', 'action': 'SUBMITTED'})
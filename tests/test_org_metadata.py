@@ -0,0 +1,47 @@
+import mock
+import pytest
+
+from django.core.cache import cache
+
+from fyle_slack_app.fyle.expenses import org_metadata
+
+
+@pytest.fixture
+def use_locmem_cache_backend(settings):
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+    cache.clear()
+
+
+@pytest.mark.usefixtures('use_locmem_cache_backend')
+class TestOrgMetadata:
+
+    def test_metadata_is_shared_across_org(self):
+        fetch = mock.Mock(return_value={'count': 1})
+
+        assert org_metadata.get_org_metadata('orfake1', 'custom_fields', fetch, 1) == {'count': 1}
+        assert org_metadata.get_org_metadata('orfake1', 'custom_fields', fetch, 1) == {'count': 1}
+        assert fetch.call_count == 1
+
+        org_metadata.get_org_metadata('orfake1', 'custom_fields', fetch, 2)
+        org_metadata.get_org_metadata('orfake2', 'custom_fields', fetch, 1)
+        assert fetch.call_count == 3
+
+
+    def test_user_scoped_metadata_is_kept_per_user(self):
+        fetch = mock.Mock(return_value=False)
+
+        org_metadata.get_org_metadata('orfake1', 'is_project_available', fetch, 'U1')
+        org_metadata.get_org_metadata('orfake1', 'is_project_available', fetch, 'U1')
+        assert fetch.call_count == 1
+
+        org_metadata.get_org_metadata('orfake1', 'is_project_available', fetch, 'U2')
+        assert fetch.call_count == 2
+
+        # Users without org id don't share anything
+        org_metadata.get_org_metadata('', 'is_project_available', fetch)
+        org_metadata.get_org_metadata('', 'is_project_available', fetch)
+        assert fetch.call_count == 4
@@ -1,18 +1,18 @@
 import mock
 
-from fyle_slack_app.models import User, Team
+from fyle_slack_app.models import User
 from fyle_slack_app.fyle.report_approvals.tasks import process_report_approval
+from fyle_slack_app.libs.task_lanes import TaskLane
+from fyle_slack_app.slack.interactives.block_action_handlers import BlockActionHandler
 
 
 @mock.patch('fyle_slack_app.fyle.report_approvals.tasks.utils')
-@mock.patch('fyle_slack_app.fyle.report_approvals.tasks.WebClient')
 @mock.patch('fyle_slack_app.fyle.report_approvals.tasks.FyleReportApproval')
 @mock.patch('fyle_slack_app.fyle.report_approvals.tasks.slack_utils')
 @mock.patch('fyle_slack_app.fyle.report_approvals.tasks.fyle_utils')
 @mock.patch('fyle_slack_app.fyle.report_approvals.tasks.notification_messages')
 @mock.patch('fyle_slack_app.fyle.report_approvals.tasks.UserFeedback')
-def test_report_approve(user_feedback, notification_messages, fyle_utils, slack_utils, fyle_report_approval, slack_client, utils, mock_fyle):
-    mock_team = mock.Mock(spec=Team)
+def test_report_approve(user_feedback, notification_messages, fyle_utils, slack_utils, fyle_report_approval, utils, mock_fyle):
     mock_user = mock.Mock(spec=User)
 
     mock_fyle_user_id = 'mock-user-id'
@@ -20,7 +20,9 @@ def test_report_approve(user_feedback, notification_messages, fyle_utils, slack_
     mock_user.fyle_user_id = mock_fyle_user_id
     mock_user.fyle_refresh_token = mock_fyle_refresh_token
 
-    utils.get_or_none.side_effect = [mock_team, mock_user]
+    utils.get_or_none.side_effect = [mock_user]
+
+    slack_client = slack_utils.get_slack_client.return_value
 
     mock_approver_report = mock_fyle.approver.reports.get()
 
@@ -67,17 +69,11 @@ def test_report_approve(user_feedback, notification_messages, fyle_utils, slack_
 
     # Assertion check for required methods that have been called
 
-    # Check is get_or_none function has been called twice
-    assert utils.get_or_none.call_count == 2
-
-    # We call get_or_none twice in view to be tested
-    # This check if the parameters passed in each call are correct or not
-    expected_calls = [
-        mock.call(Team, id=mock_team_id),
-        mock.call(User, slack_user_id=mock_fyle_user_id)
-    ]
+    # Slack client of the team is taken from the per team clients
+    slack_utils.get_slack_client.assert_called_once_with(mock_team_id)
 
-    utils.get_or_none.assert_has_calls(expected_calls)
+    # Check is get_or_none function has been called once, for the approver
+    utils.get_or_none.assert_called_once_with(User, slack_user_id=mock_fyle_user_id)
 
     fyle_report_approval.get_report_by_id.assert_called()
     fyle_report_approval.get_report_by_id.assert_called_with(mock_report_id)
@@ -86,7 +82,7 @@ def test_report_approve(user_feedback, notification_messages, fyle_utils, slack_
     fyle_report_approval.can_approve_report.assert_called_with(mock_approver_report['data'], mock_fyle_user_id)
 
     slack_utils.get_user_display_name.assert_called()
-    slack_utils.get_user_display_name.assert_called_with(slack_client(), mock_approver_report['data']['user'])
+    slack_utils.get_user_display_name.assert_called_with(slack_client, mock_approver_report['data']['user'])
 
     fyle_utils.get_fyle_resource_url.assert_called()
     fyle_utils.get_fyle_resource_url.assert_called_with(mock_fyle_refresh_token, mock_approver_report['data'], 'REPORT')
@@ -96,3 +92,77 @@ def test_report_approve(user_feedback, notification_messages, fyle_utils, slack_
 
     notification_messages.get_report_approval_notification.assert_called()
     notification_messages.get_report_approval_notification.assert_called_with(mock_approved_report['data'], mock_user_display_name, mock_report_url, report_approved_message)
+
+
+def get_digest_blocks():
+    def get_approval_notification_blocks(report_id):
+        return [
+            {'type': 'section', 'text': {'type': 'mrkdwn', 'text': report_id}},
+            {'type': 'section', 'fields': []},
+            {'type': 'section', 'fields': []},
+            {'type': 'actions', 'elements': [
+                {'type': 'button', 'action_id': 'approve_report', 'value': report_id},
+                {'type': 'button', 'action_id': 'review_report_in_slack', 'value': report_id}
+            ]},
+            {'type': 'context', 'elements': []}
+        ]
+
+    return [
+        {'type': 'section', 'text': {'type': 'mrkdwn', 'text': '*:bell: You have 2 new notifications from Fyle*'}},
+        {'type': 'divider'},
+        *get_approval_notification_blocks('rp1'),
+        {'type': 'divider'},
+        *get_approval_notification_blocks('rp2'),
+        {'type': 'divider'}
+    ]
+
+
+def test_approve_report_from_digest(mocker):
+    digest_blocks = get_digest_blocks()
+    slack_payload = {'actions': [{'value': 'rp2'}], 'message': {'ts': 'digest-ts', 'blocks': digest_blocks}}
+
+    slack_client = mocker.patch('fyle_slack_app.slack.interactives.block_action_handlers.slack_utils.get_slack_client').return_value
+    mocker.patch('fyle_slack_app.slack.interactives.block_action_handlers.slack_utils.get_slack_user_dm_channel_id', return_value='D1')
+    mock_async_task = mocker.patch('fyle_slack_app.slack.interactives.block_action_handlers.async_task')
+
+    BlockActionHandler().approve_report(slack_payload, 'U1', 'T1')
+
+    # Only the approve cta of the report is replaced, the rest of the digest is sent back as it is
+    _, kwargs = slack_client.chat_update.call_args
+    assert len(kwargs['blocks']) == len(digest_blocks)
+    assert kwargs['blocks'][5]['elements'][0]['action_id'] == 'approve_report'
+    assert kwargs['blocks'][11]['elements'][0]['action_id'] == 'pre_auth_message_approve'
+
+    args, kwargs = mock_async_task.call_args
+    assert args[0] == TaskLane.INTERACTIVE
+    assert args[6] == digest_blocks[8:13] and kwargs['is_digest_message'] is True
+
+
+def test_report_approval_updates_only_report_blocks_of_digest(mocker):
+    digest_blocks = get_digest_blocks()
+
+    mock_user = mock.Mock(spec=User, fyle_user_id='us1', fyle_refresh_token='token', slack_dm_channel_id='D1')
+    mocker.patch('fyle_slack_app.fyle.report_approvals.tasks.utils.get_or_none', return_value=mock_user)
+    mocker.patch('fyle_slack_app.fyle.report_approvals.tasks.fyle_utils')
+    mocker.patch('fyle_slack_app.fyle.report_approvals.tasks.UserFeedback')
+
+    mock_report_approval = mocker.patch('fyle_slack_app.fyle.report_approvals.tasks.FyleReportApproval').return_value
+    mock_report_approval.get_report_by_id.return_value = {'data': {'id': 'rp2', 'user': {}}}
+    mock_report_approval.can_approve_report.return_value = (True, None)
+    mock_report_approval.approve_report.return_value = {'data': {'id': 'rp2', 'user': {}}}
+
+    mock_slack_utils = mocker.patch('fyle_slack_app.fyle.report_approvals.tasks.slack_utils')
+    mock_slack_utils.get_slack_latest_parent_message.return_value = {'text': 'digest-title', 'blocks': digest_blocks}
+    slack_client = mock_slack_utils.get_slack_client.return_value
+
+    approved_blocks = [{'type': 'section', 'text': {'type': 'mrkdwn', 'text': 'Expense report approved :rocket:'}}]
+    mocker.patch('fyle_slack_app.fyle.report_approvals.tasks.notification_messages.get_report_approval_notification', return_value=(approved_blocks, 'report-title'))
+
+    process_report_approval('rp2', 'U1', 'T1', 'digest-ts', digest_blocks[8:13], False, is_digest_message=True)
+
+    slack_client.chat_update.assert_called_once_with(
+        text='digest-title',
+        channel='D1',
+        blocks=digest_blocks[:8] + approved_blocks + digest_blocks[13:],
+        ts='digest-ts'
+    )
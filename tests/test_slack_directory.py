@@ -0,0 +1,121 @@
+import mock
+import pytest
+
+from django.core.cache import cache
+from slack_sdk.errors import SlackApiError
+
+from fyle_slack_app.libs.task_lanes import TaskLane
+from fyle_slack_app.slack import directory, utils
+from fyle_slack_app.slack.events.handlers import SlackEventHandler
+from fyle_slack_app.slack.web_client import FyleSlackWebClient
+
+
+def get_workspace_user(slack_user_id, email, **kwargs):
+    return {'id': slack_user_id, 'deleted': False, 'is_bot': False, 'profile': {'email': email}, **kwargs}
+
+
+@pytest.fixture
+def use_locmem_cache_backend(settings, mocker):
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+    cache.clear()
+    mocker.patch.object(directory, '_slack_members', directory.LRUCache(max_size=10))
+
+
+@pytest.mark.usefixtures('use_locmem_cache_backend')
+class TestSlackDirectory:
+
+    def test_directory_is_loaded_by_paging_through_members(self):
+        slack_client = mock.Mock(team_id='T1')
+        slack_client.users_list.side_effect = [
+            {'members': [get_workspace_user('U1', 'Jane@Fyle.in'), get_workspace_user('B1', 'bot@fyle.in', is_bot=True)], 'response_metadata': {'next_cursor': 'page-2'}},
+            {'members': [get_workspace_user('U2', 'john@fyle.in'), get_workspace_user('U3', 'left@fyle.in', deleted=True)], 'response_metadata': {'next_cursor': ''}}
+        ]
+
+        directory.load_slack_directory(slack_client)
+
+        slack_client.users_list.assert_called_with(limit=directory.SLACK_DIRECTORY_PAGE_SIZE, cursor='page-2')
+        assert [directory.get_slack_user_id(slack_client, email) for email in ['jane@fyle.in', 'john@fyle.in', 'bot@fyle.in', 'left@fyle.in']] == ['U1', 'U2', None, None]
+        slack_client.users_lookupByEmail.assert_not_called()
+
+
+    def test_directory_is_stored_in_chunks(self, mocker):
+        mocker.patch.object(directory, 'SLACK_DIRECTORY_CHUNK_SIZE', 2)
+        mock_async_task = mocker.patch('fyle_slack_app.slack.directory.async_task')
+
+        slack_client = mock.Mock(team_id='T1')
+        slack_client.users_list.return_value = {'members': [get_workspace_user('U{}'.format(index), 'user{}@fyle.in'.format(index)) for index in range(5)]}
+
+        directory.load_slack_directory(slack_client)
+
+        slack_directory = directory.get_slack_directory('T1')
+        assert slack_directory['chunk_count'] == 3
+        assert sum(len(cache.get(directory.get_chunk_key('T1', slack_directory, chunk_index=index))) for index in range(3)) == 5
+        assert [directory.get_slack_user_id(slack_client, 'user{}@fyle.in'.format(index)) for index in range(5)] == ['U0', 'U1', 'U2', 'U3', 'U4']
+
+        # A member of an evicted chunk is looked up and the directory loaded again
+        cache.delete(directory.get_chunk_key('T1', slack_directory, 'jane@fyle.in'))
+        slack_client.users_lookupByEmail.return_value = {'user': {'id': 'U9'}}
+
+        assert directory.get_slack_user_id(slack_client, 'jane@fyle.in') == 'U9'
+        mock_async_task.assert_called_once_with(TaskLane.BULK, 'fyle_slack_app.slack.events.tasks.refresh_slack_directory', 'T1')
+
+
+    def test_display_name_needs_no_slack_call_once_loaded(self):
+        slack_client = mock.Mock(spec=FyleSlackWebClient, team_id='T1')
+        slack_client.users_list.return_value = {'members': [get_workspace_user('U1', 'jane@fyle.in')]}
+
+        directory.load_slack_directory(slack_client)
+
+        assert utils.get_user_display_name(slack_client, {'email': 'Jane@fyle.in', 'full_name': 'Jane'}) == '<@U1>'
+        assert utils.get_user_display_name(slack_client, {'email': 'guest@fyle.in', 'full_name': 'Guest'}) == 'Guest'
+        slack_client.users_lookupByEmail.assert_not_called()
+
+
+    def test_missing_directory_is_scheduled_and_looked_up(self, mocker):
+        mock_async_task = mocker.patch('fyle_slack_app.slack.directory.async_task')
+
+        slack_client = mock.Mock(team_id='T1')
+        slack_client.users_lookupByEmail.return_value = {'user': {'id': 'U1'}}
+
+        assert directory.get_slack_user_id(slack_client, 'jane@fyle.in') == 'U1'
+        assert directory.get_slack_user_id(slack_client, 'jane@fyle.in') == 'U1'
+
+        mock_async_task.assert_called_once_with(TaskLane.BULK, 'fyle_slack_app.slack.events.tasks.refresh_slack_directory', 'T1')
+        slack_client.users_lookupByEmail.assert_called_once_with(email='jane@fyle.in')
+
+
+    def test_missing_member_is_kept_until_directory_is_loaded(self, mocker):
+        mocker.patch('fyle_slack_app.slack.directory.async_task')
+
+        slack_client = mock.Mock(team_id='T1')
+        slack_client.users_lookupByEmail.side_effect = SlackApiError('users_not_found', {'ok': False, 'error': 'users_not_found'})
+
+        assert directory.get_slack_user_id(slack_client, 'guest@fyle.in') is None
+
+        # Other processes don't look the email up again either
+        directory._slack_members.clear()
+        assert directory.get_slack_user_id(slack_client, 'guest@fyle.in') is None
+        slack_client.users_lookupByEmail.assert_called_once_with(email='guest@fyle.in')
+
+
+    def test_member_events_keep_directory_fresh(self):
+        slack_client = mock.Mock(team_id='T1')
+        slack_client.users_list.return_value = {'members': [get_workspace_user('U1', 'jane@fyle.in')]}
+
+        directory.load_slack_directory(slack_client)
+
+        event_handler = SlackEventHandler()
+        event_handler.handle_event_callback('user_change', {'event': {'user': get_workspace_user('U1', 'jane.doe@fyle.in')}}, 'T1')
+
+        with mock.patch('fyle_slack_app.slack.events.handlers.schedule'):
+            event_handler.handle_event_callback('team_join', {'event': {'user': get_workspace_user('U2', 'john@fyle.in')}}, 'T1')
+
+        assert directory.get_slack_user_id(slack_client, 'jane.doe@fyle.in') == 'U1'
+        assert directory.get_slack_user_id(slack_client, 'john@fyle.in') == 'U2'
+
+        event_handler.handle_event_callback('user_change', {'event': {'user': get_workspace_user('U2', 'john@fyle.in', deleted=True)}}, 'T1')
+        assert directory.get_slack_user_id(slack_client, 'john@fyle.in') is None
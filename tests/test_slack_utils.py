@@ -18,6 +18,18 @@ class TestSlackUtils:
         mocker.patch('slack_sdk.web.WebClient', return_value = True)
         assert utils.get_slack_client(TEAM_ID)
 
+    def test_slack_client_is_reused_until_invalidated(self, mocker):
+        mocker.patch.object(utils, '_slack_clients', utils.LRUCache(max_size=10))
+        mock_get_or_none = mocker.patch('fyle_slack_app.libs.utils.get_or_none', return_value=mock.MagicMock(spec=Team))
+
+        slack_client = utils.get_slack_client('T_REUSED')
+        assert utils.get_slack_client('T_REUSED') is slack_client
+        assert mock_get_or_none.call_count == 1
+
+        utils.invalidate_slack_client('T_REUSED')
+        assert utils.get_slack_client('T_REUSED') is not slack_client
+        assert mock_get_or_none.call_count == 2
+
     def test_get_slack_user_dm_channel_id(self, mocker):
         mock_slack_user_dm_channel = {
             'ok': True,
@@ -113,3 +125,26 @@ class TestSlackUtils:
         mock_user.slack_dm_channel_id = 'slack_dm_channel_id'
         slack_client.chat_update.return_value = True
         assert utils.update_slack_parent_message(mock_user, slack_client, parent_message, [], True, True) is None
+
+    def test_view_render_versions(self, settings):
+        settings.CACHES = {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            }
+        }
+        assert utils.is_latest_view_render('fake-view-id', 'amount', None)
+
+        first_render_version = utils.get_next_view_render_version('fake-view-id', 'amount')
+        assert utils.is_latest_view_render('fake-view-id', 'amount', first_render_version)
+
+        latest_render_version = utils.get_next_view_render_version('fake-view-id', 'amount')
+        assert not utils.is_latest_view_render('fake-view-id', 'amount', first_render_version)
+        assert utils.is_latest_view_render('fake-view-id', 'amount', latest_render_version)
+
+        # Renders of other types or views don't supersede each other
+        category_render_version = utils.get_next_view_render_version('fake-view-id', 'category')
+        assert utils.is_latest_view_render('fake-view-id', 'amount', latest_render_version)
+        assert utils.is_latest_view_render('fake-view-id', 'category', category_render_version)
+
+        assert utils.is_latest_view_render('other-fake-view-id', 'amount', utils.get_next_view_render_version('other-fake-view-id', 'amount'))
+        assert utils.is_latest_view_render('fake-view-id', 'amount', latest_render_version)
@@ -0,0 +1,171 @@
+import inspect
+
+import mock
+import pytest
+import requests
+
+from slack_sdk.errors import SlackApiError
+from slack_sdk.http_retry import HttpRequest, HttpResponse, RetryState
+from slack_sdk.web import WebClient
+
+from fyle_slack_app.libs.rate_limit import TokenBucket
+from fyle_slack_app.slack import web_client
+from fyle_slack_app.slack.web_client import FyleSlackWebClient, SlackRateLimitRetryHandler
+
+
+class TestTokenBucket:
+
+    def test_calls_beyond_burst_are_spaced_out(self, mocker):
+        mock_time = mocker.patch('fyle_slack_app.libs.rate_limit.time')
+        mock_time.monotonic.return_value = 100
+
+        bucket = TokenBucket(rate=2, capacity=2)
+
+        assert [bucket.reserve() for _ in range(4)] == [0, 0, 0.5, 1]
+
+        mock_time.monotonic.return_value = 102
+        assert bucket.reserve() == 0
+
+
+    def test_blocked_bucket_waits_out_the_block(self, mocker):
+        mock_time = mocker.patch('fyle_slack_app.libs.rate_limit.time')
+        mock_time.monotonic.return_value = 100
+
+        bucket = TokenBucket(rate=1, capacity=5)
+        bucket.block(30)
+
+        assert bucket.reserve() == 31
+
+
+    def test_reserve_beyond_max_delay_takes_no_token(self, mocker):
+        mock_time = mocker.patch('fyle_slack_app.libs.rate_limit.time')
+        mock_time.monotonic.return_value = 100
+
+        bucket = TokenBucket(rate=1, capacity=1)
+
+        assert bucket.reserve(max_delay=0) == 0
+        assert bucket.reserve(max_delay=0.5) is None
+        assert bucket.reserve(max_delay=1) == 1
+
+
+class TestFyleSlackWebClient:
+
+    def test_calls_are_delayed_within_tier_limit(self, mocker):
+        mocker.patch.object(web_client, '_slack_rate_limit_buckets', web_client.LRUCache(max_size=10))
+        mock_sleep = mocker.patch('fyle_slack_app.slack.web_client.time.sleep')
+        mock_api_call = mocker.patch('slack_sdk.web.WebClient.api_call')
+
+        # Tier 2 allows a burst of 3 calls
+        slack_client = FyleSlackWebClient(token='xoxb-token', team_id='T_DELAYED')
+        for _ in range(4):
+            slack_client.users_list()
+
+        assert mock_api_call.call_count == 4
+        mock_sleep.assert_called_once()
+
+
+    def test_messages_are_limited_per_channel(self, mocker):
+        mocker.patch.object(web_client, '_slack_rate_limit_buckets', web_client.LRUCache(max_size=10))
+
+        first_channel_bucket = web_client.get_slack_rate_limit_bucket('T1', 'chat.postMessage', 'D1')
+
+        assert web_client.get_slack_rate_limit_bucket('T1', 'chat.postMessage', 'D1') is first_channel_bucket
+        assert web_client.get_slack_rate_limit_bucket('T1', 'chat.postMessage', 'D2') is not first_channel_bucket
+        assert web_client.get_call_channel({'json': {'channel': 'D1', 'text': 'hi'}}) == 'D1'
+
+
+    def test_rate_limited_call_holds_back_its_tier(self, mocker):
+        mocker.patch.object(web_client, '_slack_rate_limit_buckets', web_client.LRUCache(max_size=10))
+        mock_sleep = mocker.patch('slack_sdk.http_retry.builtin_handlers.time.sleep')
+
+        retry_handler = SlackRateLimitRetryHandler('T_LIMITED', max_retry_count=2)
+
+        retry_handler.prepare_for_next_attempt(
+            state=RetryState(),
+            request=HttpRequest(method='POST', url='https://slack.com/api/views.update', headers={}),
+            response=HttpResponse(status_code=429, headers={'Retry-After': ['20']})
+        )
+
+        mock_sleep.assert_called_once()
+        assert web_client.get_slack_rate_limit_bucket('T_LIMITED', 'views.publish').reserve() > 19
+
+
+    def test_calls_which_cant_wait_fail_fast(self, mocker):
+        mocker.patch.object(web_client, '_slack_rate_limit_buckets', web_client.LRUCache(max_size=10))
+        mock_sleep = mocker.patch('fyle_slack_app.slack.web_client.time.sleep')
+        mock_api_call = mocker.patch('slack_sdk.web.WebClient.api_call')
+
+        # Tier 2 allows a burst of 3 calls, the next one would wait 3 seconds
+        slack_client = FyleSlackWebClient(token='xoxb-token', team_id='T_REQUEST')
+        with web_client.max_slack_rate_limit_wait(1):
+            for _ in range(3):
+                slack_client.users_list()
+
+            with pytest.raises(SlackApiError) as error:
+                slack_client.users_list()
+
+        assert error.value.response['error'] == 'ratelimited'
+        assert mock_api_call.call_count == 3
+        mock_sleep.assert_not_called()
+
+        # Outside the block the call waits for its turn
+        slack_client.users_list()
+        assert mock_api_call.call_count == 4
+        mock_sleep.assert_called_once()
+
+
+    def test_rate_limited_call_isnt_retried_beyond_max_wait(self):
+        retry_handler = SlackRateLimitRetryHandler('T_REQUEST_LIMITED', max_retry_count=2)
+        request = HttpRequest(method='POST', url='https://slack.com/api/views.update', headers={})
+        response = HttpResponse(status_code=429, headers={'Retry-After': ['20']})
+
+        assert retry_handler.can_retry(state=RetryState(), request=request, response=response)
+
+        with web_client.max_slack_rate_limit_wait(1):
+            assert not retry_handler.can_retry(state=RetryState(), request=request, response=response)
+
+
+    def test_requests_go_through_pooled_session(self, mocker):
+        mocker.patch.object(web_client, '_slack_rate_limit_buckets', web_client.LRUCache(max_size=10))
+        mock_session = mocker.patch('fyle_slack_app.slack.web_client.http.get_session').return_value
+
+        response = requests.Response()
+        response.status_code = 200
+        response.headers['Content-Type'] = 'application/json; charset=utf-8'
+        response._content = b'{"ok": true, "channel": {"id": "D1"}}'
+        mock_session.request.return_value = response
+
+        slack_client = FyleSlackWebClient(token='xoxb-token', team_id='T_POOLED')
+        assert slack_client.conversations_open(users=['U1'])['channel']['id'] == 'D1'
+
+        request_kwargs = mock_session.request.call_args.kwargs
+        assert request_kwargs['url'] == 'https://slack.com/api/conversations.open'
+        assert request_kwargs['headers']['Authorization'] == 'Bearer xoxb-token'
+
+        response.status_code = 404
+        response._content = b'{"ok": false, "error": "channel_not_found"}'
+        with pytest.raises(SlackApiError):
+            slack_client.conversations_open(users=['U1'])
+
+
+    def test_sdk_still_requests_through_overridden_method(self):
+        # pylint: disable=protected-access
+        overridden_method = WebClient._perform_urllib_http_request_internal
+
+        assert list(inspect.signature(overridden_method).parameters) == ['self', 'url', 'req']
+        assert 'self._perform_urllib_http_request_internal(url, req)' in inspect.getsource(WebClient._perform_urllib_http_request)
+
+
+    def test_token_is_reloaded_after_reinstall(self, mocker):
+        mocker.patch.object(web_client, '_slack_rate_limit_buckets', web_client.LRUCache(max_size=10))
+        mock_team_objects = mocker.patch('fyle_slack_app.slack.web_client.Team.objects')
+        mock_team_objects.filter.return_value.values_list.return_value.first.return_value = 'xoxb-new-token'
+
+        invalid_auth_error = SlackApiError('invalid_auth', mock.MagicMock(get=lambda key: 'invalid_auth'))
+        mock_api_call = mocker.patch('slack_sdk.web.WebClient.api_call', side_effect=[invalid_auth_error, {'ok': True}])
+
+        slack_client = FyleSlackWebClient(token='xoxb-old-token', team_id='T_REINSTALLED')
+
+        assert slack_client.users_list() == {'ok': True}
+        assert slack_client.token == 'xoxb-new-token'
+        assert mock_api_call.call_count == 2
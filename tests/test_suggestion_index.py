@@ -0,0 +1,134 @@
+import mock
+import pytest
+
+from django.core.cache import cache
+
+from fyle_slack_app.libs.task_lanes import TaskLane
+from fyle_slack_app.fyle.expenses import suggestion_index
+from fyle_slack_app.fyle.expenses.suggestion_index import SuggestionIndex
+
+
+@pytest.fixture
+def use_locmem_cache_backend(settings):
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+    cache.clear()
+
+
+def get_record(record_id, name, is_enabled=True, restricted_project_ids=None):
+    return {
+        'id': record_id,
+        'name': name,
+        'is_enabled': is_enabled,
+        'restricted_project_ids': restricted_project_ids
+    }
+
+
+class TestSuggestionIndex:
+
+    def test_search_matches_substrings_in_name_order(self):
+        index = SuggestionIndex([
+            get_record(1, 'Travel - Flight'),
+            get_record(2, 'Food'),
+            get_record(3, 'Air Travel'),
+            get_record(4, 'Trave')
+        ], synced_at=0)
+
+        assert [record['id'] for record in index.search('travel')] == [3, 1]
+        assert [record['id'] for record in index.search('TR')] == [3, 4, 1]
+        assert [record['id'] for record in index.search('')] == [3, 2, 4, 1]
+        assert [record['id'] for record in index.search('', limit=2)] == [3, 2]
+        assert index.search('train') == []
+
+
+    def test_search_applies_record_filter(self):
+        index = SuggestionIndex([
+            get_record(1, 'Office Supplies', restricted_project_ids=[10]),
+            get_record(2, 'Office Rent'),
+            get_record(3, 'Office Party', restricted_project_ids=[20])
+        ], synced_at=0)
+
+        def category_filter(category):
+            return category['restricted_project_ids'] is None or 10 in category['restricted_project_ids']
+
+        assert [record['id'] for record in index.search('office', record_filter=category_filter)] == [2, 1]
+
+
+@pytest.mark.usefixtures('use_locmem_cache_backend')
+class TestSuggestionIndexRefresh:
+
+    def test_snapshot_is_built_and_refreshed_incrementally(self, mocker):
+        mock_async_task = mocker.patch('fyle_slack_app.fyle.expenses.suggestion_index.async_task')
+
+        fyle_expense = mock.Mock(org_id='orfake1', slack_user_id='U1')
+
+        assert suggestion_index.search_suggestions(fyle_expense, 'project', 'pro') is None
+        mock_async_task.assert_called_once_with(TaskLane.BULK, 'fyle_slack_app.fyle.expenses.tasks.refresh_suggestion_index', 'U1', 'project')
+
+        fyle_expense.get_projects.return_value = {
+            'count': 2,
+            'data': [
+                {'id': 1, 'display_name': 'Project Apollo', 'is_enabled': True},
+                {'id': 2, 'display_name': 'Project Gemini', 'is_enabled': True}
+            ]
+        }
+        suggestion_index.refresh_suggestion_index(fyle_expense, 'project')
+
+        suggestions = suggestion_index.search_suggestions(fyle_expense, 'project', 'apo')
+        assert [project['id'] for project in suggestions] == [1]
+
+        fyle_expense.get_projects.return_value = {
+            'count': 2,
+            'data': [
+                {'id': 1, 'display_name': 'Project Apollo', 'is_enabled': False},
+                {'id': 3, 'display_name': 'Project Artemis', 'is_enabled': True}
+            ]
+        }
+        suggestion_index.refresh_suggestion_index(fyle_expense, 'project')
+
+        query_params = fyle_expense.get_projects.call_args[0][0]
+        assert query_params['updated_at'].startswith('gte.') and 'is_enabled' not in query_params
+
+        snapshot = cache.get(suggestion_index.get_snapshot_key(fyle_expense, 'project'))
+        assert sorted(record['id'] for record in snapshot['records']) == [2, 3]
+
+
+    def test_failed_refresh_releases_refresh_lock(self, mocker):
+        mock_async_task = mocker.patch('fyle_slack_app.fyle.expenses.suggestion_index.async_task')
+
+        fyle_expense = mock.Mock(org_id='orfake1', slack_user_id='U1')
+        fyle_expense.get_categories.side_effect = TimeoutError('Read timed out')
+
+        assert suggestion_index.search_suggestions(fyle_expense, 'category', 'tra') is None
+        assert mock_async_task.call_count == 1
+
+        with pytest.raises(TimeoutError):
+            suggestion_index.refresh_suggestion_index(fyle_expense, 'category')
+
+        # Next search queues the refresh again instead of waiting out the lock
+        assert suggestion_index.search_suggestions(fyle_expense, 'category', 'tra') is None
+        assert mock_async_task.call_count == 2
+
+
+    def test_user_scoped_lists_are_indexed_per_user(self):
+        first_user_expense = mock.Mock(org_id='orfake1', slack_user_id='U1')
+        second_user_expense = mock.Mock(org_id='orfake1', slack_user_id='U2')
+
+        # Projects and cost centers a spender gets depend on the user, categories are the same across the org
+        assert suggestion_index.get_snapshot_key(first_user_expense, 'project') != suggestion_index.get_snapshot_key(second_user_expense, 'project')
+        assert suggestion_index.get_snapshot_key(first_user_expense, 'cost_center') != suggestion_index.get_snapshot_key(second_user_expense, 'cost_center')
+        assert suggestion_index.get_snapshot_key(first_user_expense, 'category') == suggestion_index.get_snapshot_key(second_user_expense, 'category')
+
+
+class TestRankSuggestions:
+
+    def test_matches_are_ranked(self):
+        merchants = ['Uber Eats', 'Starbucks', 'Uber', 'Le Uber Cafe', 'Suberb', 'Amazon']
+
+        assert suggestion_index.rank_suggestions(merchants, 'uber', limit=10) == ['Uber', 'Uber Eats', 'Le Uber Cafe', 'Suberb']
+        assert suggestion_index.rank_suggestions(merchants, 'uber', limit=2) == ['Uber', 'Uber Eats']
+        assert suggestion_index.rank_suggestions(merchants, '', limit=3) == ['Uber Eats', 'Starbucks', 'Uber']
+        assert suggestion_index.rank_suggestions(merchants, 'zomato', limit=10) == []
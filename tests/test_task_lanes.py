@@ -0,0 +1,48 @@
+import ast
+
+from fyle_slack_app.libs import task_lanes
+from fyle_slack_app.libs.task_lanes import TaskLane
+
+
+class TestTaskLanes:
+
+    def test_task_is_queued_on_lane_broker(self, mocker, settings):
+        settings.Q_CLUSTER_LANES = {'bulk': {'name': 'fyle_slack_bulk'}}
+
+        mock_get_broker = mocker.patch('django_q.brokers.get_broker')
+        mock_async_task = mocker.patch('django_q.tasks.async_task')
+
+        task_lanes.async_task(TaskLane.BULK, 'fyle_slack_app.slack.events.tasks.uninstall_app', 'T1', q_options={'timeout': 60})
+
+        mock_get_broker.assert_called_once_with('fyle_slack_bulk')
+        mock_async_task.assert_called_once_with(
+            'fyle_slack_app.slack.events.tasks.uninstall_app',
+            'T1',
+            q_options={'timeout': 60, 'broker': mock_get_broker.return_value}
+        )
+
+
+    def test_schedule_queues_task_in_lane_when_run(self, mocker):
+        mock_schedule = mocker.patch('django_q.tasks.schedule')
+        mock_async_task = mocker.patch('fyle_slack_app.libs.task_lanes.async_task')
+
+        task_lanes.schedule(TaskLane.NOTIFICATIONS, 'fyle_slack_app.fyle.notifications.tasks.send_notification_digest', 'U1', schedule_type='O')
+
+        mock_schedule.assert_called_once_with(
+            'fyle_slack_app.libs.task_lanes.queue_scheduled_task',
+            'notifications',
+            'fyle_slack_app.fyle.notifications.tasks.send_notification_digest',
+            'U1',
+            schedule_type='O'
+        )
+
+        # Scheduler runs the schedule with its arguments
+        task_lanes.queue_scheduled_task(*mock_schedule.call_args[0][1:])
+
+        mock_async_task.assert_called_once_with(TaskLane.NOTIFICATIONS, 'fyle_slack_app.fyle.notifications.tasks.send_notification_digest', 'U1')
+
+
+    def test_scheduled_task_args_are_stored_as_tuple_repr(self):
+        scheduled_task_args = task_lanes.get_scheduled_task_args(TaskLane.BULK, 'fyle_slack_app.slack.events.tasks.resume_app_uninstalls')
+
+        assert ast.literal_eval(scheduled_task_args) == ('bulk', 'fyle_slack_app.slack.events.tasks.resume_app_uninstalls')
@@ -0,0 +1,77 @@
+import os
+import queue
+
+from mixpanel import MixpanelException
+
+from fyle_slack_app import tracking
+
+
+class TestTracking:
+
+    def use_tracking_buffer(self, mocker, maxsize=100):
+        tracking_buffer = queue.Queue(maxsize=maxsize)
+
+        mocker.patch.object(tracking, '_tracking_buffer', tracking_buffer)
+        mocker.patch.object(tracking, '_tracking_buffer_pid', os.getpid())
+
+        return tracking_buffer
+
+
+    def test_events_are_buffered_and_sent_in_batches(self, mocker):
+        tracking_buffer = self.use_tracking_buffer(mocker)
+        mock_consumer = mocker.patch.object(tracking, 'mixpanel_consumer')
+
+        for event_number in range(60):
+            tracking.track_event('jane@fyle.in', 'Expense Created', {'event_number': event_number})
+
+        assert tracking_buffer.qsize() == 60
+        mock_consumer.send.assert_not_called()
+
+        tracking.flush_tracking()
+
+        assert tracking_buffer.empty()
+        assert [call.args[0] for call in mock_consumer.send.call_args_list] == ['events', 'events']
+        assert mock_consumer.send.call_args_list[0].args[1].count('Expense Created') == tracking.MIXPANEL_BATCH_SIZE
+
+
+    def test_events_beyond_buffer_are_dropped(self, mocker):
+        tracking_buffer = self.use_tracking_buffer(mocker, maxsize=1)
+
+        tracking.track_event('jane@fyle.in', 'Expense Created', {})
+        tracking.track_event('jane@fyle.in', 'Expense Created', {})
+
+        assert tracking_buffer.qsize() == 1
+
+
+    def test_failed_batch_is_dropped(self, mocker):
+        tracking_buffer = self.use_tracking_buffer(mocker)
+        mock_consumer = mocker.patch.object(tracking, 'mixpanel_consumer')
+        mock_consumer.send.side_effect = MixpanelException('Mixpanel is down')
+
+        tracking.track_event('jane@fyle.in', 'Expense Created', {})
+        tracking.flush_tracking()
+
+        assert tracking_buffer.empty()
+        mock_consumer.send.assert_called_once()
+
+
+    def test_user_is_identified_once_within_window(self, mocker):
+        mocker.patch.object(tracking, '_identified_users', tracking.LRUCache(max_size=10, timeout=60))
+        mock_people_set = mocker.patch.object(tracking.mixpanel_client, 'people_set')
+
+        tracking.identify_user('jane@fyle.in')
+        tracking.identify_user('jane@fyle.in')
+        tracking.identify_user('john@fyle.in')
+
+        assert mock_people_set.call_count == 2
+
+
+    def test_flusher_is_started_with_buffer_of_process(self, mocker, settings):
+        settings.TRACKING_FLUSHER_ENABLED = True
+        mocker.patch.object(tracking, '_tracking_buffer', None)
+        mock_start_flusher = mocker.patch.object(tracking, 'start_tracking_flusher')
+
+        tracking_buffer = tracking.get_tracking_buffer()
+
+        assert tracking.get_tracking_buffer() is tracking_buffer
+        mock_start_flusher.assert_called_once()
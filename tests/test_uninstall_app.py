@@ -0,0 +1,149 @@
+import mock
+
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from fyle_slack_app.libs.task_lanes import TaskLane
+from fyle_slack_app.models import NotificationPreference, Team, User, UserFeedback, UserFeedbackResponse, UserSubscriptionDetail
+from fyle_slack_app.slack.events import tasks
+
+
+def get_user(slack_user_id, fyle_cluster_domain='https://in.fyle.test'):
+    return mock.Mock(spec=User, slack_user_id=slack_user_id, fyle_user_id='us{}'.format(slack_user_id), fyle_refresh_token='token-{}'.format(slack_user_id), fyle_cluster_domain=fyle_cluster_domain)
+
+
+def get_subscription_detail(slack_user_id, subscription_type):
+    return mock.Mock(spec=UserSubscriptionDetail, slack_user_id=slack_user_id, subscription_type=subscription_type, subscription_id='sub{}'.format(slack_user_id), webhook_id='wh{}'.format(slack_user_id))
+
+
+class TestUninstallApp:
+
+    def mock_team(self, mocker, users, subscription_details, is_uninstalling=True):
+        team = mock.Mock(spec=Team, uninstalled_at=timezone.now())
+        mocker.patch('fyle_slack_app.slack.events.tasks.utils.get_or_none', return_value=team)
+        mocker.patch('fyle_slack_app.slack.events.tasks.transaction')
+
+        mock_teams = mocker.patch('fyle_slack_app.slack.events.tasks.Team')
+        mock_teams.objects.select_for_update.return_value.filter.return_value.exists.return_value = is_uninstalling
+
+        mock_users = mocker.patch('fyle_slack_app.slack.events.tasks.User')
+        mock_users.objects.filter.return_value.exclude.return_value.order_by.return_value.__getitem__ = mock.Mock(return_value=users)
+
+        mocker.patch('fyle_slack_app.slack.events.tasks.UserSubscriptionDetail').objects.filter.return_value = subscription_details
+
+        mock_delete_users = mocker.patch('fyle_slack_app.slack.events.tasks.delete_users')
+
+        return team, mock_delete_users
+
+
+    def test_subscriptions_are_disabled_and_team_deleted(self, mocker, settings):
+        settings.SLACK_UNINSTALL_BATCH_SIZE = 3
+
+        users = [get_user('U1'), get_user('U2', 'https://us.fyle.test')]
+        subscription_details = [
+            get_subscription_detail('U1', 'FYLER_SUBSCRIPTION'),
+            get_subscription_detail('U1', 'APPROVER_SUBSCRIPTION'),
+            get_subscription_detail('U2', 'FYLER_SUBSCRIPTION')
+        ]
+        team, mock_delete_users = self.mock_team(mocker, users, subscription_details)
+
+        mocker.patch('fyle_slack_app.slack.events.tasks.fyle_utils.get_fyle_access_token', return_value='access-token')
+        mock_upsert = mocker.patch('fyle_slack_app.slack.events.tasks.fyle_utils.upsert_fyle_subscription')
+        mock_upsert.return_value.status_code = 200
+        mock_async_task = mocker.patch('fyle_slack_app.slack.events.tasks.async_task')
+
+        tasks.uninstall_app('T1')
+
+        assert mock_upsert.call_count == 3
+        assert {call.args[0] for call in mock_upsert.call_args_list} == {'https://in.fyle.test', 'https://us.fyle.test'}
+        assert all(call.args[2]['data']['is_enabled'] is False for call in mock_upsert.call_args_list)
+
+        mock_delete_users.assert_called_once_with(users, ['whU1', 'whU1', 'whU2'])
+        team.delete.assert_called_once()
+        mock_async_task.assert_not_called()
+
+
+    def test_full_batch_queues_next_batch(self, mocker, settings):
+        settings.SLACK_UNINSTALL_BATCH_SIZE = 1
+
+        team, _ = self.mock_team(mocker, [get_user('U1')], [get_subscription_detail('U1', 'FYLER_SUBSCRIPTION')])
+        mocker.patch('fyle_slack_app.slack.events.tasks.fyle_utils.get_fyle_access_token', side_effect=Exception('Token revoked'))
+        mock_async_task = mocker.patch('fyle_slack_app.slack.events.tasks.async_task')
+
+        tasks.uninstall_app('T1')
+
+        team.delete.assert_not_called()
+        mock_async_task.assert_called_once_with(TaskLane.BULK, 'fyle_slack_app.slack.events.tasks.uninstall_app', 'T1', 1, ['U1'])
+
+
+    def test_users_whose_subscriptions_are_not_disabled_are_retried(self, mocker, settings):
+        settings.SLACK_UNINSTALL_BATCH_SIZE = 3
+        settings.SLACK_UNINSTALL_ATTEMPTS = 2
+
+        users = [get_user('U1'), get_user('U2')]
+        subscription_details = [get_subscription_detail('U1', 'FYLER_SUBSCRIPTION'), get_subscription_detail('U2', 'FYLER_SUBSCRIPTION')]
+        team, mock_delete_users = self.mock_team(mocker, users, subscription_details)
+
+        mocker.patch('fyle_slack_app.slack.events.tasks.fyle_utils.get_fyle_access_token', return_value='access-token')
+        mock_upsert = mocker.patch('fyle_slack_app.slack.events.tasks.fyle_utils.upsert_fyle_subscription')
+        mock_upsert.side_effect = lambda cluster_domain, access_token, payload, subscription_type: mock.Mock(
+            status_code=500 if payload['data']['id'] == 'subU1' else 200
+        )
+        mock_async_task = mocker.patch('fyle_slack_app.slack.events.tasks.async_task')
+
+        tasks.uninstall_app('T1')
+
+        mock_delete_users.assert_called_once_with([users[1]], ['whU2'])
+        team.delete.assert_not_called()
+        mock_async_task.assert_called_once_with(TaskLane.BULK, 'fyle_slack_app.slack.events.tasks.uninstall_app', 'T1', 2)
+
+        # The last pass deletes them anyway
+        mock_delete_users.reset_mock()
+        tasks.uninstall_app('T1', 2)
+
+        mock_delete_users.assert_called_once_with(users, ['whU1', 'whU2'])
+        team.delete.assert_called_once()
+
+
+    def test_reinstalled_team_is_not_torn_down(self, mocker):
+        team, mock_delete_users = self.mock_team(mocker, [get_user('U1')], [], is_uninstalling=False)
+        mock_async_task = mocker.patch('fyle_slack_app.slack.events.tasks.async_task')
+
+        tasks.uninstall_app('T1')
+
+        mock_delete_users.assert_not_called()
+        team.delete.assert_not_called()
+        mock_async_task.assert_not_called()
+
+
+    def test_team_not_being_uninstalled_is_skipped(self, mocker):
+        mocker.patch('fyle_slack_app.slack.events.tasks.utils.get_or_none', return_value=mock.Mock(spec=Team, uninstalled_at=None))
+        mock_users = mocker.patch('fyle_slack_app.slack.events.tasks.User')
+
+        tasks.uninstall_app('T1')
+
+        mock_users.objects.filter.assert_not_called()
+
+
+    def test_users_are_deleted_without_cascading_signals(self, mocker):
+        mock_cursor = mocker.patch('fyle_slack_app.slack.events.tasks.connection').cursor.return_value.__enter__.return_value
+        mock_update = mocker.patch.object(QuerySet, 'update', autospec=True)
+        mock_invalidate_connection = mocker.patch('fyle_slack_app.slack.events.tasks.fyle_utils.invalidate_fyle_sdk_connection')
+        mock_invalidate_routes = mocker.patch('fyle_slack_app.slack.events.tasks.routing.invalidate_webhook_routes')
+
+        tasks.delete_users([get_user('U1'), get_user('U2')], ['whU1', 'whU2'])
+
+        deleted_tables = [call.args[0].split()[2] for call in mock_cursor.execute.call_args_list]
+        assert deleted_tables[-1] == User._meta.db_table
+        assert {NotificationPreference._meta.db_table, UserSubscriptionDetail._meta.db_table} <= set(deleted_tables)
+        assert all(call.args[1] == [('U1', 'U2')] for call in mock_cursor.execute.call_args_list)
+        assert {call.args[0].model for call in mock_update.call_args_list} == {UserFeedback, UserFeedbackResponse}
+
+        assert mock_invalidate_connection.call_count == 2
+        mock_invalidate_routes.assert_called_once_with(['whU1', 'whU2'])
+
+
+    def test_every_relation_of_users_is_deleted_or_nulled(self):
+        related_models = {relation.related_model for relation in User._meta.related_objects}
+
+        assert related_models == set(tasks.USER_DELETED_RELATIONS + tasks.USER_NULLED_RELATIONS)
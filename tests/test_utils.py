@@ -0,0 +1,87 @@
+import mock
+import pytest
+
+from fyle_slack_app.libs import utils
+
+
+@pytest.fixture
+def use_locmem_cache_backend(settings):
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+    utils.cache.clear()
+
+
+@pytest.mark.usefixtures('use_locmem_cache_backend')
+class TestCacheThis:
+
+    def test_none_response_is_cached(self):
+        function = mock.Mock(return_value=None, __name__='function')
+        cached_function = utils.cache_this(timeout=60)(function)
+
+        assert cached_function('a') is None
+        assert cached_function('a') is None
+        function.assert_called_once_with('a')
+
+        cached_function.invalidate('a')
+        cached_function('a')
+        assert function.call_count == 2
+
+
+    def test_stale_entry_is_served_while_refreshed_in_background(self, mocker):
+        mock_time = mocker.patch('fyle_slack_app.libs.utils.time')
+        mock_time.time.return_value = 1000
+        mock_thread = mocker.patch('fyle_slack_app.libs.utils.threading.Thread')
+        mocker.patch('fyle_slack_app.libs.utils.connections')
+
+        function = mock.Mock(side_effect=['old', 'new'], __name__='function', __module__='tests')
+        cached_function = utils.cache_this(timeout=600, refresh_ahead=100)(function)
+
+        assert cached_function('a') == 'old'
+
+        mock_time.time.return_value = 1550
+        assert cached_function('a') == 'old'
+        assert cached_function('a') == 'old'
+
+        # Refreshed in this process, its arguments aren't stored in a queued task
+        mock_thread.assert_called_once()
+        mock_thread.return_value.start.assert_called_once()
+
+        thread_kwargs = mock_thread.call_args.kwargs
+        thread_kwargs['target'](*thread_kwargs['args'])
+        function.assert_called_with('a')
+        assert cached_function('a') == 'new'
+
+
+    def test_waits_for_other_process_computing_entry(self, mocker):
+        mocker.patch('fyle_slack_app.libs.utils.time.sleep')
+
+        function = mock.Mock(return_value='value', __name__='function')
+        cached_function = utils.cache_this(timeout=60)(function)
+
+        cache_key = 'function.{}'.format(utils.get_hashed_args(('a',), {}))
+        utils.cache.add('{}.lock'.format(cache_key), True)
+        utils.cache.set(cache_key, 'not an entry')
+
+        mocker.patch.object(utils.cache, 'get', side_effect=[None, utils.CacheEntry('computed', None)])
+
+        assert cached_function('a') == 'computed'
+        function.assert_not_called()
+
+
+    def test_local_tier_is_checked_before_shared_cache(self, mocker):
+        function = mock.Mock(return_value='value', __name__='function')
+        cached_function = utils.cache_this(timeout=60, local_timeout=10)(function)
+
+        assert cached_function('a') == 'value'
+
+        mock_cache_get = mocker.patch.object(utils.cache, 'get')
+        assert cached_function('a') == 'value'
+        mock_cache_get.assert_not_called()
+
+        cached_function.invalidate('a')
+        mock_cache_get.return_value = None
+        cached_function('a')
+        assert function.call_count == 2
@@ -0,0 +1,101 @@
+import mock
+
+from fyle_slack_app.fyle.notifications import routing
+from fyle_slack_app.libs.lru_cache import LRUCache
+from fyle_slack_app.models.notification_preferences import NotificationType
+
+
+def get_route(enabled_notifications):
+    return routing.WebhookRoute('U1', 'T1', 'D1', 'xoxb-token', enabled_notifications)
+
+
+class TestWebhookRouting:
+
+    def test_enabled_notifications_bitmask(self):
+        route = get_route(
+            routing.NOTIFICATION_TYPE_BITS[NotificationType.REPORT_PAID.value] | routing.NOTIFICATION_TYPE_BITS[NotificationType.REPORT_SUBMITTED.value]
+        )
+
+        assert route.is_enabled(NotificationType.REPORT_PAID.value)
+        assert route.is_enabled(NotificationType.REPORT_SUBMITTED.value)
+        assert not route.is_enabled(NotificationType.EXPENSE_COMMENTED.value)
+        assert not route.is_enabled('UNKNOWN_TYPE')
+
+
+    def test_routes_are_cached_and_dropped_on_change(self, mocker, settings):
+        settings.CACHES = {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            }
+        }
+        mocker.patch.object(routing, '_webhook_routes', LRUCache(max_size=10, timeout=routing.WEBHOOK_ROUTE_LOCAL_TIMEOUT))
+        mock_load_routes = mocker.patch(
+            'fyle_slack_app.fyle.notifications.routing.load_webhook_routes',
+            side_effect=[{'wh1': get_route(1)}, {'wh1': get_route(3)}]
+        )
+
+        assert routing.get_webhook_route('wh1').enabled_notifications == 1
+        assert routing.get_webhook_route('wh1').enabled_notifications == 1
+        mock_load_routes.assert_called_once_with(webhook_id='wh1')
+
+        # Other processes get the route from the cache
+        routing._webhook_routes.clear()
+        assert routing.get_webhook_route('wh1').enabled_notifications == 1
+        assert mock_load_routes.call_count == 1
+
+        # Changes to other webhooks leave the route as it is
+        routing.invalidate_webhook_routes(['wh2'])
+        assert routing.get_webhook_route('wh1').enabled_notifications == 1
+        assert mock_load_routes.call_count == 1
+
+        routing.invalidate_webhook_routes(['wh1'])
+        assert routing.get_webhook_route('wh1').enabled_notifications == 3
+        assert mock_load_routes.call_count == 2
+
+
+    def test_unknown_webhook_is_not_cached(self, mocker, settings):
+        settings.CACHES = {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            }
+        }
+        mocker.patch.object(routing, '_webhook_routes', LRUCache(max_size=10, timeout=routing.WEBHOOK_ROUTE_LOCAL_TIMEOUT))
+        mock_load_routes = mocker.patch(
+            'fyle_slack_app.fyle.notifications.routing.load_webhook_routes',
+            side_effect=[{}, {'wh2': get_route(1)}]
+        )
+
+        # Subscription of the webhook got created after the first notification
+        assert routing.get_webhook_route('wh2') is None
+        assert routing.get_webhook_route('wh2') == get_route(1)
+        assert routing.get_webhook_route('wh2') == get_route(1)
+        assert mock_load_routes.call_count == 2
+
+
+
+    def test_route_loaded_before_a_change_is_not_served_after_it(self, mocker, settings):
+        settings.CACHES = {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            }
+        }
+        mocker.patch.object(routing, '_webhook_routes', LRUCache(max_size=10, timeout=routing.WEBHOOK_ROUTE_LOCAL_TIMEOUT))
+
+        loaded_routes = [{'wh3': get_route(3)}, {'wh3': get_route(1)}]
+
+        def load_webhook_routes(**kwargs):
+            route = loaded_routes.pop()
+            if loaded_routes:
+                # Change is committed and the route dropped while the old route is being loaded
+                routing.invalidate_webhook_routes(['wh3'])
+            return route
+
+        mock_load_routes = mocker.patch('fyle_slack_app.fyle.notifications.routing.load_webhook_routes', side_effect=load_webhook_routes)
+
+        assert routing.get_webhook_route('wh3').enabled_notifications == 1
+
+        # Other processes don't get the old route from the cache
+        routing._webhook_routes.clear()
+        assert routing.get_webhook_route('wh3').enabled_notifications == 3
+        assert routing.get_webhook_route('wh3').enabled_notifications == 3
+        assert mock_load_routes.call_count == 2